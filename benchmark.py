@@ -0,0 +1,178 @@
+"""
+⏱️ ANALYZER BENCHMARK SUITE
+============================
+Times every phase of pattern_analysis.py on synthetic histories of growing size
+and records the results (plus empirical scaling exponents) as JSON.
+
+Usage:
+    python benchmark.py                                 # 10k, 100k and 1M trades
+    python benchmark.py --sizes 1000 10000 --baseline bench_results.json   # fail on regressions
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pattern_analysis as pa
+from generate_history import DEFAULT_SIZES, history_path, write_history
+from trade_schema import normalize_history
+
+PHASES = [
+    "load_data",
+    "normalize_history",
+    "group_trades_by_token",
+    "analyze_token_trades",
+    "analyze_buy_criteria",
+    "analyze_sell_criteria",
+    "build_report_model",
+    "generate_markdown_report",
+    "generate_html_report",
+]
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run_pipeline(path):
+    """Run the analyzer pipeline once, returning seconds per phase"""
+    timings = {}
+    history, timings["load_data"] = _timed(pa.load_data, path)
+    (history, _), timings["normalize_history"] = _timed(normalize_history, history)
+    buys = [t for t in history if t.action == 'BUY']
+    sells = [t for t in history if t.action == 'SELL']
+
+    tokens, timings["group_trades_by_token"] = _timed(pa.group_trades_by_token, history)
+
+    start = time.perf_counter()
+    all_completed = []
+    total_open = 0
+    for ca, token_data in tokens.items():
+        analysis = pa.analyze_token_trades(token_data)
+        for trade in analysis['completed']:
+            trade['symbol'] = token_data['symbol']
+            trade['name'] = token_data['name']
+            trade['ca'] = ca
+            all_completed.append(trade)
+        total_open += analysis['open_count']
+    timings["analyze_token_trades"] = time.perf_counter() - start
+
+    buy_criteria, timings["analyze_buy_criteria"] = _timed(pa.analyze_buy_criteria, buys)
+    sell_criteria, timings["analyze_sell_criteria"] = _timed(pa.analyze_sell_criteria, sells, buys)
+
+    model, timings["build_report_model"] = _timed(pa.build_report_model, all_completed, total_open, history,
+                                                  buys, sells, buy_criteria, sell_criteria)
+    # Reports are written to the cwd, keep them out of the repo
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            _, timings["generate_markdown_report"] = _timed(pa.generate_markdown_report, model)
+            _, timings["generate_html_report"] = _timed(pa.generate_html_report, model)
+        finally:
+            os.chdir(cwd)
+    return timings
+
+
+def scaling_exponents(sizes, results):
+    """Empirical exponent k in t ~ n^k between consecutive sizes (1.0 = linear)"""
+    curves = {}
+    for phase in PHASES:
+        points = []
+        for small, large in zip(sizes, sizes[1:]):
+            t_small = results[str(small)][phase]
+            t_large = results[str(large)][phase]
+            if t_small > 0 and t_large > 0:
+                points.append({
+                    "from": small,
+                    "to": large,
+                    "exponent": round(math.log(t_large / t_small) / math.log(large / small), 3),
+                })
+        curves[phase] = points
+    return curves
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    regressions = []
+    for size, phases in results.items():
+        old = baseline.get("results", {}).get(size)
+        if not old:
+            continue
+        for phase, seconds in phases.items():
+            # Ignore sub-10ms phases, they are all noise
+            if phase in old and old[phase] >= 0.01 and seconds > old[phase] * tolerance:
+                regressions.append((size, phase, old[phase], seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pattern_analysis.py phases")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size (best time is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default="synthetic", help="where generated histories are cached")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    print("=" * 60)
+    print("⏱️  ANALYZER BENCHMARK")
+    print("=" * 60)
+
+    results = {}
+    for n in sizes:
+        path = history_path(args.data_dir, n, args.seed)
+        if not os.path.exists(path):
+            print(f"🧪 Generating {n:,} trades...")
+            write_history(path, n, seed=args.seed)
+
+        best = {}
+        for _ in range(args.repeat):
+            for phase, seconds in run_pipeline(path).items():
+                best[phase] = min(seconds, best.get(phase, seconds))
+        results[str(n)] = best
+
+        print(f"\n📊 {n:,} trades")
+        for phase in PHASES:
+            print(f"   {phase:<26} {best[phase] * 1000:>10.1f} ms")
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sizes": sizes,
+        "results": results,
+        "scaling": scaling_exponents(sizes, results),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for size, phase, old, new in regressions:
+                print(f"   {size:>8} {phase:<26} {old * 1000:.1f} ms -> {new * 1000:.1f} ms")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
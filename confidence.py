@@ -0,0 +1,162 @@
+"""
+📏 CONFIDENCE INTERVALS & SIGNIFICANCE
+=======================================
+Bootstrap percentile intervals for means / totals and permutation tests for
+the difference in means between two groups (e.g. winning vs losing entries).
+
+All resamples are drawn as one batched array computation with numpy when it
+is installed (chunked to bound memory), so tens of thousands of resamples
+take milliseconds. Without numpy a pure-Python fallback runs fewer resamples.
+Either way the random draws are shared: one set of bootstrap indices serves
+every column of the same length, one set of relabellings every permutation test.
+Everything is seeded, so re-running a report gives the same intervals.
+"""
+
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RESAMPLES = 20000
+FALLBACK_RESAMPLES = 1000  # pure Python is ~100x slower per resample
+CONFIDENCE = 0.95
+SEED = 1234
+MAX_BATCH_CELLS = 4_000_000  # resamples x sample size drawn per numpy batch
+
+
+def default_resamples():
+    return RESAMPLES if np is not None else FALLBACK_RESAMPLES
+
+
+def _quantile(sorted_values, q):
+    pos = (len(sorted_values) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _batches(total, cells_per_resample):
+    size = max(1, MAX_BATCH_CELLS // max(1, cells_per_resample))
+    for done in range(0, total, size):
+        yield min(size, total - done)
+
+
+def _resampled_sums(columns, n, resamples, seed):
+    """name -> sum of each bootstrap resample, every column (all of length n) resampled with the same indices"""
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        arrays = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+        sums = {name: [] for name in columns}
+        for b in _batches(resamples, n):
+            picks = rng.integers(0, n, size=(b, n))
+            for name, arr in arrays.items():
+                sums[name].append(arr[picks].sum(axis=1))
+        return {name: np.concatenate(parts) for name, parts in sums.items()}
+    rng = random.Random(seed)
+    rows = list(range(n))
+    getters = {name: values.__getitem__ for name, values in columns.items()}
+    sums = {name: [] for name in columns}
+    for _ in range(resamples):
+        picks = rng.choices(rows, k=n)
+        for name, get in getters.items():
+            sums[name].append(sum(map(get, picks)))
+    return sums
+
+
+def bootstraps(columns, stat="mean", resamples=None, confidence=CONFIDENCE, seed=SEED):
+    """
+    name -> {'estimate', 'low', 'high', 'n'} percentile interval of the mean or sum of each column
+    (None for < 2 values). Columns left with the same number of values share their resample indices.
+    """
+    resamples = resamples or default_resamples()
+    tail = (1 - confidence) / 2
+    by_length = {}
+    for name, values in columns.items():
+        values = [v for v in values if v is not None]
+        by_length.setdefault(len(values), {})[name] = values
+    
+    results = {}
+    for n, group in by_length.items():
+        if n < 2:
+            results.update(dict.fromkeys(group))
+            continue
+        scale = 1 / n if stat == "mean" else 1
+        for name, sums in _resampled_sums(group, n, resamples, seed).items():
+            if np is not None:
+                low, high = np.quantile(sums, [tail, 1 - tail])
+            else:
+                sums.sort()
+                low, high = _quantile(sums, tail), _quantile(sums, 1 - tail)
+            results[name] = {
+                'estimate': math.fsum(group[name]) * scale,
+                'low': float(low) * scale,
+                'high': float(high) * scale,
+                'n': n,
+            }
+    return {name: results[name] for name in columns}
+
+
+def bootstrap(values, stat="mean", resamples=None, confidence=CONFIDENCE, seed=SEED):
+    """{'estimate', 'low', 'high', 'n'} percentile interval of the mean or sum; None for < 2 values"""
+    return bootstraps({'x': values}, stat, resamples, confidence, seed)['x']
+
+
+def permutation_tests(in_a, columns, resamples=None, seed=SEED):
+    """
+    Two-sided permutation tests for mean(group A) - mean(group B) on several columns at once.
+    `in_a` flags each row's group; `columns` maps name -> values aligned with `in_a`. The same random
+    relabellings are reused for every column. Returns name -> {'mean_a', 'mean_b', 'diff', 'p_value',
+    'n_a', 'n_b'}, or None for every column if a group is empty.
+    """
+    n = len(in_a)
+    n_a = sum(1 for flag in in_a if flag)
+    n_b = n - n_a
+    if not n_a or not n_b:
+        return {name: None for name in columns}
+    resamples = resamples or default_resamples()
+
+    results = {}
+    observed = {}
+    totals = {}
+    for name, values in columns.items():
+        sum_a = math.fsum(v for v, flag in zip(values, in_a) if flag)
+        totals[name] = math.fsum(values)
+        observed[name] = sum_a / n_a - (totals[name] - sum_a) / n_b
+        results[name] = {
+            'mean_a': sum_a / n_a,
+            'mean_b': (totals[name] - sum_a) / n_b,
+            'diff': observed[name],
+            'n_a': n_a,
+            'n_b': n_b,
+        }
+    extreme = dict.fromkeys(columns, 0)
+
+    # Only the relabelled group A sum is needed: diff = sum_a/n_a - (total - sum_a)/n_b
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        arrays = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+        for size in _batches(resamples, n):
+            picks = np.argpartition(rng.random((size, n)), n_a - 1, axis=1)[:, :n_a]  # a random n_a-subset per row
+            for name, arr in arrays.items():
+                sums_a = arr[picks].sum(axis=1)
+                diffs = sums_a / n_a - (totals[name] - sums_a) / n_b
+                extreme[name] += int(np.count_nonzero(np.abs(diffs) >= abs(observed[name]) - 1e-12))
+    else:
+        # Draw whichever group is smaller; the other group's sum is the column total minus it
+        rng = random.Random(seed)
+        rows = list(range(n))
+        k = min(n_a, n_b)
+        getters = {name: list(values).__getitem__ for name, values in columns.items()}
+        for _ in range(resamples):
+            picks = rng.sample(rows, k)
+            for name, get in getters.items():
+                sum_a = sum(map(get, picks)) if k == n_a else totals[name] - sum(map(get, picks))
+                extreme[name] += abs(sum_a / n_a - (totals[name] - sum_a) / n_b) >= abs(observed[name]) - 1e-12
+
+    for name, result in results.items():
+        result['p_value'] = (extreme[name] + 1) / (resamples + 1)
+    return results
+
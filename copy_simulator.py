@@ -0,0 +1,402 @@
+"""
+🎯 COPY-TRADE REPLAY SIMULATOR
+===============================
+The paper P/L in trade_history.json fills at the bot's price. Our real fills
+come `timestamp_detected - timestamp` seconds later, at our own size, after
+his trade already moved the pool. This replays a capture and re-fills every
+round-trip under a grid of detection delays and trade sizes:
+
+    entry = his buy price  x drift over the delay x his impact x our impact
+    exit  = his sell price x drift over the delay / his impact / our impact
+
+Drift is observed, not extrapolated: the last price seen for the mint by the
+time our fill lands - a later trade of the same token in the capture, or a
+point of the tracker's position price series (position_samples.json /
+closed_samples.jsonl) - over his fill price. With nothing observed in between
+the drift is 0, and it is only ever applied against us (a delayed buy never
+fills below his, a delayed sell never above his). Impact follows a constant-product pool whose SOL side
+is half the snapshot `liquidity`: buying v USD fills at p*(1 + v/R), selling
+v USD worth fills at p/(1 + v/R). Fees are FEE_PCT per swap (what the paper
+trader charged) plus an optional flat FEE_SOL.
+
+The replay walks the history in time order and pairs each SELL with the
+oldest open BUY of the token (FIFO, like the analyzer). All scenarios are
+then evaluated in one broadcast pass over the round-trip columns - numpy
+when installed, a plain loop otherwise - and each gets a cumulative P/L
+curve by exit time.
+
+    python copy_simulator.py trade_history.json --delays 0,5,15,30,60,detected --sizes 0.1,0.5,1.5
+    python copy_simulator.py trade_history.json --samples position_samples.json closed_samples.jsonl
+    # -> copy_simulation.json + copy_simulation.html
+"""
+
+import argparse
+import json
+import math
+import os
+from bisect import bisect_right
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+from confidence import np
+from history_store import HistoryStore
+from pattern_analysis import HIS_SOL_PER_TRADE, YOUR_SOL_PER_TRADE, load_data
+from trade_schema import ensure_records
+
+DELAYS = [0, 5, 15, 30, 60, "detected"]  # seconds after the bot's trade; "detected" = each trade's own lag
+SIZES = [YOUR_SOL_PER_TRADE, 0.5, HIS_SOL_PER_TRADE]  # SOL per trade
+FEE_PCT = 1.0  # per swap
+FEE_SOL = 0.0  # flat per swap (priority fee / tip)
+SAMPLE_FILES = ["position_samples.json", "closed_samples.jsonl"]  # the tracker's position price series
+FALLBACK_SOL_USD = 135.0  # only when no trade in the capture carries a SOL price
+CURVE_POINTS = 500  # max points kept per P/L curve
+
+
+def _sol_usd(buy, sell):
+    """SOL price in USD around the round-trip: from a snapshot if either has one, else from a trade's own USD value"""
+    for t in (buy, sell):
+        if t.snapshot.price_usd and t.snapshot.price_sol:
+            return t.snapshot.price_usd / t.snapshot.price_sol
+    for t in (buy, sell):
+        if t.value_usd and t.sol_amount:
+            return t.value_usd / t.sol_amount
+    return None
+
+
+def _lag(t):
+    return max(0.0, t.detected_ts - t.ts) if t.detected_ts is not None else 0.0
+
+
+def load_samples(paths=SAMPLE_FILES):
+    """Position price series from the tracker's samples files (missing files are skipped)"""
+    series = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                series.extend(json.loads(line) for line in f if line.strip())
+            else:
+                series.extend(json.load(f).get("open", []))
+    return series
+
+
+def _price_paths(events, samples):
+    """mint -> (epochs, prices) in time order: every priced trade of the token plus its sampled series"""
+    points = defaultdict(list)
+    for t in events:
+        if t.price_usd:
+            points[t.token].append((t.ts, t.price_usd))
+    for s in samples or []:
+        points[s['mint']].extend((s['opened'] + dt, p) for dt, p in zip(s['t'], s['p']) if p)
+    paths = {}
+    for mint, pts in points.items():
+        pts.sort()
+        paths[mint] = ([ts for ts, _ in pts], [p for _, p in pts])
+    return paths
+
+
+def _observed_drift(path, ts, price, delay):
+    """Last price seen for the mint by ts + delay over the fill price at ts (1.0 when nothing was seen in between)"""
+    times, prices = path
+    j = bisect_right(times, ts + delay) - 1
+    if delay <= 0 or j < 0 or times[j] <= ts:
+        return 1.0
+    return prices[j] / price
+
+
+def replay_round_trips(history, samples=None):
+    """
+    Round-trips in exit order: FIFO-matched BUY/SELL pairs with the fields the fill model needs.
+    samples are position price series (load_samples) that fill in the price path between trades.
+    """
+    events = sorted((t for t in ensure_records(history) if t.ts is not None and t.token), key=lambda t: t.ts)
+    paths = _price_paths(events, samples)
+
+    open_buys = defaultdict(deque)
+    trips = []
+    for t in events:
+        if t.action == 'BUY':
+            open_buys[t.token].append(t)
+            continue
+        if not open_buys[t.token]:
+            continue
+        buy = open_buys[t.token].popleft()
+        if not buy.price_usd or not t.price_usd:
+            continue
+        trips.append({
+            'symbol': t.token_symbol or '',
+            'ca': t.token,
+            'buy_ts': buy.ts,
+            'sell_ts': t.ts,
+            'buy_price': buy.price_usd,
+            'sell_price': t.price_usd,
+            'buy_liq': buy.snapshot.liquidity,
+            'sell_liq': t.snapshot.liquidity,
+            'prices': paths[t.token],
+            'buy_lag': _lag(buy),
+            'sell_lag': _lag(t),
+            'sol_usd': _sol_usd(buy, t),
+            'paper_pnl_pct': t.pnl_pct,
+        })
+    return trips
+
+
+def _columns(trips):
+    """Column lists with gaps filled: missing liquidity -> median pool, missing SOL price -> median SOL price"""
+    def median(values, fallback):
+        values = sorted(v for v in values if v and v > 0)
+        return values[len(values) // 2] if values else fallback
+
+    liq = median([t['buy_liq'] for t in trips] + [t['sell_liq'] for t in trips], 0)
+    sol_usd = median([t['sol_usd'] for t in trips], FALLBACK_SOL_USD)
+    cols = {k: [t[k] for t in trips] for k in ('buy_price', 'sell_price', 'buy_lag', 'sell_lag', 'sell_ts',
+                                               'paper_pnl_pct')}
+    cols['buy_reserve'] = [(t['buy_liq'] or liq) / 2 for t in trips]
+    cols['sell_reserve'] = [(t['sell_liq'] or liq) / 2 for t in trips]
+    cols['sol_usd'] = [t['sol_usd'] or sol_usd for t in trips]
+    return cols
+
+
+def _delayed_drifts(trips, c, delay):
+    """Entry and exit drift per round-trip at one delay, each clamped so the lag never helps us"""
+    lags_in = c['buy_lag'] if delay == "detected" else [float(delay)] * len(trips)
+    lags_out = c['sell_lag'] if delay == "detected" else [float(delay)] * len(trips)
+    drift_in = [max(1.0, _observed_drift(t['prices'], t['buy_ts'], t['buy_price'], lag))
+                for t, lag in zip(trips, lags_in)]
+    drift_out = [min(1.0, _observed_drift(t['prices'], t['sell_ts'], t['sell_price'], lag))
+                 for t, lag in zip(trips, lags_out)]
+    return drift_in, drift_out
+
+
+def _fill_ratios(c, drifts_in, drifts_out, sizes, bot_sol):
+    """exit / entry price ratio for every scenario x round-trip"""
+    if np is not None:
+        a = {k: np.asarray(v, dtype=float) for k, v in c.items()}
+        size = np.asarray(sizes, dtype=float)[:, None]
+
+        def impact(usd, reserve):
+            return 1 + np.divide(usd, reserve, out=np.zeros(np.broadcast(usd, reserve).shape), where=reserve > 0)
+
+        his_usd = bot_sol * a['sol_usd']
+        our_usd = size * a['sol_usd']
+        entry = a['buy_price'] * np.asarray(drifts_in, dtype=float) \
+            * impact(his_usd, a['buy_reserve']) * impact(our_usd, a['buy_reserve'])
+        exit_ = a['sell_price'] * np.asarray(drifts_out, dtype=float) \
+            / (impact(his_usd, a['sell_reserve']) * impact(our_usd, a['sell_reserve']))
+        return exit_ / entry
+
+    def impact(usd, reserve):
+        return 1 + usd / reserve if reserve > 0 else 1.0
+
+    ratios = []
+    for d_in, d_out, size in zip(drifts_in, drifts_out, sizes):
+        row = []
+        for i in range(len(c['buy_price'])):
+            sol_usd = c['sol_usd'][i]
+            his_usd, our_usd = bot_sol * sol_usd, size * sol_usd
+            entry = c['buy_price'][i] * d_in[i] \
+                * impact(his_usd, c['buy_reserve'][i]) * impact(our_usd, c['buy_reserve'][i])
+            exit_ = c['sell_price'][i] * d_out[i] \
+                / (impact(his_usd, c['sell_reserve'][i]) * impact(our_usd, c['sell_reserve'][i]))
+            row.append(exit_ / entry)
+        ratios.append(row)
+    return ratios
+
+
+def _curve(times, cumulative):
+    """At most CURVE_POINTS (time, cumulative P/L) points, always keeping the last"""
+    n = len(times)
+    step = max(1, math.ceil(n / CURVE_POINTS))
+    idx = list(range(step - 1, n, step))
+    if idx and idx[-1] != n - 1:
+        idx.append(n - 1)
+    return [[times[i], round(float(cumulative[i]), 6)] for i in idx]
+
+
+def _drawdown(cumulative):
+    peak, worst = 0.0, 0.0
+    for v in cumulative:
+        peak = max(peak, v)
+        worst = max(worst, peak - v)
+    return worst
+
+
+def simulate(trips, delays=DELAYS, sizes=SIZES, bot_sol=HIS_SOL_PER_TRADE, fee_pct=FEE_PCT, fee_sol=FEE_SOL):
+    """
+    Every delay x size scenario over the round-trips (in exit order, as replay_round_trips returns them).
+    Returns a list of {'delay', 'size', 'trades', 'wins', 'win_rate', 'pnl_sol', 'pnl_usd', 'avg_pnl_pct',
+    'max_drawdown_sol', 'curve'} where curve is [[exit epoch, cumulative P/L SOL], ...].
+    """
+    if not trips:
+        return []
+    c = _columns(trips)
+    grid = [(d, s) for d in delays for s in sizes]
+    n = len(trips)
+    drifts = {d: _delayed_drifts(trips, c, d) for d in delays}
+    drifts_in = [drifts[d][0] for d, _ in grid]
+    drifts_out = [drifts[d][1] for d, _ in grid]
+    scenario_sizes = [s for _, s in grid]
+    keep = (1 - fee_pct / 100) ** 2
+
+    ratios = _fill_ratios(c, drifts_in, drifts_out, scenario_sizes, bot_sol)
+    if np is not None:
+        pnl_pct = ratios * keep - 1
+        pnl_sol = pnl_pct * np.asarray(scenario_sizes)[:, None] - 2 * fee_sol
+        cumulative = np.cumsum(pnl_sol, axis=1)
+        pnl_usd = (pnl_sol * np.asarray(c['sol_usd'])).sum(axis=1)
+        wins = (pnl_sol > 0).sum(axis=1)
+        avg_pct = pnl_pct.mean(axis=1) * 100
+    else:
+        pnl_sol, cumulative, pnl_usd, wins, avg_pct = [], [], [], [], []
+        for row, size in zip(ratios, scenario_sizes):
+            pct = [r * keep - 1 for r in row]
+            sol = [p * size - 2 * fee_sol for p in pct]
+            running, total = [], 0.0
+            for v in sol:
+                total += v
+                running.append(total)
+            pnl_sol.append(sol)
+            cumulative.append(running)
+            pnl_usd.append(sum(v * u for v, u in zip(sol, c['sol_usd'])))
+            wins.append(sum(1 for v in sol if v > 0))
+            avg_pct.append(sum(pct) / n * 100)
+
+    results = []
+    for k, (delay, size) in enumerate(grid):
+        results.append({
+            'delay': delay,
+            'size': size,
+            'trades': n,
+            'wins': int(wins[k]),
+            'win_rate': int(wins[k]) / n * 100,
+            'pnl_sol': float(cumulative[k][-1]),
+            'pnl_usd': float(pnl_usd[k]),
+            'avg_pnl_pct': float(avg_pct[k]),
+            'max_drawdown_sol': _drawdown(cumulative[k]),
+            'curve': _curve(c['sell_ts'], cumulative[k]),
+        })
+    return results
+
+
+def _label(r):
+    delay = "detected lag" if r['delay'] == "detected" else f"{r['delay']}s"
+    return f"{delay} / {r['size']:g} SOL"
+
+
+def generate_html(results, trips, path="copy_simulation.html", width=900, height=320):
+    """P/L curve per scenario as one SVG chart plus the summary table"""
+    palette = ["#00d4ff", "#00ff88", "#ffaa00", "#ff4444", "#aa66ff", "#ff66cc", "#66ffee", "#cccc44"]
+    points = [p for r in results for p in r['curve']]
+    t0, t1 = min(p[0] for p in points), max(p[0] for p in points)
+    lo, hi = min(0, min(p[1] for p in points)), max(0, max(p[1] for p in points))
+    pad_left, pad_bottom = 60, 20
+    plot_w, plot_h = width - pad_left, height - pad_bottom
+
+    def x(ts):
+        return pad_left + (ts - t0) / ((t1 - t0) or 1) * plot_w
+
+    def y(v):
+        return plot_h - (v - lo) / ((hi - lo) or 1) * (plot_h - 10) - 5
+
+    lines = [f'<line x1="{pad_left}" x2="{width}" y1="{y(0):.1f}" y2="{y(0):.1f}" stroke="#444"/>']
+    rows = []
+    for i, r in enumerate(results):
+        color = palette[i % len(palette)]
+        coords = " ".join(f"{x(t):.1f},{y(v):.1f}" for t, v in r['curve'])
+        lines.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="1.5"><title>{_label(r)}</title></polyline>')
+        pnl_color = "#00ff88" if r['pnl_sol'] >= 0 else "#ff4444"
+        rows.append(f'<tr><td><span style="color:{color}">■</span> {_label(r)}</td><td>{r["trades"]}</td>'
+                    f'<td>{r["win_rate"]:.1f}%</td><td style="color:{pnl_color}">{r["pnl_sol"]:+.4f}</td>'
+                    f'<td style="color:{pnl_color}">${r["pnl_usd"]:+,.2f}</td><td>{r["avg_pnl_pct"]:+.2f}%</td>'
+                    f'<td>{r["max_drawdown_sol"]:.4f}</td></tr>')
+    paper = sum(t['paper_pnl_pct'] for t in trips) / len(trips)
+    labels = (f'<text x="{pad_left - 6}" y="{y(hi) + 4:.1f}" text-anchor="end">{hi:+.2f}</text>'
+              f'<text x="{pad_left - 6}" y="{y(lo) + 4:.1f}" text-anchor="end">{lo:+.2f}</text>'
+              f'<text x="{pad_left}" y="{height - 4}">{datetime.fromtimestamp(t0, timezone.utc):%m/%d %H:%M}</text>'
+              f'<text x="{width}" y="{height - 4}" text-anchor="end">{datetime.fromtimestamp(t1, timezone.utc):%m/%d %H:%M}</text>')
+    html = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Copy-Trade Simulation</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; background: #0a0a0f; color: #e0e0e0; padding: 20px; }}
+        h1 {{ color: #00d4ff; }}
+        table {{ border-collapse: collapse; margin-top: 20px; }}
+        th, td {{ padding: 6px 14px; border-bottom: 1px solid #222; text-align: right; }}
+        th:first-child, td:first-child {{ text-align: left; }}
+        th {{ color: #888; }}
+        .note {{ color: #888; }}
+    </style>
+</head>
+<body>
+    <h1>🎯 Copy-Trade Simulation</h1>
+    <p class="note">{len(trips)} round-trips. Paper trading averaged {paper:+.2f}% per trade at the bot's price.
+    Cumulative P/L (SOL) by exit time for each delay / size scenario.</p>
+    <svg viewBox="0 0 {width} {height}" width="{width}" font-size="10" fill="#888">{"".join(lines)}{labels}</svg>
+    <table>
+        <tr><th>Scenario</th><th>Trades</th><th>Win rate</th><th>P/L SOL</th><th>P/L USD</th><th>Avg P/L</th><th>Max DD SOL</th></tr>
+        {"".join(rows)}
+    </table>
+</body>
+</html>"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def _parse_delays(text):
+    return [d if d == "detected" else float(d) for d in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a capture as copy trades under delay / size / slippage scenarios")
+    parser.add_argument("history", nargs="?", default="trade_history.json", help="trade history JSON file or SQLite store (.db)")
+    parser.add_argument("--delays", type=_parse_delays, default=DELAYS, help="comma-separated seconds, 'detected' for the captured lag")
+    parser.add_argument("--sizes", type=lambda s: [float(v) for v in s.split(",")], default=SIZES, help="comma-separated SOL per trade")
+    parser.add_argument("--bot-sol", type=float, default=HIS_SOL_PER_TRADE, help="the bot's own size (its impact comes before ours)")
+    parser.add_argument("--fee-pct", type=float, default=FEE_PCT, help="fee per swap in %%")
+    parser.add_argument("--fee-sol", type=float, default=FEE_SOL, help="flat fee per swap in SOL")
+    parser.add_argument("--samples", nargs="*", default=SAMPLE_FILES, help="tracker position price series (.json / .jsonl)")
+    parser.add_argument("--out", default="copy_simulation.json")
+    parser.add_argument("--html", default="copy_simulation.html")
+    args = parser.parse_args()
+
+    if args.history.endswith(('.db', '.sqlite')):
+        store = HistoryStore(args.history)
+        history = store.load_history()
+        store.close()
+    else:
+        history = load_data(args.history)
+    if not history:
+        return
+
+    trips = replay_round_trips(history, load_samples(args.samples))
+    if not trips:
+        print("❌ No completed round-trips to replay")
+        return
+    results = simulate(trips, args.delays, args.sizes, args.bot_sol, args.fee_pct, args.fee_sol)
+
+    paper = sum(t['paper_pnl_pct'] for t in trips) / len(trips)
+    print(f"\n🎯 {len(trips)} round-trips | paper P/L {paper:+.2f}% avg per trade | "
+          f"{len(results)} scenarios ({'numpy' if np is not None else 'python'})\n")
+    print(f"{'Scenario':24} {'Win rate':>9} {'P/L SOL':>11} {'P/L USD':>12} {'Avg P/L':>9} {'Max DD':>9}")
+    for r in results:
+        print(f"{_label(r):24} {r['win_rate']:8.1f}% {r['pnl_sol']:+11.4f} {r['pnl_usd']:+12.2f} "
+              f"{r['avg_pnl_pct']:+8.2f}% {r['max_drawdown_sol']:9.4f}")
+
+    with open(args.out, "w") as f:
+        json.dump({
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'trips': len(trips),
+            'paper_avg_pnl_pct': paper,
+            'params': {'bot_sol': args.bot_sol, 'fee_pct': args.fee_pct, 'fee_sol': args.fee_sol,
+                       'samples': [p for p in args.samples if os.path.exists(p)]},
+            'scenarios': results,
+        }, f, indent=2)
+    generate_html(results, trips, args.html)
+    print(f"\n📄 Saved {args.out} and {args.html}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,41 @@ Tracks a target wallet's trades and collects all data.
 import requests
 import time
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+import gzip
+import hashlib
 import json
 import os
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock, Thread
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
+from history_format import pack_history
+from history_segments import SegmentStore, start_compactor
+from history_store import HistoryStore
+from trade_stream import TradeFeed, TradeStream
+
 API_KEY = "api"
 WALLET = "Ar2Y6o1QmrRAskjii1cRfijeKugHH13ycxW5cd7rro1x"
 BASE = "https://data.solanatracker.io"
 
 CHECK_INTERVAL = 4  # seconds between checks
+STREAM_URL = None  # e.g. "http://localhost:8765/stream" - push subscription, polling is the fallback (see trade_stream.py)
+SQLITE_PATH = None  # e.g. "trade_history.db" to also write every trade to a SQLite store
+SEGMENTS_DIR = None  # e.g. "history_segments" - hourly sealed segments replace trade_history.json (see history_segments.py)
+
+# Background price sampling of open positions (for max favorable/adverse excursion)
+SAMPLE_INTERVAL = 15  # seconds between sampling rounds
+SAMPLER_REQUESTS_PER_MIN = 20  # API budget reserved for the sampler
+POSITION_SAMPLES = "position_samples.json"  # price series of the open positions (rewritten)
+CLOSED_SAMPLES = "closed_samples.jsonl"  # one line per closed position's series (appended)
+PRICE_BATCH_SIZE = 100  # mints per /price/multi request
+
+# Startup backfill: rebuild history from this time instead of ignoring past trades
+BACKFILL_SINCE = None  # e.g. "2026-01-04 20:00"
+BACKFILL_WORKERS = 8  # parallel enrichment requests
+BACKFILL_RETRIES = 3
+BACKFILL_STATE = "backfill_state.json"  # checkpoint so an interrupted backfill resumes
 
 def api(route, params=None):
     headers = {"x-api-key": API_KEY}
@@ -29,88 +54,148 @@ def get_wallet_trades():
     data = api(f"/wallet/{WALLET}/trades", params={"limit": 100})
     return data.get("trades", [])
 
+def get_wallet_trades_page(cursor=None):
+    """One page of the wallet's trades (newest first) and the cursor for the next, older page"""
+    params = {"limit": 100}
+    if cursor:
+        params["cursor"] = cursor
+    data = api(f"/wallet/{WALLET}/trades", params=params)
+    next_cursor = data.get("nextCursor") if data.get("hasNextPage") else None
+    return data.get("trades", []), next_cursor
+
+def with_retries(fn, *args, attempts=BACKFILL_RETRIES):
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+def get_prices(mints):
+    """Current USD price for a batch of mints in a single request"""
+    data = api("/price/multi", params={"tokens": ",".join(mints)})
+    return {mint: info["price"] for mint, info in data.items() if isinstance(info, dict) and info.get("price")}
+
+def fetch_token_analysis(mint):
+    """Get detailed token info at time of trade (raises on API errors)"""
+    data = api(f"/tokens/{mint}")
+    token = data.get("token", {})
+    pools = data.get("pools", [])
+    risk = data.get("risk", {})
+    events = data.get("events", {})
+    
+    primary_pool = pools[0] if pools else {}
+    
+    price_changes = {
+        "1m": events.get("1m", {}).get("priceChangePercentage", 0),
+        "5m": events.get("5m", {}).get("priceChangePercentage", 0),
+        "15m": events.get("15m", {}).get("priceChangePercentage", 0),
+        "1h": events.get("1h", {}).get("priceChangePercentage", 0),
+    }
+    
+    pool_txns = primary_pool.get("txns", {})
+    
+    analysis = {
+        "name": token.get("name", "Unknown"),
+        "symbol": token.get("symbol", "???"),
+        "mint": mint,
+        "decimals": token.get("decimals", 0),
+        "age_seconds": int(time.time()) - token.get("creation", {}).get("created_time", 0),
+        "creator": token.get("creation", {}).get("creator", ""),
+        "created_tx": token.get("creation", {}).get("created_tx", ""),
+        "market_cap": primary_pool.get("marketCap", {}).get("usd", 0),
+        "liquidity": primary_pool.get("liquidity", {}).get("usd", 0),
+        "price_usd": primary_pool.get("price", {}).get("usd", 0),
+        "price_sol": primary_pool.get("price", {}).get("quote", 0),
+        "token_supply": primary_pool.get("tokenSupply", 0),
+        "holders": data.get("holders", 0),
+        "total_txns": data.get("txns", 0),
+        "buys": data.get("buys", 0),
+        "sells": data.get("sells", 0),
+        "buy_sell_ratio": data.get("buys", 0) / data.get("sells", 1) if data.get("sells", 0) > 0 else 0,
+        "pool_buys": pool_txns.get("buys", 0),
+        "pool_sells": pool_txns.get("sells", 0),
+        "pool_total_txns": pool_txns.get("total", 0),
+        "pool_volume": pool_txns.get("volume", 0),
+        "pool_volume_24h": pool_txns.get("volume24h", 0),
+        "price_change_1m": price_changes["1m"],
+        "price_change_5m": price_changes["5m"],
+        "price_change_15m": price_changes["15m"],
+        "price_change_1h": price_changes["1h"],
+        "lp_burned": primary_pool.get("lpBurn", 0),
+        "freeze_authority": primary_pool.get("security", {}).get("freezeAuthority"),
+        "mint_authority": primary_pool.get("security", {}).get("mintAuthority"),
+        "top10_holders_pct": risk.get("top10", 0),
+        "dev_holdings_pct": risk.get("dev", {}).get("percentage", 0),
+        "dev_holdings_amount": risk.get("dev", {}).get("amount", 0),
+        "risk_score": risk.get("score", 0),
+        "is_rugged": risk.get("rugged", False),
+        "jupiter_verified": risk.get("jupiterVerified", False),
+        "sniper_count": risk.get("snipers", {}).get("count", 0),
+        "sniper_balance_pct": risk.get("snipers", {}).get("totalPercentage", 0),
+        "insider_count": risk.get("insiders", {}).get("count", 0),
+        "insider_balance_pct": risk.get("insiders", {}).get("totalPercentage", 0),
+        "market": primary_pool.get("market", "unknown"),
+        "pool_id": primary_pool.get("poolId", ""),
+        "quote_token": primary_pool.get("quoteToken", ""),
+        "deployer": primary_pool.get("deployer", ""),
+        "has_metadata": token.get("hasFileMetaData", False),
+        "image_url": token.get("image", ""),
+        "description": token.get("description", ""),
+    }
+    return analysis
+
 def get_token_analysis(mint):
     """Get detailed token info at time of trade"""
     try:
-        data = api(f"/tokens/{mint}")
-        token = data.get("token", {})
-        pools = data.get("pools", [])
-        risk = data.get("risk", {})
-        events = data.get("events", {})
-        
-        primary_pool = pools[0] if pools else {}
-        
-        price_changes = {
-            "1m": events.get("1m", {}).get("priceChangePercentage", 0),
-            "5m": events.get("5m", {}).get("priceChangePercentage", 0),
-            "15m": events.get("15m", {}).get("priceChangePercentage", 0),
-            "1h": events.get("1h", {}).get("priceChangePercentage", 0),
-        }
-        
-        pool_txns = primary_pool.get("txns", {})
-        
-        analysis = {
-            "name": token.get("name", "Unknown"),
-            "symbol": token.get("symbol", "???"),
-            "mint": mint,
-            "decimals": token.get("decimals", 0),
-            "age_seconds": int(time.time()) - token.get("creation", {}).get("created_time", 0),
-            "creator": token.get("creation", {}).get("creator", ""),
-            "created_tx": token.get("creation", {}).get("created_tx", ""),
-            "market_cap": primary_pool.get("marketCap", {}).get("usd", 0),
-            "liquidity": primary_pool.get("liquidity", {}).get("usd", 0),
-            "price_usd": primary_pool.get("price", {}).get("usd", 0),
-            "price_sol": primary_pool.get("price", {}).get("quote", 0),
-            "token_supply": primary_pool.get("tokenSupply", 0),
-            "holders": data.get("holders", 0),
-            "total_txns": data.get("txns", 0),
-            "buys": data.get("buys", 0),
-            "sells": data.get("sells", 0),
-            "buy_sell_ratio": data.get("buys", 0) / data.get("sells", 1) if data.get("sells", 0) > 0 else 0,
-            "pool_buys": pool_txns.get("buys", 0),
-            "pool_sells": pool_txns.get("sells", 0),
-            "pool_total_txns": pool_txns.get("total", 0),
-            "pool_volume": pool_txns.get("volume", 0),
-            "pool_volume_24h": pool_txns.get("volume24h", 0),
-            "price_change_1m": price_changes["1m"],
-            "price_change_5m": price_changes["5m"],
-            "price_change_15m": price_changes["15m"],
-            "price_change_1h": price_changes["1h"],
-            "lp_burned": primary_pool.get("lpBurn", 0),
-            "freeze_authority": primary_pool.get("security", {}).get("freezeAuthority"),
-            "mint_authority": primary_pool.get("security", {}).get("mintAuthority"),
-            "top10_holders_pct": risk.get("top10", 0),
-            "dev_holdings_pct": risk.get("dev", {}).get("percentage", 0),
-            "dev_holdings_amount": risk.get("dev", {}).get("amount", 0),
-            "risk_score": risk.get("score", 0),
-            "is_rugged": risk.get("rugged", False),
-            "jupiter_verified": risk.get("jupiterVerified", False),
-            "sniper_count": risk.get("snipers", {}).get("count", 0),
-            "sniper_balance_pct": risk.get("snipers", {}).get("totalPercentage", 0),
-            "insider_count": risk.get("insiders", {}).get("count", 0),
-            "insider_balance_pct": risk.get("insiders", {}).get("totalPercentage", 0),
-            "market": primary_pool.get("market", "unknown"),
-            "pool_id": primary_pool.get("poolId", ""),
-            "quote_token": primary_pool.get("quoteToken", ""),
-            "deployer": primary_pool.get("deployer", ""),
-            "has_metadata": token.get("hasFileMetaData", False),
-            "image_url": token.get("image", ""),
-            "description": token.get("description", ""),
-        }
-        return analysis
+        return fetch_token_analysis(mint)
     except Exception as e:
         print(f"      ⚠️  Failed to get token analysis: {e}")
         return None
 
 
 class WalletTracker:
-    def __init__(self):
+    def __init__(self, store=None, segments=None):
         self.history = []
         self.seen_txs = set()
         self.start_time = datetime.now()
         self.positions = {}  # Track open positions for P/L calc
+        self.store = store  # Optional HistoryStore (SQLite)
+        self.segments = segments  # Optional SegmentStore
+        self.lock = Lock()  # positions are shared with the price sampler thread
+        self.closed_samples = []  # price series of positions closed since the last samples_snapshot()
+        self.version = 0  # bumped on every recorded trade, keys the dashboard cache
+        
+    def record(self, trade_result):
+        self.history.append(trade_result)
+        self.version += 1
+        if self.store:
+            try:
+                self.store.add_trade(trade_result)
+            except Exception as e:
+                print(f"      ⚠️  Failed to write trade to SQLite: {e}")
+        if self.segments:
+            try:
+                self.segments.append([trade_result])
+            except Exception as e:
+                print(f"      ⚠️  Failed to write trade to segment: {e}")
         
-    def process_trade(self, t):
+    def _analysis_for(self, mint, trade_ts, prefetched, backfilled):
+        if prefetched is None:
+            return get_token_analysis(mint)
+        analysis = prefetched.get(mint)
+        if not analysis:
+            return None
+        analysis = dict(analysis)
+        if backfilled:
+            # Backfilled snapshots are taken now, not at trade time - at least make the age relative to the trade
+            analysis["age_seconds"] -= int(time.time() - trade_ts)
+            analysis["backfilled"] = True
+        return analysis
+    
+    def process_trade(self, t, prefetched=None, backfilled=False):
+        """Record a raw API trade; `prefetched` maps mint -> token analysis fetched elsewhere"""
         tx_sig = t.get("tx", "")
         if tx_sig in self.seen_txs:
             return None
@@ -129,7 +214,8 @@ class WalletTracker:
         from_symbol = from_token.get("symbol", "")
         to_symbol = to_token.get("symbol", "")
         
-        ts = datetime.fromtimestamp(t.get("time", 0) / 1000)
+        trade_ts = t.get("time", 0) / 1000
+        ts = datetime.fromtimestamp(trade_ts)
         
         trade_result = None
         
@@ -140,22 +226,28 @@ class WalletTracker:
             price_usd = to_data.get("priceUsd", 0)
             value_usd = t.get("volume", {}).get("usd", 0)
             
-            token_analysis = get_token_analysis(to_address)
+            token_analysis = self._analysis_for(to_address, trade_ts, prefetched, backfilled)
             
             # Track position for P/L calculation
-            if to_address not in self.positions:
-                self.positions[to_address] = {
-                    "total_tokens": 0,
-                    "total_sol_spent": 0,
-                    "avg_price": 0,
-                    "symbol": to_symbol,
-                    "name": to_token.get("name", "Unknown")
-                }
-            
-            pos = self.positions[to_address]
-            pos["total_tokens"] += tokens_received
-            pos["total_sol_spent"] += sol_spent
-            pos["avg_price"] = (pos["total_sol_spent"] / pos["total_tokens"]) if pos["total_tokens"] > 0 else 0
+            with self.lock:
+                if to_address not in self.positions:
+                    self.positions[to_address] = {
+                        "total_tokens": 0,
+                        "total_sol_spent": 0,
+                        "avg_price": 0,
+                        "entry_cost_usd": 0,
+                        "symbol": to_symbol,
+                        "name": to_token.get("name", "Unknown")
+                    }
+                
+                pos = self.positions[to_address]
+                if pos["total_tokens"] <= 0:
+                    self._open_series(pos, trade_ts)
+                pos["total_tokens"] += tokens_received
+                pos["total_sol_spent"] += sol_spent
+                pos["entry_cost_usd"] += tokens_received * price_usd
+                pos["avg_price"] = (pos["total_sol_spent"] / pos["total_tokens"]) if pos["total_tokens"] > 0 else 0
+                self._track_price(pos, trade_ts, price_usd)
             
             trade_result = {
                 "timestamp": ts,
@@ -169,9 +261,10 @@ class WalletTracker:
                 "price_usd": price_usd,
                 "value_usd": value_usd,
                 "tx": tx_sig,
+                "detected_via": "backfill" if backfilled else t.get("detected_via", "poll"),
                 "analysis": token_analysis
             }
-            self.history.append(trade_result)
+            self.record(trade_result)
                 
         # SELL: Token -> SOL
         elif from_symbol != "SOL" and to_symbol == "SOL":
@@ -180,14 +273,19 @@ class WalletTracker:
             price_usd = from_data.get("priceUsd", 0)
             value_usd = t.get("volume", {}).get("usd", 0)
             
-            token_analysis = get_token_analysis(from_address)
+            token_analysis = self._analysis_for(from_address, trade_ts, prefetched, backfilled)
             
             # Calculate P/L if we have position data
             pnl_sol = 0
             pnl_pct = 0
-            if from_address in self.positions:
-                pos = self.positions[from_address]
-                if pos["total_tokens"] > 0:
+            excursion = {}
+            with self.lock:
+                pos = self.positions.get(from_address)
+                if pos and pos["total_tokens"] > 0:
+                    # How far the position ran up / drew down while held
+                    self._track_price(pos, trade_ts, price_usd)
+                    excursion = self._excursion(pos)
+                    
                     # Calculate what portion of position is being sold
                     portion = min(tokens_sold / pos["total_tokens"], 1.0)
                     cost_basis_sol = pos["total_sol_spent"] * portion
@@ -197,9 +295,15 @@ class WalletTracker:
                     # Update position
                     pos["total_tokens"] -= tokens_sold
                     pos["total_sol_spent"] -= cost_basis_sol
+                    pos["entry_cost_usd"] = pos.get("entry_cost_usd", 0) * (1 - portion)
                     if pos["total_tokens"] <= 0:
                         pos["total_tokens"] = 0
                         pos["total_sol_spent"] = 0
+                        pos["entry_cost_usd"] = 0
+                        if "opened" in pos:
+                            self.closed_samples.append({"mint": from_address, "symbol": pos["symbol"],
+                                                        "opened": pos["opened"], "closed": trade_ts,
+                                                        **pos["samples"]})
             
             trade_result = {
                 "timestamp": ts,
@@ -214,13 +318,62 @@ class WalletTracker:
                 "value_usd": value_usd,
                 "pnl_sol": pnl_sol,
                 "pnl_pct": pnl_pct,
+                **excursion,
                 "tx": tx_sig,
+                "detected_via": "backfill" if backfilled else t.get("detected_via", "poll"),
                 "analysis": token_analysis
             }
-            self.history.append(trade_result)
+            self.record(trade_result)
         
         return trade_result
     
+    def _open_series(self, pos, ts):
+        pos["opened"] = ts
+        pos["samples"] = {"t": [], "p": []}
+        pos["max_price_usd"] = None
+        pos["min_price_usd"] = None
+    
+    def _track_price(self, pos, ts, price_usd):
+        """Append a price point (seconds since open, price) and update the position's extremes"""
+        if not price_usd or "opened" not in pos:
+            return
+        pos["samples"]["t"].append(int(ts - pos["opened"]))
+        pos["samples"]["p"].append(float(f"{price_usd:.6g}"))
+        pos["max_price_usd"] = max(pos["max_price_usd"] or price_usd, price_usd)
+        pos["min_price_usd"] = min(pos["min_price_usd"] or price_usd, price_usd)
+    
+    def _excursion(self, pos):
+        """Max favorable / adverse move vs average entry price while the position was held"""
+        if not pos.get("entry_cost_usd") or pos["total_tokens"] <= 0 or not pos.get("max_price_usd"):
+            return {}
+        entry = pos["entry_cost_usd"] / pos["total_tokens"]
+        return {
+            "mfe_pct": (pos["max_price_usd"] / entry - 1) * 100,
+            "mae_pct": (pos["min_price_usd"] / entry - 1) * 100,
+            "price_samples": len(pos["samples"]["t"]),
+        }
+    
+    def open_mints(self):
+        with self.lock:
+            return [mint for mint, pos in self.positions.items() if pos["total_tokens"] > 0]
+    
+    def add_price_samples(self, prices, ts):
+        with self.lock:
+            for mint, price in prices.items():
+                pos = self.positions.get(mint)
+                if pos and pos["total_tokens"] > 0:
+                    self._track_price(pos, ts, price)
+    
+    def samples_snapshot(self):
+        """Series of the open positions, plus closed ones not handed out yet (each closed series is returned once)"""
+        with self.lock:
+            open_series = [
+                {"mint": mint, "symbol": pos["symbol"], "opened": pos["opened"], **pos["samples"]}
+                for mint, pos in self.positions.items() if pos["total_tokens"] > 0 and "opened" in pos
+            ]
+            closed, self.closed_samples = self.closed_samples, []
+            return {"open": open_series, "closed": closed}
+    
     def get_stats(self):
         """Calculate trading stats"""
         buys = [t for t in self.history if t["action"] == "BUY"]
@@ -406,10 +559,255 @@ class WalletTracker:
         return html
 
 
-def start_web_server():
+class PriceSampler:
+    """Periodically prices every open position, batched and within a fixed request budget"""
+    
+    def __init__(self, tracker, interval=SAMPLE_INTERVAL, requests_per_min=SAMPLER_REQUESTS_PER_MIN):
+        self.tracker = tracker
+        self.interval = interval
+        self.requests_per_round = max(1, int(requests_per_min * interval / 60))
+        self.last_sampled = {}
+    
+    def sample_once(self):
+        mints = self.tracker.open_mints()
+        # Least recently sampled first so every mint gets its turn when over budget
+        mints.sort(key=lambda m: self.last_sampled.get(m, 0))
+        mints = mints[:self.requests_per_round * PRICE_BATCH_SIZE]
+        
+        now = time.time()
+        sampled = 0
+        for i in range(0, len(mints), PRICE_BATCH_SIZE):
+            batch = mints[i:i + PRICE_BATCH_SIZE]
+            try:
+                prices = get_prices(batch)
+            except Exception as e:
+                print(f"      ⚠️  Price sampling failed: {e}")
+                continue
+            self.tracker.add_price_samples(prices, now)
+            for mint in batch:
+                self.last_sampled[mint] = now
+            sampled += len(prices)
+        
+        # Forget mints that are no longer held
+        open_now = set(self.tracker.open_mints())
+        self.last_sampled = {m: ts for m, ts in self.last_sampled.items() if m in open_now}
+        return sampled
+    
+    def run(self):
+        while True:
+            self.sample_once()
+            time.sleep(self.interval)
+
+
+def trade_mint(t):
+    from_data = t.get("from", {})
+    if from_data.get("token", {}).get("symbol") == "SOL":
+        return t.get("to", {}).get("address")
+    return from_data.get("address")
+
+def _save_backfill_state(state):
+    with open(BACKFILL_STATE + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(BACKFILL_STATE + ".tmp", BACKFILL_STATE)
+
+def _load_backfill_state(since):
+    try:
+        with open(BACKFILL_STATE, "r") as f:
+            state = json.load(f)
+        if state.get("since") == since:
+            print(f"♻️  Resuming backfill: {len(state['trades'])} trades, {len(state['analysis'])} tokens done")
+            return state
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"since": since, "cursor": None, "done_paging": False, "trades": [], "analysis": {}}
+
+def backfill(tracker, since=BACKFILL_SINCE):
+    """Page back to `since`, enrich concurrently, then replay oldest-first so positions and P/L rebuild"""
+    since_ms = datetime.fromisoformat(since).timestamp() * 1000
+    state = _load_backfill_state(since)
+    seen = {t.get("tx") for t in state["trades"]}
+    
+    # 1) Paging is sequential (each page needs the previous cursor) and cheap
+    while not state["done_paging"]:
+        trades, cursor = with_retries(get_wallet_trades_page, state["cursor"])
+        reached_start = False
+        for t in trades:
+            if t.get("time", 0) < since_ms:
+                reached_start = True
+            elif t.get("tx") not in seen:
+                seen.add(t.get("tx"))
+                state["trades"].append(t)
+        state["cursor"] = cursor
+        state["done_paging"] = reached_start or not cursor or not trades
+        _save_backfill_state(state)
+        print(f"📜 Backfill: {len(state['trades'])} trades fetched", end="\r")
+    print(f"📜 Backfill: {len(state['trades'])} trades since {since}")
+    
+    # 2) Enrichment is the slow part: one snapshot per token, fetched in parallel with retries
+    mints = {trade_mint(t) for t in state["trades"]} - set(state["analysis"]) - {None, ""}
+    failed = {}
+    with ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as pool:
+        futures = {pool.submit(with_retries, fetch_token_analysis, mint): mint for mint in mints}
+        for i, future in enumerate(as_completed(futures), 1):
+            mint = futures[future]
+            try:
+                state["analysis"][mint] = future.result()
+            except Exception as e:
+                failed[mint] = None
+                print(f"      ⚠️  Failed to enrich {mint[:8]}...: {e}")
+            if i % 25 == 0 or i == len(futures):
+                _save_backfill_state(state)
+                print(f"🔬 Enriched {i}/{len(futures)} tokens", end="\r")
+    print()
+    
+    # 3) Replay oldest-first through the normal path
+    prefetched = {**state["analysis"], **failed}
+    added = 0
+    for t in sorted(state["trades"], key=lambda t: t.get("time", 0)):
+        if tracker.process_trade(t, prefetched=prefetched, backfilled=True):
+            added += 1
+    os.remove(BACKFILL_STATE)
+    print(f"✅ Backfilled {added} trades ({len(failed)} tokens without snapshot)\n")
+    return added
+
+def catch_up(tracker, since=BACKFILL_SINCE):
+    """Page back from the head to the newest trade the tracker has seen and replay what's missing oldest-first"""
+    since_ms = datetime.fromisoformat(since).timestamp() * 1000 if since else 0
+    missed = []
+    cursor = None
+    while True:
+        trades, cursor = with_retries(get_wallet_trades_page, cursor)
+        fresh = [t for t in trades if t.get("tx") not in tracker.seen_txs and t.get("time", 0) >= since_ms]
+        missed.extend(fresh)
+        # Stop at the first page that reaches known (or pre-`since`) trades
+        if len(fresh) < len(trades) or not cursor or not trades:
+            break
+    added = 0
+    for t in reversed(missed):
+        result = tracker.process_trade(t)
+        if result:
+            added += 1
+            print_trade(result)
+    return added
+
+
+class DashboardCache:
+    """Dashboard HTML rendered and gzipped once per state version, served with strong validators"""
+    
+    def __init__(self):
+        self.lock = Lock()
+        self.key = None
+        self.entry = None  # (body, gzipped body, etag, last modified epoch)
+    
+    def update(self, key, render):
+        """Re-render only when `key` changed; returns True if the content changed"""
+        if key == self.key:
+            return False
+        body = render().encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        with self.lock:
+            self.key = key
+            if self.entry and self.entry[2] == etag:
+                return False
+            self.entry = (body, gzip.compress(body, compresslevel=6, mtime=0), etag, int(time.time()))
+        return True
+    
+    def get(self):
+        with self.lock:
+            return self.entry
+
+
+def print_trade(result):
+    symbol = result["token_symbol"]
+    sol = result["sol_amount"]
+    if result["action"] == "BUY":
+        print(f"🟢 BUY  {symbol} | {sol:.4f} SOL | ${result['value_usd']:.2f}")
+        analysis = result.get("analysis")
+        if analysis:
+            print(f"   MC: ${analysis['market_cap']:,.0f} | Liq: ${analysis['liquidity']:,.0f} | Age: {analysis['age_seconds']//60}m")
+    else:
+        pnl = result.get("pnl_sol", 0)
+        pnl_pct = result.get("pnl_pct", 0)
+        emoji = "✅" if pnl >= 0 else "❌"
+        print(f"🔴 SELL {symbol} | {sol:.4f} SOL | P/L: {pnl:+.4f} SOL ({pnl_pct:+.1f}%) {emoji}")
+
+def save_history(history, samples):
+    # Static token metadata is written once per mint (see history_format.py).
+    # Write-then-rename so followers never read a half-written file.
+    # history=None when the trades live in segments instead.
+    if history is not None:
+        with open("trade_history.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(pack_history(history), f, indent=2, default=str)
+        os.replace("trade_history.json.tmp", "trade_history.json")
+    
+    # Only open series are rewritten; a closed series is appended once and never touched again
+    with open(POSITION_SAMPLES + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"open": samples["open"]}, f, separators=(",", ":"))
+    os.replace(POSITION_SAMPLES + ".tmp", POSITION_SAMPLES)
+    if samples["closed"]:
+        with open(CLOSED_SAMPLES, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s, separators=(",", ":"), default=str) + "\n" for s in samples["closed"]))
+
+
+def start_web_server(dashboard=None):
     class Handler(SimpleHTTPRequestHandler):
         def log_message(self, format, *args):
             pass
+        
+        def do_GET(self):
+            if not self.send_dashboard():
+                super().do_GET()
+        
+        def do_HEAD(self):
+            if not self.send_dashboard(head_only=True):
+                super().do_HEAD()
+        
+        def send_dashboard(self, head_only=False):
+            entry = dashboard.get() if dashboard else None
+            if entry is None or self.path.split("?")[0] not in ("/", "/results.html"):
+                return False
+            body, gzipped, etag, modified = entry
+            use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+            # Each encoding is a different byte sequence, so it gets its own strong ETag
+            tag = f'"{etag}-gz"' if use_gzip else f'"{etag}"'
+            
+            if self.not_modified(tag, modified):
+                self.send_response(304)
+                self.send_validators(tag, modified)
+                self.end_headers()
+                return True
+            
+            payload = gzipped if use_gzip else body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_validators(tag, modified)
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(payload)
+            return True
+        
+        def not_modified(self, tag, modified):
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match:  # takes precedence over If-Modified-Since
+                # The exact tag of the representation being served: the gzip tag must not validate the identity body
+                tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+                return tag in tags or "*" in tags
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    return modified <= parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    pass
+            return False
+        
+        def send_validators(self, tag, modified):
+            self.send_header("ETag", tag)
+            self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+            self.send_header("Cache-Control", "no-cache")  # always revalidate, usually a 304
+            self.send_header("Vary", "Accept-Encoding")
     
     server = HTTPServer(('0.0.0.0', 2020), Handler)
     print(f"🌐 Web dashboard: http://localhost:2020/results.html")
@@ -424,52 +822,67 @@ def main():
     print(f"⏱️  Check interval: {CHECK_INTERVAL}s")
     print("=" * 60)
     
-    web_thread = Thread(target=start_web_server, daemon=True)
+    dashboard = DashboardCache()
+    web_thread = Thread(target=start_web_server, args=(dashboard,), daemon=True)
     web_thread.start()
     time.sleep(1)
     
-    tracker = WalletTracker()
+    store = HistoryStore(SQLITE_PATH) if SQLITE_PATH else None
+    if store:
+        print(f"🗄️  SQLite store: {SQLITE_PATH}")
+    segments = SegmentStore(SEGMENTS_DIR) if SEGMENTS_DIR else None
+    if segments:
+        print(f"🧱 History segments: {SEGMENTS_DIR}")
+        start_compactor(segments)
+    tracker = WalletTracker(store, segments)
     iteration = 0
     
-    # Initial sync - mark existing trades as seen
-    print("🔄 Syncing existing trades...")
-    try:
-        initial_trades = get_wallet_trades()
-        for trade in initial_trades:
-            tx_sig = trade.get("tx", "")
-            if tx_sig:
-                tracker.seen_txs.add(tx_sig)
-        print(f"✅ Ignoring {len(tracker.seen_txs)} historical trades")
-        print(f"🎯 Now tracking NEW trades only\n")
-    except Exception as e:
-        print(f"⚠️  Sync error: {e}\n")
+    backfilled = False
+    if BACKFILL_SINCE:
+        try:
+            backfill(tracker)
+            # The backfill takes minutes - replay whatever he traded meanwhile instead of skipping it
+            print("🔄 Catching up on trades made during the backfill...")
+            print(f"✅ Caught up on {catch_up(tracker)} trades\n")
+            backfilled = True
+        except Exception as e:
+            print(f"⚠️  Backfill error: {e} (progress saved, restart to resume)\n")
+    
+    if not backfilled:
+        # Initial sync - mark existing trades as seen
+        print("🔄 Syncing existing trades...")
+        try:
+            initial_trades = get_wallet_trades()
+            for trade in initial_trades:
+                tx_sig = trade.get("tx", "")
+                if tx_sig:
+                    tracker.seen_txs.add(tx_sig)
+            print(f"✅ Ignoring {len(tracker.seen_txs)} historical trades")
+            print(f"🎯 Now tracking NEW trades only\n")
+        except Exception as e:
+            print(f"⚠️  Sync error: {e}\n")
+    
+    # Only sample prices once the replay is done, so rebuilt positions don't get today's prices mid-history
+    sampler_thread = Thread(target=PriceSampler(tracker).run, daemon=True)
+    sampler_thread.start()
+    
+    # Trades come from the stream while it's up and from polling otherwise
+    stream = TradeStream(STREAM_URL, headers={"x-api-key": API_KEY}).start() if STREAM_URL else None
+    feed = TradeFeed(get_wallet_trades, stream, CHECK_INTERVAL)
     
     try:
         while True:
             iteration += 1
             
             try:
-                trades = get_wallet_trades()
+                trades = feed.next_batch()
                 new_trades = 0
                 
-                for trade in reversed(trades):
+                for trade in trades:
                     result = tracker.process_trade(trade)
                     if result:
                         new_trades += 1
-                        action = result["action"]
-                        symbol = result["token_symbol"]
-                        sol = result["sol_amount"]
-                        
-                        if action == "BUY":
-                            print(f"🟢 BUY  {symbol} | {sol:.4f} SOL | ${result['value_usd']:.2f}")
-                            analysis = result.get("analysis")
-                            if analysis:
-                                print(f"   MC: ${analysis['market_cap']:,.0f} | Liq: ${analysis['liquidity']:,.0f} | Age: {analysis['age_seconds']//60}m")
-                        else:
-                            pnl = result.get("pnl_sol", 0)
-                            pnl_pct = result.get("pnl_pct", 0)
-                            emoji = "✅" if pnl >= 0 else "❌"
-                            print(f"🔴 SELL {symbol} | {sol:.4f} SOL | P/L: {pnl:+.4f} SOL ({pnl_pct:+.1f}%) {emoji}")
+                        print_trade(result)
                 
                 if new_trades == 0:
                     print(f"[{datetime.now().strftime('%H:%M:%S')}] No new trades", end="\r")
@@ -477,19 +890,17 @@ def main():
                     stats = tracker.get_stats()
                     print(f"📊 Total: {stats['total_trades']} trades | P/L: {stats['total_pnl_sol']:+.4f} SOL | Win: {stats['win_rate']:.1f}%\n")
                 
-                # Save data
-                html = tracker.generate_html()
-                with open("results.html", "w", encoding="utf-8") as f:
-                    f.write(html)
+                # Save data - the dashboard only changes with new trades (and the runtime clock, per minute)
+                runtime_min = int((datetime.now() - tracker.start_time).total_seconds() // 60)
+                if dashboard.update((tracker.version, runtime_min), tracker.generate_html):
+                    with open("results.html", "wb") as f:
+                        f.write(dashboard.get()[0])
                 
-                with open("trade_history.json", "w", encoding="utf-8") as f:
-                    json.dump(tracker.history, f, indent=2, default=str)
+                save_history(None if segments else tracker.history, tracker.samples_snapshot())
                 
             except Exception as e:
                 print(f"❌ Error: {e}")
             
-            time.sleep(CHECK_INTERVAL)
-            
     except KeyboardInterrupt:
         stats = tracker.get_stats()
         print("\n" + "=" * 60)
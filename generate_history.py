@@ -0,0 +1,247 @@
+"""
+🧪 SYNTHETIC TRADE HISTORY GENERATOR
+=====================================
+Writes realistic trade_history.json files (same schema as the tracker output)
+so the analyzer can be tested and benchmarked far beyond the real capture.
+
+Mimics what real captures contain:
+  - nested `analysis` snapshots (with ~3% missing)
+  - mints that get traded over and over
+  - partial sells (positions closed in 1-3 chunks)
+  - both the legacy record shape (sol_spent / sol_received / fee_sol / sol_balance,
+    sometimes your_pnl_pct / your_pnl_usd) and the current data.py shape
+    (sol_amount / token_amount / price_usd / value_usd / pnl_sol / pnl_pct)
+
+Usage:
+    python generate_history.py 10000 100000 1000000 --seed 42 --out-dir synthetic
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+from datetime import datetime, timedelta
+
+SOL_USD = 134.5
+START_TIME = datetime(2026, 1, 4, 23, 37, 1)
+MARKETS = ["pumpfun-amm"] * 40 + ["pumpfun", "raydium", "meteora-dyn"]
+QUOTE_TOKEN = "So11111111111111111111111111111111111111112"
+B58 = "".join(c for c in string.ascii_letters + string.digits if c not in "0OIl")
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]  # shared with benchmark.py
+
+LEGACY_SHAPE = "legacy"
+CURRENT_SHAPE = "current"
+
+
+def _address(rng, suffix=""):
+    return "".join(rng.choice(B58) for _ in range(44 - len(suffix))) + suffix
+
+
+def _tx(rng):
+    return "".join(rng.choice(B58) for _ in range(88))
+
+
+def make_token_meta(rng):
+    """Static (never changing) properties of a synthetic mint"""
+    symbol = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 7)))
+    mint = _address(rng, "pump")
+    return {
+        "name": symbol.title() + rng.choice(["", " Coin", " Inu", " AI", " Cat"]),
+        "symbol": symbol,
+        "mint": mint,
+        "decimals": 6,
+        "creator": _address(rng),
+        "created_tx": _tx(rng),
+        "created_at": START_TIME - timedelta(seconds=rng.randint(600, 4_000_000)),
+        "token_supply": rng.uniform(9.9e8, 1e9),
+        "market": rng.choice(MARKETS),
+        "pool_id": _address(rng),
+        "deployer": _address(rng),
+        "image_url": f"https://image.solanatracker.io/proxy?url=ipfs%2F{_address(rng).lower()}",
+        "description": " ".join(rng.choice(["the", "last", "meme", "moon", "cat", "dog", "king", "of", "sol"])
+                                for _ in range(rng.randint(0, 40))),
+        # Drives the time-varying part of the snapshot
+        "market_cap": rng.lognormvariate(10.8, 1.1),
+        "holders": rng.randint(30, 4000),
+        "lp_burned": 100 if rng.random() < 0.97 else rng.choice([0, 50, 99]),
+        "sniper_count": rng.randint(0, 60),
+        "insider_count": rng.randint(0, 5),
+    }
+
+
+def make_snapshot(rng, meta, when):
+    """Full `analysis` dict as written by data.get_token_analysis"""
+    # Random walk on market cap so buy -> sell snapshots drift like the real ones
+    meta["market_cap"] = max(2000.0, meta["market_cap"] * rng.lognormvariate(0.0, 0.15))
+    meta["holders"] = max(10, meta["holders"] + rng.randint(-15, 30))
+    mc = meta["market_cap"]
+    buys = rng.randint(0, 400)
+    sells = rng.randint(0, 300)
+    pool_buys = rng.randint(100, 30000)
+    pool_sells = int(pool_buys * rng.uniform(0.6, 1.0))
+    price_usd = mc / meta["token_supply"]
+    return {
+        "name": meta["name"],
+        "symbol": meta["symbol"],
+        "mint": meta["mint"],
+        "decimals": meta["decimals"],
+        "age_seconds": int((when - meta["created_at"]).total_seconds()),
+        "creator": meta["creator"],
+        "created_tx": meta["created_tx"],
+        "market_cap": mc,
+        "liquidity": mc * rng.uniform(0.08, 0.5),
+        "price_usd": price_usd,
+        "price_sol": price_usd / SOL_USD,
+        "token_supply": meta["token_supply"],
+        "holders": meta["holders"],
+        "total_txns": buys + sells,
+        "buys": buys,
+        "sells": sells,
+        "buy_sell_ratio": buys / sells if sells > 0 else 0,
+        "pool_buys": pool_buys,
+        "pool_sells": pool_sells,
+        "pool_total_txns": pool_buys + pool_sells,
+        "pool_volume": rng.randint(10_000, 5_000_000),
+        "pool_volume_24h": rng.randint(1_000, 500_000),
+        "price_change_1m": rng.gauss(0, 4),
+        "price_change_5m": rng.gauss(1, 9),
+        "price_change_15m": rng.gauss(2, 15),
+        "price_change_1h": rng.gauss(12, 40),
+        "lp_burned": meta["lp_burned"],
+        "freeze_authority": None,
+        "mint_authority": None,
+        "top10_holders_pct": rng.uniform(12, 45),
+        "dev_holdings_pct": 0 if rng.random() < 0.9 else rng.uniform(0, 5),
+        "dev_holdings_amount": 0,
+        "risk_score": rng.randint(1, 10),
+        "is_rugged": False,
+        "jupiter_verified": rng.random() < 0.05,
+        "sniper_count": meta["sniper_count"],
+        "sniper_balance_pct": rng.uniform(0, 8),
+        "insider_count": meta["insider_count"],
+        "insider_balance_pct": rng.uniform(0, 3) if meta["insider_count"] else 0,
+        "market": meta["market"],
+        "pool_id": meta["pool_id"],
+        "quote_token": QUOTE_TOKEN,
+        "deployer": meta["deployer"],
+        "has_metadata": True,
+        "image_url": meta["image_url"],
+        "description": meta["description"],
+    }
+
+
+def generate_trades(n_trades, seed=42, missing_rate=0.03, legacy_rate=0.5):
+    """Yield `n_trades` chronologically ordered trade records"""
+    rng = random.Random(seed)
+    tokens = []
+    open_positions = {}  # mint -> {"meta", "tokens": remaining, "cost": sol, "chunks": sells left}
+    now = START_TIME
+    sol_balance = 2000.0
+    emitted = 0
+
+    while emitted < n_trades:
+        now += timedelta(seconds=rng.expovariate(1 / 50), microseconds=rng.randint(0, 999) * 1000)
+        shape = LEGACY_SHAPE if rng.random() < legacy_rate else CURRENT_SHAPE
+
+        # Keep ~30 positions open, like the real bot
+        want_buy = not open_positions or (len(open_positions) < 30 and rng.random() < 0.55)
+        if want_buy:
+            if tokens and rng.random() < 0.7:
+                meta = rng.choice(tokens[-max(50, len(tokens) // 20):])
+            else:
+                meta = make_token_meta(rng)
+                tokens.append(meta)
+            if meta["mint"] in open_positions:
+                continue
+            action = "BUY"
+        else:
+            meta = open_positions[rng.choice(list(open_positions))]["meta"]
+            action = "SELL"
+
+        snapshot = None if rng.random() < missing_rate else make_snapshot(rng, meta, now)
+        price_usd = meta["market_cap"] / meta["token_supply"]
+        record = {
+            "timestamp": str(now),
+            "timestamp_detected": str(now + timedelta(seconds=rng.uniform(3, 10))),
+            "action": action,
+            "token": meta["mint"],
+            "token_name": meta["name"],
+            "token_symbol": meta["symbol"],
+        }
+
+        if action == "BUY":
+            sol = 0.1
+            amount = sol * SOL_USD / price_usd
+            open_positions[meta["mint"]] = {"meta": meta, "tokens": amount, "cost": sol,
+                                            "chunks": rng.choice([1, 1, 1, 1, 1, 2, 3])}
+            sol_balance -= sol + 0.001
+            if shape == LEGACY_SHAPE:
+                record.update({"amount": amount, "price": price_usd, "sol_spent": sol,
+                               "fee_sol": 0.001, "sol_balance": sol_balance})
+            else:
+                record.update({"sol_amount": sol, "token_amount": amount, "price_usd": price_usd,
+                               "value_usd": sol * SOL_USD})
+        else:
+            pos = open_positions[meta["mint"]]
+            portion = 1.0 if pos["chunks"] <= 1 else rng.uniform(0.3, 0.7)
+            amount = pos["tokens"] * portion
+            cost = pos["cost"] * portion
+            pnl_pct = rng.gauss(2, 12) if rng.random() < 0.95 else rng.uniform(30, 320)
+            sol = cost * (1 + pnl_pct / 100)
+            pnl_sol = sol - cost
+            pos["tokens"] -= amount
+            pos["cost"] -= cost
+            pos["chunks"] -= 1
+            if pos["chunks"] <= 0:
+                del open_positions[meta["mint"]]
+            sol_balance += sol - 0.001
+            if shape == LEGACY_SHAPE:
+                record.update({"amount": amount, "price": price_usd, "sol_received": sol,
+                               "fee_sol": 0.001, "sol_balance": sol_balance})
+                pnl_keys = ("your_pnl_usd", "your_pnl_pct") if rng.random() < 0.3 else ("pnl_usd", "pnl_pct")
+                record[pnl_keys[0]] = pnl_sol * SOL_USD
+                record[pnl_keys[1]] = pnl_pct
+            else:
+                record.update({"sol_amount": sol, "token_amount": amount, "price_usd": price_usd,
+                               "value_usd": sol * SOL_USD, "pnl_sol": pnl_sol, "pnl_pct": pnl_pct})
+
+        record["tx"] = _tx(rng)
+        record["analysis"] = snapshot
+        emitted += 1
+        yield record
+
+
+def write_history(path, n_trades, seed=42):
+    """Stream a synthetic history to `path` without holding it all in memory"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, record in enumerate(generate_trades(n_trades, seed=seed)):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(record))
+        f.write("\n]")
+    return path
+
+
+def history_path(out_dir, n_trades, seed):
+    """Where a generated history lives (benchmark.py reuses files generated here)"""
+    return os.path.join(out_dir, f"trade_history_{n_trades}_seed{seed}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic trade_history.json files")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out-dir", default="synthetic")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for n in args.sizes:
+        path = history_path(args.out_dir, n, args.seed)
+        write_history(path, n, seed=args.seed)
+        print(f"🧪 {n:,} trades -> {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+📦 HISTORY FILE FORMAT
+=======================
+Packed trade_history.json layout (format 2):
+
+    {
+      "format": 2,
+      "tokens": {mint: {"token_name", "token_symbol", "analysis": {static fields}}},
+      "trades": [trade, ...]
+    }
+
+Fields that never change for a mint (name, symbol, creator, description...)
+are written once in `tokens`; each trade keeps only its time-varying
+snapshot. A field is only dropped from a trade when it equals the table
+value, so anything that does change (e.g. pool_id after a migration) is kept
+on the trade and wins when rejoining.
+
+Old files (a plain list of trades) are still read as-is.
+
+    python history_format.py pack trade_history.json packed.json
+    python history_format.py unpack packed.json trade_history.json
+"""
+
+import json
+import sys
+
+FORMAT_VERSION = 2
+
+STATIC_FIELDS = [
+    "name", "symbol", "mint", "decimals", "creator", "created_tx", "deployer",
+    "pool_id", "quote_token", "image_url", "description", "has_metadata",
+]
+ABSENT_KEY = "_absent"  # static fields a snapshot really didn't have
+
+
+def pack_history(history):
+    """List of full trade dicts -> packed format 2 document"""
+    tokens = {}
+    trades = []
+    for t in history:
+        mint = t.get('token')
+        analysis = t.get('analysis')
+        meta = tokens.get(mint)
+        if meta is None and mint:
+            meta = tokens[mint] = {
+                "token_name": t.get('token_name'),
+                "token_symbol": t.get('token_symbol'),
+                "analysis": {},
+            }
+        if meta is not None and analysis and not meta["analysis"]:
+            meta["analysis"] = {k: analysis[k] for k in STATIC_FIELDS if k in analysis}
+
+        packed = {}
+        for k, v in t.items():
+            if meta is not None and k in ("token_name", "token_symbol") and v == meta[k]:
+                continue
+            packed[k] = v
+
+        if analysis and meta is not None:
+            static = meta["analysis"]
+            snapshot = {k: v for k, v in analysis.items() if k not in static or static[k] != v}
+            absent = [k for k in static if k not in analysis]
+            if absent:
+                snapshot[ABSENT_KEY] = absent
+            if not snapshot:
+                # Only static fields: keep one so it doesn't read back as an empty snapshot
+                key = next(iter(analysis))
+                snapshot[key] = analysis[key]
+            packed['analysis'] = snapshot
+        trades.append(packed)
+
+    return {"format": FORMAT_VERSION, "tokens": tokens, "trades": trades}
+
+
+def unpack_history(data):
+    """Packed document (or legacy plain list) -> list of full trade dicts"""
+    if isinstance(data, list):
+        return data
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported history format: {data.get('format')}")
+
+    tokens = data.get("tokens", {})
+    history = []
+    for t in data.get("trades", []):
+        meta = tokens.get(t.get('token'))
+        if meta is None:
+            history.append(t)
+            continue
+        trade = {"token_name": meta["token_name"], "token_symbol": meta["token_symbol"]}
+        trade.update(t)
+        snapshot = t.get('analysis')
+        if snapshot:  # an empty snapshot stays empty (no static fields rejoined)
+            analysis = dict(meta["analysis"])
+            for k in snapshot.get(ABSENT_KEY, ()):
+                analysis.pop(k, None)
+            analysis.update(snapshot)
+            analysis.pop(ABSENT_KEY, None)
+            trade['analysis'] = analysis
+        history.append(trade)
+    return history
+
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] not in ("pack", "unpack"):
+        print("Usage: python history_format.py pack|unpack <input.json> <output.json>")
+        sys.exit(1)
+    mode, src, dst = sys.argv[1:]
+    with open(src, "r") as f:
+        history = unpack_history(json.load(f))
+    with open(dst, "w", encoding="utf-8") as f:
+        if mode == "pack":
+            json.dump(pack_history(history), f, default=str)
+        else:
+            json.dump(history, f, indent=2, default=str)
+    print(f"✅ {len(history)} trades -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
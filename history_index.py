@@ -0,0 +1,290 @@
+"""
+🗂️ SEEKABLE HISTORY LOG + OFFSET INDEX
+=======================================
+Random access into large captures without parsing the whole history.
+
+`build` rewrites a history (plain or packed trade_history.json) as a chunked
+log: every chunk holds CHUNK_SIZE full trades as newline-delimited JSON and is
+compressed on its own, so any chunk can be decoded without touching the rest.
+A small JSON sidecar index maps
+
+    trade ordinal -> chunk (byte offset + length in the log)
+    time bucket   -> first trade ordinal in that bucket
+
+and a fixed-width binary file maps
+
+    tx signature  -> trade ordinal   (TX_RECORD entries sorted by tx digest)
+
+so a lookup seeks straight to one chunk and decodes only that. Opening the
+index parses only the chunk/bucket tables; a tx lookup binary-searches the tx
+file with a handful of small reads and never loads it.
+
+    python history_index.py build trade_history.json             # -> trade_history.log + .idx.json + .tx.idx
+    python history_index.py get trade_history.log 123
+    python history_index.py tx trade_history.log 5s3iWzBx...
+    python history_index.py between trade_history.log "2026-01-05 02:00" "2026-01-05 03:00"
+    python history_index.py shards trade_history.log 4
+
+    from history_index import IndexedHistory
+    log = IndexedHistory("trade_history.log")
+    log.trade(123); log.by_tx("5s3i..."); log.between(start, end)
+    for shard in log.shards(4): ...   # byte ranges for parallel workers (log.read_shard(shard))
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from bisect import bisect_right
+
+from pattern_analysis import load_data
+from trade_schema import to_epoch
+
+INDEX_VERSION = 2
+TX_RECORD = struct.Struct("<16sQ")  # blake2b-128 digest of the tx signature, trade ordinal
+CHUNK_SIZE = 256  # trades per independently decodable chunk
+BUCKET_SECONDS = 3600
+COMPRESSIONS = {
+    "zlib": (lambda b: zlib.compress(b, 6), zlib.decompress),
+    "none": (lambda b: b, lambda b: b),
+}
+
+
+def index_path(log_path):
+    return log_path + ".idx.json"
+
+
+def tx_index_path(log_path):
+    return log_path + ".tx.idx"
+
+
+def _tx_digest(tx):
+    return hashlib.blake2b(tx.encode("utf-8"), digest_size=16).digest()
+
+
+def build(history, log_path, chunk_size=CHUNK_SIZE, compression="zlib", bucket_seconds=BUCKET_SECONDS):
+    """Write `history` (list of trades, in time order) as a chunked log plus its sidecar index"""
+    compress, _ = COMPRESSIONS[compression]
+    chunks = []
+    tx_index = []
+    buckets = {}
+    offset = 0
+
+    with open(log_path + ".tmp", "wb") as f:
+        for first in range(0, len(history), chunk_size):
+            block = history[first:first + chunk_size]
+            data = compress("".join(json.dumps(t, default=str) + "\n" for t in block).encode("utf-8"))
+            f.write(data)
+
+            times = []
+            for ordinal, t in enumerate(block, first):
+                if t.get('tx'):
+                    tx_index.append((_tx_digest(t['tx']), ordinal))
+                ts = to_epoch(t.get('timestamp'))
+                if ts is not None:
+                    times.append(ts)
+                    buckets.setdefault(str(int(ts // bucket_seconds * bucket_seconds)), ordinal)
+            chunks.append({
+                "offset": offset,
+                "length": len(data),
+                "first": first,
+                "count": len(block),
+                "start": min(times) if times else None,
+                "end": max(times) if times else None,
+            })
+            offset += len(data)
+    os.replace(log_path + ".tmp", log_path)
+
+    tx_index.sort()
+    with open(tx_index_path(log_path) + ".tmp", "wb") as f:
+        f.write(b"".join(TX_RECORD.pack(digest, ordinal) for digest, ordinal in tx_index))
+    os.replace(tx_index_path(log_path) + ".tmp", tx_index_path(log_path))
+
+    st = os.stat(log_path)
+    index = {
+        "version": INDEX_VERSION,
+        "compression": compression,
+        "chunk_size": chunk_size,
+        "bucket_seconds": bucket_seconds,
+        "trades": len(history),
+        "log_size": st.st_size,
+        "log_mtime_ns": st.st_mtime_ns,
+        "chunks": chunks,
+        "tx_entries": len(tx_index),
+        "buckets": buckets,
+    }
+    with open(index_path(log_path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(index_path(log_path) + ".tmp", index_path(log_path))
+    return index
+
+
+class IndexedHistory:
+    """Read-only random access into a chunked history log through its sidecar index"""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        with open(index_path(log_path), "r") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {self.index.get('version')}")
+        st = os.stat(log_path)
+        if st.st_size != self.index["log_size"] or st.st_mtime_ns != self.index["log_mtime_ns"]:
+            raise ValueError(f"{log_path} changed since it was indexed - rebuild the index")
+
+        _, self._decompress = COMPRESSIONS[self.index["compression"]]
+        self.chunks = self.index["chunks"]
+        self._firsts = [c["first"] for c in self.chunks]
+        bucket_keys = sorted(int(k) for k in self.index["buckets"])
+        self._bucket_starts = bucket_keys
+        self._bucket_ordinals = [self.index["buckets"][str(k)] for k in bucket_keys]
+        self._cache = (None, None)  # last decoded chunk, consecutive lookups often hit it
+
+    def __len__(self):
+        return self.index["trades"]
+
+    def _read_chunk(self, i):
+        if self._cache[0] == i:
+            return self._cache[1]
+        chunk = self.chunks[i]
+        with open(self.log_path, "rb") as f:
+            f.seek(chunk["offset"])
+            data = f.read(chunk["length"])
+        trades = [json.loads(line) for line in self._decompress(data).decode("utf-8").splitlines()]
+        self._cache = (i, trades)
+        return trades
+
+    def _chunk_of(self, ordinal):
+        return bisect_right(self._firsts, ordinal) - 1
+
+    # ---- point lookups -------------------------------------------------
+
+    def trade(self, ordinal):
+        if not 0 <= ordinal < len(self):
+            raise IndexError(ordinal)
+        i = self._chunk_of(ordinal)
+        return self._read_chunk(i)[ordinal - self.chunks[i]["first"]]
+
+    def by_tx(self, tx):
+        """Binary search of the sorted tx file (~log2(n) reads of TX_RECORD.size bytes), then one chunk decode"""
+        digest = _tx_digest(tx)
+        lo, hi = 0, self.index["tx_entries"]
+        with open(tx_index_path(self.log_path), "rb") as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * TX_RECORD.size)
+                key, ordinal = TX_RECORD.unpack(f.read(TX_RECORD.size))
+                if key < digest:
+                    lo = mid + 1
+                elif key > digest:
+                    hi = mid
+                else:
+                    trade = self.trade(ordinal)
+                    return trade if trade.get('tx') == tx else None
+        return None
+
+    # ---- range lookups -------------------------------------------------
+
+    def ordinals_between(self, start=None, end=None):
+        """Ordinal range [lo, hi) that can contain trades in [start, end], from the bucket index"""
+        lo, hi = 0, len(self)
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if start_ts is not None:
+            b = bisect_right(self._bucket_starts, start_ts) - 1
+            lo = self._bucket_ordinals[b] if b >= 0 else 0
+        if end_ts is not None:
+            b = bisect_right(self._bucket_starts, end_ts)
+            hi = self._bucket_ordinals[b] if b < len(self._bucket_ordinals) else len(self)
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None):
+        """Trades with start <= timestamp <= end, decoding only the chunks that overlap"""
+        lo, hi = self.ordinals_between(start, end)
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        result = []
+        for i in range(self._chunk_of(lo), self._chunk_of(hi - 1) + 1 if hi > lo else 0):
+            chunk = self.chunks[i]
+            if chunk["start"] is not None and ((end_ts is not None and chunk["start"] > end_ts)
+                                               or (start_ts is not None and chunk["end"] < start_ts)):
+                continue
+            for t in self._read_chunk(i):
+                ts = to_epoch(t.get('timestamp'))
+                if ts is not None and (start_ts is None or ts >= start_ts) and (end_ts is None or ts <= end_ts):
+                    result.append(t)
+        return result
+
+    # ---- sharding ------------------------------------------------------
+
+    def shards(self, n):
+        """Split the log into n contiguous runs of chunks of roughly equal byte size"""
+        total = sum(c["length"] for c in self.chunks)
+        shards = []
+        start = 0
+        for k in range(1, n + 1):
+            target = total * k / n
+            end = start
+            # A chunk goes to the shard its midpoint falls in
+            while end < len(self.chunks) and (self.chunks[end]["offset"] + self.chunks[end]["length"] / 2 <= target
+                                              or k == n):
+                end += 1
+            if end > start:
+                first, last = self.chunks[start], self.chunks[end - 1]
+                shards.append({
+                    "chunks": (start, end),
+                    "byte_range": (first["offset"], last["offset"] + last["length"]),
+                    "ordinals": (first["first"], last["first"] + last["count"]),
+                })
+            start = end
+        return shards
+
+    def read_shard(self, shard):
+        """Decode one shard with a single sequential read of its byte range"""
+        start, end = shard["chunks"]
+        lo, hi = shard["byte_range"]
+        with open(self.log_path, "rb") as f:
+            f.seek(lo)
+            data = f.read(hi - lo)
+        trades = []
+        for chunk in self.chunks[start:end]:
+            rel = chunk["offset"] - lo
+            block = self._decompress(data[rel:rel + chunk["length"]]).decode("utf-8")
+            trades.extend(json.loads(line) for line in block.splitlines())
+        return trades
+
+
+def main():
+    usage = ("Usage: python history_index.py build <history.json> [log] | get <log> <n> | tx <log> <sig> | "
+             "between <log> <start> <end> | shards <log> <n>")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    cmd, path, *args = sys.argv[1:]
+
+    if cmd == "build":
+        log_path = args[0] if args else os.path.splitext(path)[0] + ".log"
+        index = build(load_data(path), log_path)
+        print(f"✅ {index['trades']} trades in {len(index['chunks'])} chunks -> {log_path} (+ {index_path(log_path)})")
+        return
+
+    log = IndexedHistory(path)
+    if cmd == "get" and len(args) == 1:
+        print(json.dumps(log.trade(int(args[0])), indent=2))
+    elif cmd == "tx" and len(args) == 1:
+        print(json.dumps(log.by_tx(args[0]), indent=2))
+    elif cmd == "between" and len(args) == 2:
+        trades = log.between(*args)
+        for t in trades:
+            print(f"{t.get('timestamp')}  {t.get('action', ''):4}  {t.get('token_symbol', '')}  {t.get('tx', '')}")
+        print(f"{len(trades)} trades")
+    elif cmd == "shards" and len(args) == 1:
+        for s in log.shards(int(args[0])):
+            print(f"chunks {s['chunks']}  bytes {s['byte_range']}  trades {s['ordinals']}")
+    else:
+        print(usage)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+🧱 SEGMENTED HISTORY STORAGE
+=============================
+Time-based segments instead of one ever-growing trade_history.json:
+
+    history_segments/
+      manifest.json              segment list: time range, trade count, state
+      20260105T09.jsonl          open segment (one JSON trade per line, appended)
+      20260105T08.jsonl.gz       sealed segment (compressed once its hour is over)
+      20260104T00-20260105T00.jsonl.gz   compacted run of small sealed segments
+      untimed.jsonl              trades without a usable timestamp (parked, not in any segment)
+
+Trades go to the segment of their own timestamp's hour; a trade whose
+timestamp is missing or unparseable is parked in untimed.jsonl instead and
+only comes back from an unwindowed load(). A segment is sealed
+(gzipped, counted, listed as sealed) SEAL_GRACE seconds after its hour ends.
+A trade that arrives for an already sealed hour (e.g. a backfill) opens an
+extra segment for that hour, and compaction folds it back in. A trade whose
+tx is already stored for its hour is dropped, so a backfill replayed after a
+restart doesn't duplicate anything; load() and compaction also keep only the
+first copy of a tx, for stores written before that check.
+
+Compaction (run by a background thread in the tracker, or from the CLI):
+  - segments older than RETENTION_DAYS keep only round-trip summaries: every
+    trade keeps its own fields but its snapshot shrinks to SUMMARY_FIELDS,
+    the entry metrics the reports use;
+  - adjacent sealed segments are merged while the result stays under
+    MERGE_TARGET_TRADES trades and MAX_SEGMENT_SPAN seconds;
+  - with DROP_AFTER_DAYS set, older segments are deleted outright.
+
+Readers open only the segments whose range overlaps the requested window:
+
+    from history_segments import SegmentStore
+    SegmentStore("history_segments").load("2026-01-05 02:00", "2026-01-05 03:00")
+    pattern_analysis.load_data("history_segments", start, end)
+
+    python history_segments.py import trade_history.json history_segments
+    python history_segments.py compact history_segments
+    python history_segments.py list history_segments
+    python history_segments.py export history_segments out.json ["2026-01-05 02:00" ["2026-01-05 03:00"]]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from threading import Lock, Thread
+
+from history_format import pack_history, unpack_history
+from trade_schema import to_epoch
+
+MANIFEST_VERSION = 1
+SEGMENT_SECONDS = 3600
+SEAL_GRACE = 60  # seconds after a segment's hour before it is sealed (late detections)
+RETENTION_DAYS = 7  # full snapshots kept this long, round-trip summaries after that
+DROP_AFTER_DAYS = None  # e.g. 90 to delete segments entirely
+MERGE_TARGET_TRADES = 5000
+MAX_SEGMENT_SPAN = 86400
+COMPACT_INTERVAL = 600  # seconds between background compactions
+UNTIMED_FILE = "untimed.jsonl"
+
+# Snapshot fields kept once a segment is past retention (what the reports and classifier read)
+SUMMARY_FIELDS = [
+    "age_seconds", "market_cap", "liquidity", "holders", "buy_sell_ratio", "lp_burned",
+    "price_change_1m", "price_change_5m", "price_change_15m", "price_change_1h",
+    "top10_holders_pct", "sniper_count", "sniper_balance_pct", "insider_count", "insider_balance_pct",
+    "dev_holdings_pct", "risk_score", "market", "freeze_authority", "mint_authority", "price_usd", "price_sol",
+    "backfilled",
+]
+
+
+def _stamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%dT%H")
+
+
+def unique_trades(trades):
+    """trades without repeats of a tx seen earlier in the list (trades without a tx are all kept)"""
+    seen = set()
+    kept = []
+    for t in trades:
+        tx = t.get('tx')
+        if tx:
+            if tx in seen:
+                continue
+            seen.add(tx)
+        kept.append(t)
+    return kept
+
+
+def summarize_trade(t):
+    """A trade with its snapshot reduced to SUMMARY_FIELDS"""
+    slim = dict(t)
+    if t.get('analysis'):
+        slim['analysis'] = {k: t['analysis'][k] for k in SUMMARY_FIELDS if k in t['analysis']}
+    return slim
+
+
+class SegmentStore:
+    """Hourly history segments under `directory`, listed in manifest.json"""
+
+    def __init__(self, directory, segment_seconds=SEGMENT_SECONDS):
+        self.directory = directory
+        self.lock = Lock()
+        self._txs = {}  # segment file -> txs stored in it, filled on demand by append()
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest() or {
+            "version": MANIFEST_VERSION,
+            "segment_seconds": segment_seconds,
+            "segments": [],
+        }
+        if self.manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version: {self.manifest.get('version')}")
+        self.segment_seconds = self.manifest["segment_seconds"]
+
+    # ---- manifest ------------------------------------------------------
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self):
+        try:
+            with open(self._path("manifest.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_manifest(self):
+        # Write-then-rename so readers never see a half-written manifest
+        self.manifest["segments"].sort(key=lambda s: (s["start"], s["file"]))
+        with open(self._path("manifest.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(self._path("manifest.json.tmp"), self._path("manifest.json"))
+
+    def segments(self):
+        with self.lock:
+            return [dict(s) for s in self.manifest["segments"]]
+
+    def refresh(self):
+        """Re-read the manifest (another process may own the writing side) and return the segment list"""
+        with self.lock:
+            self.manifest = self._read_manifest() or self.manifest
+        return self.segments()
+
+    # ---- writing -------------------------------------------------------
+
+    def _open_segment(self, bucket):
+        """Manifest entry of the open segment for this hour, created if needed (caller holds the lock)"""
+        for s in self.manifest["segments"]:
+            if not s["sealed"] and s["start"] == bucket:
+                return s
+        name = _stamp(bucket)
+        taken = {s["file"] for s in self.manifest["segments"]}
+        k = 1
+        while f"{name}.jsonl" in taken or f"{name}.jsonl.gz" in taken:
+            name = f"{_stamp(bucket)}-{k}"
+            k += 1
+        segment = {"file": f"{name}.jsonl", "start": bucket, "end": bucket + self.segment_seconds,
+                   "first": None, "last": None, "trades": None, "sealed": False, "summarized": False}
+        open(self._path(segment["file"]), "a").close()  # exists before the manifest lists it
+        self.manifest["segments"].append(segment)
+        self._save_manifest()
+        return segment
+
+    def _stored_txs(self, name):
+        """txs in one segment file, cached: sealed files never change and append() adds its own (caller holds the lock)"""
+        if name not in self._txs:
+            try:
+                trades = self._read_file(name)
+            except FileNotFoundError:
+                trades = []
+            self._txs[name] = {t['tx'] for t in trades if t.get('tx')}
+        return self._txs[name]
+
+    def append(self, records):
+        """
+        Add new trades to the open segments of their hours (untimed ones to UNTIMED_FILE), then seal whatever is
+        due. Trades whose tx is already stored for their hour are skipped.
+        """
+        with self.lock:
+            by_file = {}
+            for t in records:
+                ts = to_epoch(t.get('timestamp'))
+                if ts is None:
+                    covering = [UNTIMED_FILE]
+                else:
+                    covering = [s["file"] for s in self.manifest["segments"] if s["start"] <= ts < s["end"]]
+                tx = t.get('tx')
+                if tx and any(tx in self._stored_txs(name) for name in covering):
+                    continue
+                if ts is None:
+                    name = UNTIMED_FILE
+                else:
+                    name = self._open_segment(int(ts // self.segment_seconds * self.segment_seconds))["file"]
+                if tx:
+                    self._stored_txs(name).add(tx)
+                by_file.setdefault(name, []).append(t)
+            for name, trades in by_file.items():
+                with open(self._path(name), "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(t, default=str) + "\n" for t in trades))
+        self.rotate()
+
+    def rotate(self, now=None):
+        """Seal (count, gzip, mark) every open segment whose hour ended more than SEAL_GRACE s ago"""
+        now = to_epoch(datetime.now()) if now is None else now
+        with self.lock:
+            due = [s for s in self.manifest["segments"] if not s["sealed"] and s["end"] + SEAL_GRACE <= now]
+            for s in due:
+                trades = self._read_file(s["file"])
+                self._write_file(s["file"] + ".gz", trades)
+                if s["file"] in self._txs:
+                    self._txs[s["file"] + ".gz"] = self._txs.pop(s["file"])
+                s.update(self._describe(trades), file=s["file"] + ".gz", sealed=True)
+            if due:
+                self._save_manifest()
+            # Only once the manifest points at the sealed files
+            for s in due:
+                os.remove(self._path(s["file"][:-3]))
+        return len(due)
+
+    def _describe(self, trades):
+        times = [to_epoch(t.get('timestamp')) for t in trades]
+        return {"first": min(times) if times else None, "last": max(times) if times else None, "trades": len(trades)}
+
+    def _write_file(self, name, trades):
+        with gzip.open(self._path(name + ".tmp"), "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write("".join(json.dumps(t, default=str) + "\n" for t in trades))
+        os.replace(self._path(name + ".tmp"), self._path(name))
+
+    def _read_file(self, name):
+        return self.read_segment(name)[0]
+
+    def read_segment(self, name, offset=0):
+        """(trades, offset after the last complete line) of one segment file, starting at byte `offset` of its JSONL"""
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(self._path(name), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # An open segment may be mid-append: only complete lines count
+        end = data.rfind(b"\n") + 1
+        return [json.loads(line) for line in data[:end].splitlines() if line.strip()], offset + end
+
+    # ---- reading -------------------------------------------------------
+
+    def load(self, start=None, end=None):
+        """Trades with start <= timestamp <= end in time order, reading only the overlapping segments"""
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        for attempt in range(2):
+            # Another process may own the writing side; a retry covers files replaced after this read
+            wanted = [s for s in self.refresh()
+                      if (end_ts is None or s["start"] <= end_ts) and (start_ts is None or s["end"] > start_ts)]
+            try:
+                trades = [t for s in wanted for t in self._read_file(s["file"])]
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        if start_ts is not None or end_ts is not None:
+            trades = [t for t in trades if (start_ts is None or to_epoch(t.get('timestamp')) >= start_ts)
+                      and (end_ts is None or to_epoch(t.get('timestamp')) <= end_ts)]
+        trades.sort(key=lambda t: to_epoch(t.get('timestamp')))
+        if start is None and end is None and os.path.exists(self._path(UNTIMED_FILE)):
+            trades += self._read_file(UNTIMED_FILE)  # no time to place them by: after the timed ones
+        return unique_trades(trades)
+
+    # ---- compaction ----------------------------------------------------
+
+    def compact(self, now=None, retention_days=RETENTION_DAYS, drop_after_days=DROP_AFTER_DAYS,
+                merge_target=MERGE_TARGET_TRADES, max_span=MAX_SEGMENT_SPAN):
+        """Apply retention and merge small sealed segments; returns counts of what changed"""
+        now = to_epoch(datetime.now()) if now is None else now
+        self.rotate(now)
+        stats = {"dropped": 0, "summarized": 0, "merged": 0}
+        sealed = [s for s in self.segments() if s["sealed"]]
+
+        if drop_after_days is not None:
+            expired = [s for s in sealed if s["end"] <= now - drop_after_days * 86400]
+            self._replace(expired, [])
+            stats["dropped"] = len(expired)
+            sealed = [s for s in sealed if s not in expired]
+
+        cutoff = now - retention_days * 86400
+        for s in sealed:
+            if s["end"] <= cutoff and not s["summarized"]:
+                self._write_file(s["file"], [summarize_trade(t) for t in self._read_file(s["file"])])
+                with self.lock:
+                    for entry in self.manifest["segments"]:
+                        if entry["file"] == s["file"]:
+                            entry["summarized"] = s["summarized"] = True
+                    self._save_manifest()
+                stats["summarized"] += 1
+
+        # Greedy runs of adjacent sealed segments (same retention state) that fit the targets
+        runs, run = [], []
+        for s in sorted(sealed, key=lambda s: (s["start"], s["file"])):
+            if run and (s["summarized"] != run[0]["summarized"]
+                        or sum(r["trades"] for r in run) + s["trades"] > merge_target
+                        or max(s["end"], run[-1]["end"]) - run[0]["start"] > max_span):
+                runs.append(run)
+                run = []
+            run.append(s)
+        runs.append(run)
+
+        for run in runs:
+            if len(run) < 2:
+                continue
+            trades = [t for s in run for t in self._read_file(s["file"])]
+            trades.sort(key=lambda t: to_epoch(t.get('timestamp')))
+            trades = unique_trades(trades)
+            start, end = run[0]["start"], max(s["end"] for s in run)
+            name = f"{_stamp(start)}-{_stamp(end)}.jsonl.gz"
+            if name in {s["file"] for s in run}:
+                name = f"{_stamp(start)}-{_stamp(end)}-{len(trades)}.jsonl.gz"
+            self._write_file(name, trades)
+            merged = {"file": name, "start": start, "end": end, **self._describe(trades),
+                      "sealed": True, "summarized": run[0]["summarized"]}
+            self._replace(run, [merged])
+            stats["merged"] += len(run)
+        return stats
+
+    def _replace(self, old, new):
+        """Swap manifest entries, then delete the files nothing lists any more"""
+        if not old:
+            return
+        files = {s["file"] for s in old}
+        with self.lock:
+            self.manifest["segments"] = [s for s in self.manifest["segments"] if s["file"] not in files] + new
+            self._save_manifest()
+            for name in files:
+                self._txs.pop(name, None)
+        for name in files - {s["file"] for s in new}:
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+
+def start_compactor(store, interval=COMPACT_INTERVAL):
+    """Background thread sealing and compacting `store` every `interval` seconds"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                stats = store.compact()
+                if any(stats.values()):
+                    print(f"🧱 Segments compacted: {stats['merged']} merged, {stats['summarized']} summarized, "
+                          f"{stats['dropped']} dropped")
+            except Exception as e:
+                print(f"⚠️  Segment compaction failed: {e}")
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    usage = ("Usage: python history_segments.py import <history.json> <dir> | compact <dir> | list <dir> | "
+             "export <dir> <out.json> [start [end]]")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    cmd, *args = sys.argv[1:]
+
+    if cmd == "import" and len(args) == 2:
+        with open(args[0], "r") as f:
+            history = unpack_history(json.load(f))
+        store = SegmentStore(args[1])
+        store.append(history)
+        print(f"✅ Imported {len(history)} trades into {len(store.segments())} segments")
+    elif cmd == "compact" and len(args) == 1:
+        stats = SegmentStore(args[0]).compact()
+        print(f"✅ {stats['merged']} segments merged, {stats['summarized']} summarized, {stats['dropped']} dropped")
+    elif cmd == "list" and len(args) == 1:
+        for s in SegmentStore(args[0]).segments():
+            state = "summary" if s["summarized"] else "sealed" if s["sealed"] else "open"
+            size = os.path.getsize(os.path.join(args[0], s["file"])) if os.path.exists(os.path.join(args[0], s["file"])) else 0
+            print(f"{s['file']:40} {state:8} {s['trades'] if s['trades'] is not None else '-':>6} trades  {size:>10,} bytes")
+    elif cmd == "export" and 2 <= len(args) <= 4:
+        store = SegmentStore(args[0])
+        history = store.load(*args[2:])
+        with open(args[1], "w", encoding="utf-8") as f:
+            json.dump(pack_history(history), f, indent=2, default=str)
+        print(f"✅ Exported {len(history)} trades to {args[1]}")
+    else:
+        print(usage)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
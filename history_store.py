@@ -0,0 +1,365 @@
+"""
+🗄️ SQLITE HISTORY STORE
+========================
+Optional SQLite (WAL) backend shared by the tracker (writer) and the analyzer
+(reader). WAL lets the tracker keep appending while analyses run.
+
+Tables:
+  trades           one row per BUY/SELL (queryable columns + the raw record)
+  token_snapshots  the `analysis` dict captured with each trade
+  round_trips      FIFO-matched BUY -> SELL pairs, maintained on insert
+
+Import an existing JSON capture:
+    python history_store.py import trade_history.json trade_history.db
+"""
+
+import json
+import sqlite3
+import sys
+
+from history_format import unpack_history
+from trade_schema import to_epoch
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id            INTEGER PRIMARY KEY,
+    tx            TEXT UNIQUE,
+    ts            REAL,
+    action        TEXT NOT NULL,
+    mint          TEXT,
+    token_name    TEXT,
+    token_symbol  TEXT,
+    sol_amount    REAL,
+    token_amount  REAL,
+    pnl_pct       REAL,
+    pnl_usd       REAL,
+    pnl_sol       REAL,
+    record        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_mint_action_ts ON trades (mint, action, ts);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts);
+CREATE INDEX IF NOT EXISTS idx_trades_action ON trades (action);
+
+CREATE TABLE IF NOT EXISTS token_snapshots (
+    trade_id          INTEGER PRIMARY KEY REFERENCES trades (id),
+    mint              TEXT,
+    ts                REAL,
+    market_cap        NUMERIC,
+    liquidity         NUMERIC,
+    holders           NUMERIC,
+    age_seconds       NUMERIC,
+    buy_sell_ratio    NUMERIC,
+    lp_burned         NUMERIC,
+    price_change_1m   NUMERIC,
+    price_change_5m   NUMERIC,
+    price_change_15m  NUMERIC,
+    price_change_1h   NUMERIC,
+    top10_holders_pct NUMERIC,
+    sniper_count      NUMERIC,
+    no_freeze         INTEGER,
+    no_mint           INTEGER,
+    data              TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_mint_ts ON token_snapshots (mint, ts);
+
+CREATE TABLE IF NOT EXISTS round_trips (
+    id             INTEGER PRIMARY KEY,
+    mint           TEXT,
+    buy_trade_id   INTEGER UNIQUE REFERENCES trades (id),
+    sell_trade_id  INTEGER UNIQUE REFERENCES trades (id),
+    buy_ts         REAL,
+    sell_ts        REAL
+);
+CREATE INDEX IF NOT EXISTS idx_round_trips_mint ON round_trips (mint);
+CREATE INDEX IF NOT EXISTS idx_round_trips_sell_ts ON round_trips (sell_ts);
+"""
+
+SNAPSHOT_COLUMNS = [
+    "market_cap", "liquidity", "holders", "age_seconds", "buy_sell_ratio", "lp_burned",
+    "price_change_1m", "price_change_5m", "price_change_15m", "price_change_1h",
+    "top10_holders_pct", "sniper_count",
+]
+# Round-trip fields left None (not 0) when the buy has no snapshot, so the cube puts them under n/a
+UNSNAPSHOTTED_BUY_FIELDS = ("buy_lp_burn", "buy_snipers", "buy_risk")
+
+
+def _at_trade(alias):
+    """SQL condition: snapshot `alias` was taken at trade time (backfilled ones count as missing)"""
+    return f"COALESCE(json_extract({alias}.data, '$.backfilled'), 0) = 0"
+
+
+class HistoryStore:
+    def __init__(self, path="trade_history.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- writing -------------------------------------------------------
+
+    def _insert(self, t):
+        """Insert one trade (+ snapshot, + round-trip for sells). Returns False if tx already stored."""
+        pnl_pct = t.get('pnl_pct') or t.get('your_pnl_pct') or 0
+        pnl_usd = t.get('pnl_usd') or t.get('your_pnl_usd') or 0
+        sol_amount = t.get('sol_amount') or t.get('sol_spent') or t.get('sol_received') or 0
+        token_amount = t.get('token_amount') or t.get('amount') or 0
+        ts = to_epoch(t.get('timestamp'))
+        record = {k: v for k, v in t.items() if k != 'analysis'}
+
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO trades (tx, ts, action, mint, token_name, token_symbol, sol_amount, "
+            "token_amount, pnl_pct, pnl_usd, pnl_sol, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (t.get('tx') or None, ts, t.get('action'), t.get('token'), t.get('token_name'), t.get('token_symbol'),
+             sol_amount, token_amount, pnl_pct, pnl_usd, t.get('pnl_sol'), json.dumps(record, default=str)),
+        )
+        if not cur.rowcount:
+            return False
+        trade_id = cur.lastrowid
+
+        analysis = t.get('analysis')
+        if analysis:
+            self.conn.execute(
+                f"INSERT INTO token_snapshots (trade_id, mint, ts, {', '.join(SNAPSHOT_COLUMNS)}, no_freeze, no_mint, data) "
+                f"VALUES ({', '.join('?' * (len(SNAPSHOT_COLUMNS) + 6))})",
+                (trade_id, t.get('token'), ts, *[analysis.get(c) for c in SNAPSHOT_COLUMNS],
+                 analysis.get('freeze_authority') is None, analysis.get('mint_authority') is None,
+                 json.dumps(analysis, default=str)),
+            )
+
+        mint = t.get('token')
+        if ts is None or t.get('action') not in ('BUY', 'SELL'):
+            return True
+        later = self.conn.execute(
+            "SELECT 1 FROM trades WHERE mint = ? AND ts > ? AND action IN ('BUY', 'SELL') LIMIT 1", (mint, ts)
+        ).fetchone()
+        if later:
+            # Arrived out of order (e.g. a backfill into an existing store): earlier pairings may change
+            self._rematch(mint)
+        elif t.get('action') == 'SELL':
+            self._match_sell(trade_id, mint, ts)
+        return True
+
+    def _rematch(self, mint):
+        """Rebuild the mint's round-trips with the analyzer's FIFO pointer walk over its trades in time order"""
+        rows = self.conn.execute(
+            "SELECT id, action, ts FROM trades WHERE mint = ? AND ts IS NOT NULL AND action IN ('BUY', 'SELL') "
+            "ORDER BY ts, id",
+            (mint,),
+        ).fetchall()
+        buys = [r for r in rows if r['action'] == 'BUY']
+        pairs = []
+        for sell in (r for r in rows if r['action'] == 'SELL'):
+            if len(pairs) < len(buys) and buys[len(pairs)]['ts'] < sell['ts']:
+                buy = buys[len(pairs)]
+                pairs.append((mint, buy['id'], sell['id'], buy['ts'], sell['ts']))
+        self.conn.execute("DELETE FROM round_trips WHERE mint = ?", (mint,))
+        self.conn.executemany(
+            "INSERT INTO round_trips (mint, buy_trade_id, sell_trade_id, buy_ts, sell_ts) VALUES (?, ?, ?, ?, ?)",
+            pairs,
+        )
+
+    def _match_sell(self, sell_id, mint, sell_ts):
+        """FIFO: pair the sell with the earliest still-unmatched buy of the mint before it"""
+        buy = self.conn.execute(
+            "SELECT b.id, b.ts FROM trades b WHERE b.mint = ? AND b.action = 'BUY' AND b.ts < ? "
+            "AND NOT EXISTS (SELECT 1 FROM round_trips r WHERE r.buy_trade_id = b.id) "
+            "ORDER BY b.ts, b.id LIMIT 1",
+            (mint, sell_ts),
+        ).fetchone()
+        if buy:
+            self.conn.execute(
+                "INSERT INTO round_trips (mint, buy_trade_id, sell_trade_id, buy_ts, sell_ts) VALUES (?, ?, ?, ?, ?)",
+                (mint, buy['id'], sell_id, buy['ts'], sell_ts),
+            )
+
+    def add_trade(self, trade):
+        """Called by the tracker for every new trade (one short transaction each)"""
+        with self.conn:
+            return self._insert(trade)
+
+    def import_history(self, history):
+        """Bulk import in chronological order so round-trips match like the analyzer's FIFO"""
+        ordered = sorted(history, key=lambda t: (to_epoch(t.get('timestamp')) or 0))
+        with self.conn:
+            added = sum(self._insert(t) for t in ordered)
+        return added
+
+    def import_json(self, path):
+        with open(path, "r") as f:
+            return self.import_history(unpack_history(json.load(f)))
+
+    # ---- reading -------------------------------------------------------
+
+    def load_history(self, start=None, end=None):
+        """Trade dicts (same shape as trade_history.json) in chronological order"""
+        sql = ("SELECT t.record, s.data FROM trades t LEFT JOIN token_snapshots s ON s.trade_id = t.id "
+               "WHERE (? IS NULL OR t.ts >= ?) AND (? IS NULL OR t.ts <= ?) ORDER BY t.ts, t.id")
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        history = []
+        for row in self.conn.execute(sql, (start_ts, start_ts, end_ts, end_ts)):
+            t = json.loads(row['record'])
+            t['analysis'] = json.loads(row['data']) if row['data'] else None
+            history.append(t)
+        return history
+
+    def trades_since(self, last_id=0):
+        """Trades inserted after row id `last_id` (in insert order) and the new last id"""
+        rows = self.conn.execute(
+            "SELECT t.id, t.record, s.data FROM trades t LEFT JOIN token_snapshots s ON s.trade_id = t.id "
+            "WHERE t.id > ? ORDER BY t.id",
+            (last_id,),
+        ).fetchall()
+        trades = []
+        for row in rows:
+            t = json.loads(row['record'])
+            t['analysis'] = json.loads(row['data']) if row['data'] else None
+            trades.append(t)
+        return trades, (rows[-1]['id'] if rows else last_id)
+
+    def token_groups(self):
+        """Per-mint counts and P/L, aggregated in SQL"""
+        rows = self.conn.execute(
+            "SELECT mint, MAX(token_symbol) AS symbol, MAX(token_name) AS name, "
+            "SUM(action = 'BUY') AS buys, SUM(action = 'SELL') AS sells, "
+            "SUM(CASE WHEN action = 'SELL' THEN pnl_usd ELSE 0 END) AS pnl_usd, "
+            "MIN(ts) AS first_ts, MAX(ts) AS last_ts "
+            "FROM trades WHERE mint IS NOT NULL GROUP BY mint ORDER BY first_ts"
+        )
+        return [dict(r) for r in rows]
+
+    def completed_trades(self):
+        """Round-trips in the same dict shape analyze_token_trades produces (plus symbol/name/ca)"""
+        sql = f"""
+            SELECT sb.record AS buy_record, ss.record AS sell_record,
+                   b.market_cap AS buy_mc, s.market_cap AS sell_mc,
+                   b.holders AS buy_holders, s.holders AS sell_holders,
+                   b.liquidity AS buy_liq, s.liquidity AS sell_liq,
+                   b.age_seconds AS buy_age,
+                   b.price_change_1m AS buy_price_1m, b.price_change_5m AS buy_price_5m,
+                   b.price_change_1h AS buy_price_1h,
+                   s.price_change_1m AS sell_price_1m, s.price_change_5m AS sell_price_5m,
+                   b.buy_sell_ratio AS buy_ratio,
+                   b.price_change_15m AS buy_price_15m, b.top10_holders_pct AS buy_top10,
+                   b.sniper_count AS buy_snipers, json_extract(b.data, '$.sniper_balance_pct') AS buy_sniper_pct,
+                   json_extract(b.data, '$.insider_count') AS buy_insiders,
+                   json_extract(b.data, '$.insider_balance_pct') AS buy_insider_pct,
+                   json_extract(b.data, '$.dev_holdings_pct') AS buy_dev_pct,
+                   json_extract(b.data, '$.risk_score') AS buy_risk, b.lp_burned AS buy_lp_burn,
+                   COALESCE(json_extract(b.data, '$.market'), '') AS buy_market,
+                   ss.pnl_pct AS pnl_pct, ss.pnl_usd AS pnl_usd,
+                   ss.token_symbol AS symbol, ss.token_name AS name, r.mint AS ca,
+                   b.trade_id AS buy_snapshot
+            FROM round_trips r
+            JOIN trades sb ON sb.id = r.buy_trade_id
+            JOIN trades ss ON ss.id = r.sell_trade_id
+            LEFT JOIN token_snapshots b ON b.trade_id = r.buy_trade_id AND {_at_trade('b')}
+            LEFT JOIN token_snapshots s ON s.trade_id = r.sell_trade_id AND {_at_trade('s')}
+            ORDER BY r.sell_ts
+        """
+        completed = []
+        for row in self.conn.execute(sql):
+            trade = {k: (row[k] if row[k] is not None else 0) for k in row.keys()
+                     if k not in ('buy_record', 'sell_record', 'buy_snapshot')}
+            if row['buy_snapshot'] is None:
+                trade.update(dict.fromkeys(UNSNAPSHOTTED_BUY_FIELDS))
+            trade['buy_time'] = json.loads(row['buy_record']).get('timestamp')
+            trade['sell_time'] = json.loads(row['sell_record']).get('timestamp')
+            trade['symbol'], trade['name'], trade['ca'] = row['symbol'], row['name'], row['ca']
+            completed.append(trade)
+        return completed
+
+    def open_count(self):
+        return self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM trades WHERE action = 'BUY' AND mint IS NOT NULL) "
+            "- (SELECT COUNT(*) FROM round_trips)"
+        ).fetchone()[0]
+
+    def buy_criteria(self):
+        """SQL version of pattern_analysis.analyze_buy_criteria"""
+        row = self.conn.execute(f"""
+            SELECT COUNT(*) AS n,
+                   MIN(CASE WHEN age_seconds > 0 THEN age_seconds END) AS age_min,
+                   MAX(CASE WHEN age_seconds > 0 THEN age_seconds END) AS age_max,
+                   AVG(CASE WHEN age_seconds > 0 THEN age_seconds END) AS age_avg,
+                   MIN(CASE WHEN market_cap > 0 THEN market_cap END) AS mc_min,
+                   MAX(CASE WHEN market_cap > 0 THEN market_cap END) AS mc_max,
+                   AVG(CASE WHEN market_cap > 0 THEN market_cap END) AS mc_avg,
+                   MIN(CASE WHEN liquidity > 0 THEN liquidity END) AS liq_min,
+                   MAX(CASE WHEN liquidity > 0 THEN liquidity END) AS liq_max,
+                   AVG(CASE WHEN liquidity > 0 THEN liquidity END) AS liq_avg,
+                   MIN(CASE WHEN holders > 0 THEN holders END) AS holders_min,
+                   MAX(CASE WHEN holders > 0 THEN holders END) AS holders_max,
+                   AVG(CASE WHEN holders > 0 THEN holders END) AS holders_avg,
+                   AVG(CASE WHEN buy_sell_ratio > 0 THEN buy_sell_ratio END) AS ratio_avg,
+                   AVG(COALESCE(lp_burned, 0)) AS lp_burn_avg,
+                   AVG(COALESCE(price_change_1m, 0)) AS price_1m_avg,
+                   AVG(COALESCE(price_change_5m, 0)) AS price_5m_avg,
+                   AVG(COALESCE(price_change_1h, 0)) AS price_1h_avg,
+                   AVG(CASE WHEN top10_holders_pct > 0 THEN top10_holders_pct END) AS top10_avg,
+                   AVG(COALESCE(sniper_count, 0)) AS sniper_avg,
+                   AVG(no_freeze) * 100 AS no_freeze_pct,
+                   AVG(no_mint) * 100 AS no_mint_pct
+            FROM token_snapshots s JOIN trades t ON t.id = s.trade_id
+            WHERE t.action = 'BUY' AND {_at_trade('s')}
+        """).fetchone()
+        if not row['n']:
+            return {}
+        return {k: (row[k] if row[k] is not None else 0) for k in row.keys() if k != 'n'}
+
+    def sell_criteria(self):
+        """SQL version of pattern_analysis.analyze_sell_criteria"""
+        has_snapshot = self.conn.execute(
+            "SELECT 1 FROM token_snapshots s JOIN trades t ON t.id = s.trade_id "
+            f"WHERE t.action = 'SELL' AND {_at_trade('s')} LIMIT 1"
+        ).fetchone()
+        if not has_snapshot:
+            return {}
+        # Like the analyzer, each sell is compared with the first buy of its mint that precedes it
+        row = self.conn.execute(f"""
+            WITH first_buy AS (
+                SELECT mint, id, ts FROM (
+                    SELECT mint, id, ts, ROW_NUMBER() OVER (PARTITION BY mint ORDER BY ts, id) AS rn
+                    FROM trades WHERE action = 'BUY' AND ts IS NOT NULL
+                ) WHERE rn = 1
+            ),
+            sells AS (
+                SELECT t.ts AS sell_ts, t.pnl_pct, fb.ts AS buy_ts,
+                       COALESCE(ss.market_cap, 0) AS sell_mc, COALESCE(bs.market_cap, 0) AS buy_mc,
+                       COALESCE(ss.price_change_1m, 0) AS p1m, COALESCE(ss.price_change_5m, 0) AS p5m
+                FROM trades t
+                LEFT JOIN token_snapshots ss ON ss.trade_id = t.id AND {_at_trade('ss')}
+                LEFT JOIN first_buy fb ON fb.mint = t.mint AND fb.ts < t.ts
+                LEFT JOIN token_snapshots bs ON bs.trade_id = fb.id AND {_at_trade('bs')}
+                WHERE t.action = 'SELL'
+            )
+            SELECT AVG(sell_ts - buy_ts) / 60 AS hold_time_avg,
+                   MIN(sell_ts - buy_ts) / 60 AS hold_time_min,
+                   MAX(sell_ts - buy_ts) / 60 AS hold_time_max,
+                   AVG(CASE WHEN buy_ts IS NOT NULL AND buy_mc > 0 AND sell_mc > 0
+                            THEN (sell_mc / buy_mc - 1) * 100 END) AS mc_change_avg,
+                   AVG(p1m) AS price_1m_at_sell,
+                   AVG(p5m) AS price_5m_at_sell,
+                   SUM(pnl_pct > 0) AS profitable_count,
+                   SUM(pnl_pct <= 0) AS losing_count
+            FROM sells
+        """).fetchone()
+        return {k: (row[k] if row[k] is not None else 0) for k in row.keys()}
+
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        print("Usage: python history_store.py import <trade_history.json> <trade_history.db>")
+        sys.exit(1)
+    store = HistoryStore(sys.argv[3])
+    added = store.import_json(sys.argv[2])
+    print(f"✅ Imported {added} trades into {sys.argv[3]}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+📡 LIVE FOLLOW MODE
+====================
+Tails the tracker's output and keeps the analysis up to date incrementally:
+only newly appended trades are consumed, the per-token grouping, FIFO
+matching and buy/sell criteria accumulators are updated in place, and the
+markdown/HTML reports are re-rendered on a debounce. The timeline, cube,
+confidence and classifier sections are only rebuilt when a round-trip
+completed since the last render.
+
+    python pattern_analysis.py --follow                     # trade_history.json
+    python pattern_analysis.py trade_history.db --follow    # SQLite store (reads only new rows)
+    python pattern_analysis.py history_segments --follow    # segment directory (reads only new lines)
+
+--since/--until, --cube, --confidence and --classifier apply as in a batch run.
+"""
+
+import json
+import os
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from history_format import unpack_history
+from history_segments import SegmentStore
+from history_store import HistoryStore
+from pattern_analysis import (REPORT_SECTIONS, build_completed_trade, build_report_model, generate_html_report,
+                              generate_markdown_report)
+from trade_schema import normalize_history, to_epoch
+
+
+class RunningStat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def avg(self):
+        return self.total / self.count if self.count else 0
+
+
+class IncrementalAnalyzer:
+    """Same results as the batch analyzer, updated one trade at a time (trades must arrive in time order)"""
+
+    def __init__(self, start=None, end=None, cube_views=None, confidence=False, classifier=False):
+        # Only trades with start <= timestamp <= end count, like load_data's window
+        self.start = to_epoch(start)
+        self.end = to_epoch(end)
+        self.cube_views = cube_views
+        self.confidence = confidence
+        self.classifier = classifier
+        self.sections = None  # REPORT_SECTIONS of the last render, and what they were built from
+        self.sections_key = None
+        
+        self.history = []
+        self.buys = []
+        self.sells = []
+        self.tokens = {}  # mint -> {'name', 'symbol'} (latest seen, like group_trades_by_token)
+        self.open_buys = defaultdict(deque)  # mint -> unmatched buys, oldest first
+        self.first_buy = {}  # mint -> (time, market cap) of the first buy
+        self.completed = []
+
+        # Buy criteria accumulators
+        self.buy_n = 0
+        self.buy_stats = defaultdict(RunningStat)
+        self.no_freeze = 0
+        self.no_mint = 0
+
+        # Sell criteria accumulators
+        self.sells_with_analysis = 0
+        self.hold_times = RunningStat()
+        self.mc_changes = RunningStat()
+        self.sell_price_1m = RunningStat()
+        self.sell_price_5m = RunningStat()
+        self.profitable = 0
+        self.losing = 0
+
+    def add_trades(self, trades):
+        """Raw trade dicts (normalized here, one schema detection per batch)"""
+        records, _ = normalize_history(trades)
+        for t in records:
+            self.add_trade(t)
+
+    def add_trade(self, t):
+        """One TradeRecord"""
+        if (self.start is not None or self.end is not None) and (
+                t.ts is None or (self.start is not None and t.ts < self.start) or (self.end is not None and t.ts > self.end)):
+            return
+        self.history.append(t)
+        mint = t.token
+        if mint:
+            self.tokens[mint] = {'name': t.token_name, 'symbol': t.token_symbol}
+        if t.action == 'BUY':
+            self.buys.append(t)
+            self._add_buy(t, mint)
+        elif t.action == 'SELL':
+            self.sells.append(t)
+            self._add_sell(t, mint)
+
+    def _add_buy(self, buy, mint):
+        snapshot = buy.snapshot
+        if snapshot.present:
+            self.buy_n += 1
+            for key, field in (('age', 'age_seconds'), ('mc', 'market_cap'), ('liq', 'liquidity'),
+                               ('holders', 'holders'), ('ratio', 'buy_sell_ratio'), ('top10', 'top10_holders_pct')):
+                value = getattr(snapshot, field)
+                if value and value > 0:
+                    self.buy_stats[key].add(value)
+            for key, field in (('lp_burn', 'lp_burned'), ('price_1m', 'price_change_1m'),
+                               ('price_5m', 'price_change_5m'), ('price_1h', 'price_change_1h'),
+                               ('sniper', 'sniper_count')):
+                self.buy_stats[key].add(getattr(snapshot, field))
+            self.no_freeze += snapshot.freeze_authority is None
+            self.no_mint += snapshot.mint_authority is None
+
+        if not mint or buy.ts is None:
+            return
+        self.open_buys[mint].append(buy)
+        if mint not in self.first_buy:
+            self.first_buy[mint] = (buy.ts, snapshot.market_cap)
+
+    def _add_sell(self, sell, mint):
+        snapshot = sell.snapshot
+        if snapshot.present:
+            self.sells_with_analysis += 1
+        if sell.pnl_pct > 0:
+            self.profitable += 1
+        else:
+            self.losing += 1
+        self.sell_price_1m.add(snapshot.price_change_1m)
+        self.sell_price_5m.add(snapshot.price_change_5m)
+
+        sell_ts = sell.ts
+        if sell_ts is None:
+            return
+
+        # Exit criteria compare against the first buy of the token (as analyze_sell_criteria does)
+        first = self.first_buy.get(mint)
+        if first and first[0] < sell_ts:
+            self.hold_times.add(round(sell_ts - first[0], 6))
+            sell_mc = snapshot.market_cap
+            if first[1] > 0 and sell_mc > 0:
+                self.mc_changes.add((sell_mc / first[1] - 1) * 100)
+
+        # FIFO round-trip matching
+        queue = self.open_buys.get(mint)
+        if queue and queue[0].ts < sell_ts:
+            buy = queue.popleft()
+            trade = build_completed_trade(buy, sell)
+            trade['ca'] = mint
+            self.completed.append(trade)
+
+    def buy_criteria(self):
+        if not self.buy_n:
+            return {}
+        s = self.buy_stats
+        criteria = {}
+        for key in ('age', 'mc', 'liq', 'holders'):
+            criteria[f'{key}_min'] = s[key].min or 0
+            criteria[f'{key}_max'] = s[key].max or 0
+            criteria[f'{key}_avg'] = s[key].avg()
+        for key in ('ratio', 'lp_burn', 'price_1m', 'price_5m', 'price_1h', 'top10', 'sniper'):
+            criteria[f'{key}_avg'] = s[key].avg()
+        criteria['no_freeze_pct'] = self.no_freeze / self.buy_n * 100
+        criteria['no_mint_pct'] = self.no_mint / self.buy_n * 100
+        return criteria
+
+    def sell_criteria(self):
+        if not self.sells_with_analysis:
+            return {}
+        return {
+            'hold_time_avg': self.hold_times.avg() / 60,
+            'hold_time_min': (self.hold_times.min or 0) / 60,
+            'hold_time_max': (self.hold_times.max or 0) / 60,
+            'mc_change_avg': self.mc_changes.avg(),
+            'price_1m_at_sell': self.sell_price_1m.avg(),
+            'price_5m_at_sell': self.sell_price_5m.avg(),
+            'profitable_count': self.profitable,
+            'losing_count': self.losing,
+        }
+
+    def open_count(self):
+        return sum(len(q) for q in self.open_buys.values())
+
+    def completed_trades(self):
+        # Names/symbols follow the latest trade of each token, like group_trades_by_token
+        for trade in self.completed:
+            token = self.tokens[trade['ca']]
+            trade['symbol'] = token['symbol']
+            trade['name'] = token['name']
+        return self.completed
+
+    def render(self):
+        # Timeline/cube/classifier follow the round-trips; the confidence buy intervals also follow the buys
+        key = (len(self.completed), len(self.buys) if self.confidence else None)
+        model = build_report_model(self.completed_trades(), self.open_count(), self.history,
+                                   self.buys, self.sells, self.buy_criteria(), self.sell_criteria(),
+                                   self.cube_views, self.confidence, self.classifier,
+                                   sections=self.sections if key == self.sections_key else None)
+        self.sections = {name: model[name] for name in REPORT_SECTIONS}
+        self.sections_key = key
+        generate_markdown_report(model)
+        generate_html_report(model)
+        return model
+
+
+class JsonTail:
+    """
+    New trades from a history JSON file the tracker keeps rewriting. The file is one document, so every change
+    is parsed in full, but only the trades past the last poll are unpacked and normalized; the SQLite store and
+    segment directories are read incrementally instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.count = 0
+        self.last_tx = None
+
+    def poll(self):
+        """Returns (new_trades, reset). reset=True means the file was replaced and everything is new."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self.stamp:
+            return [], False
+        try:
+            with open(self.path, "r") as f:
+                doc = json.load(f)
+        except ValueError:
+            return [], False  # caught the file mid-write, try again next poll
+        self.stamp = stamp
+
+        # Packed trades keep their own tx, so the already-seen prefix is checked before unpacking anything
+        trades = doc if isinstance(doc, list) else doc.get('trades', [])
+        reset = self.count and (len(trades) < self.count or trades[self.count - 1].get('tx') != self.last_tx)
+        new = trades if reset else trades[self.count:]
+        self.count = len(trades)
+        self.last_tx = trades[-1].get('tx') if trades else None
+        return unpack_history(new if isinstance(doc, list) else dict(doc, trades=new)), bool(reset)
+
+
+class SQLiteTail:
+    """New trades from the tracker's SQLite store (only new rows are read)"""
+
+    def __init__(self, path):
+        self.store = HistoryStore(path)
+        self.last_id = 0
+
+    def poll(self):
+        trades, self.last_id = self.store.trades_since(self.last_id)
+        return trades, False
+
+
+def _trade_key(t):
+    return t.get('tx') or (t.get('timestamp'), t.get('token'), t.get('action'))
+
+
+class SegmentTail:
+    """
+    New trades from a segment directory (history_segments.py). Open segments are read from where the last poll
+    stopped; sealed and compacted files are read once, skipping trades already returned under their old file.
+    Segments outside the start/end window are never opened.
+    """
+
+    def __init__(self, path, start=None, end=None):
+        self.store = SegmentStore(path)
+        self.start = to_epoch(start)
+        self.end = to_epoch(end)
+        self.offsets = {}  # open segment file -> bytes consumed
+        self.done = set()  # sealed files already read
+        self.seen = set()  # trades already returned (sealing and compaction rewrite them under new names)
+
+    def poll(self):
+        segments = self.store.refresh()
+        listed = {s["file"] for s in segments}
+        self.offsets = {name: offset for name, offset in self.offsets.items() if name in listed}
+        new = []
+        for s in segments:
+            name = s["file"]
+            if (name in self.done or (self.end is not None and s["start"] > self.end)
+                    or (self.start is not None and s["end"] <= self.start)):
+                continue
+            try:
+                trades, offset = self.store.read_segment(name, self.offsets.get(name, 0))
+            except FileNotFoundError:
+                continue  # sealed or compacted since the manifest was read: picked up under its new name
+            if s["sealed"]:
+                self.done.add(name)
+            else:
+                self.offsets[name] = offset
+            for t in trades:
+                key = _trade_key(t)
+                if key not in self.seen:
+                    self.seen.add(key)
+                    new.append(t)
+        new.sort(key=lambda t: to_epoch(t.get('timestamp')) or 0)
+        return new, False
+
+
+def follow(path="trade_history.json", poll_interval=1.0, debounce=2.0, max_wait=10.0, start=None, end=None,
+           **report_options):
+    """Keep the reports in sync with the tracker until interrupted (report_options: cube_views, confidence, classifier)"""
+    if path.endswith(('.db', '.sqlite')):
+        source = SQLiteTail(path)
+    elif os.path.isdir(path):
+        source = SegmentTail(path, start, end)
+    else:
+        source = JsonTail(path)
+    analyzer = IncrementalAnalyzer(start, end, **report_options)
+    first_pending = last_change = None
+
+    print(f"📡 Following {path} (poll {poll_interval}s, debounce {debounce}s) - Ctrl+C to stop")
+    try:
+        while True:
+            new, reset = source.poll()
+            if reset:
+                print("🔄 History file was replaced, rebuilding")
+                analyzer = IncrementalAnalyzer(start, end, **report_options)
+            if new:
+                analyzer.add_trades(new)
+                now = time.monotonic()
+                first_pending = first_pending or now
+                last_change = now
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] +{len(new)} trades "
+                      f"({len(analyzer.history)} total, {len(analyzer.completed)} completed)")
+
+            # Render once trades stop arriving for `debounce` s, but never later than `max_wait` s
+            now = time.monotonic()
+            if first_pending and (now - last_change >= debounce or now - first_pending >= max_wait):
+                analyzer.render()
+                first_pending = last_change = None
+
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        if first_pending:
+            analyzer.render()
+        print("\n⏹️  Stopped following")
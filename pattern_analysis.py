@@ -6,25 +6,106 @@ Analyzes trading patterns from trade_history.json
 
 The P/L percentages are accurate though!
 """
+import argparse
+import calendar
+import csv
 import json
+import os
+from bisect import bisect_right
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timezone
+
+from confidence import CONFIDENCE, bootstraps, default_resamples, np, permutation_tests
+from history_format import unpack_history
+from history_segments import SegmentStore
+from history_store import HistoryStore
+from phase_profiler import PhaseProfiler
+from rolling_metrics import compute_timeline
+from trade_schema import describe, ensure_records, normalize_history, to_datetime
+from win_classifier import train_win_classifier
 
 # His actual trade size (estimated from Solscan - he trades ~1-2 SOL)
 HIS_SOL_PER_TRADE = 1.5
 YOUR_SOL_PER_TRADE = 0.1
 MULTIPLIER = HIS_SOL_PER_TRADE / YOUR_SOL_PER_TRADE
 
+# (criteria key, analysis field, average only over positive values)
+BUY_METRICS = [
+    ('age', 'age_seconds', True),
+    ('mc', 'market_cap', True),
+    ('liq', 'liquidity', True),
+    ('holders', 'holders', True),
+    ('ratio', 'buy_sell_ratio', True),
+    ('lp_burn', 'lp_burned', False),
+    ('price_1m', 'price_change_1m', False),
+    ('price_5m', 'price_change_5m', False),
+    ('price_1h', 'price_change_1h', False),
+    ('top10', 'top10_holders_pct', True),
+    ('sniper', 'sniper_count', False),
+]
+
+# How each buy metric is labelled and formatted in the confidence tables
+METRIC_FORMATS = {
+    'age': ("Token age", lambda v: f"{v / 60:.0f} min"),
+    'mc': ("Market cap", lambda v: f"${v:,.0f}"),
+    'liq': ("Liquidity", lambda v: f"${v:,.0f}"),
+    'holders': ("Holders", lambda v: f"{v:.0f}"),
+    'ratio': ("Buy/sell ratio", lambda v: f"{v:.2f}"),
+    'lp_burn': ("LP burn", lambda v: f"{v:.1f}%"),
+    'price_1m': ("Price 1m", lambda v: f"{v:+.1f}%"),
+    'price_5m': ("Price 5m", lambda v: f"{v:+.1f}%"),
+    'price_1h': ("Price 1h", lambda v: f"{v:+.1f}%"),
+    'top10': ("Top 10 holders", lambda v: f"{v:.1f}%"),
+    'sniper': ("Snipers", lambda v: f"{v:.1f}"),
+}
+# Entry metrics compared between winning and losing round-trips (metric key, completed-trade field)
+ENTRY_TESTS = [
+    ('age', 'buy_age'), ('mc', 'buy_mc'), ('liq', 'buy_liq'), ('holders', 'buy_holders'),
+    ('ratio', 'buy_ratio'), ('price_1m', 'buy_price_1m'), ('price_5m', 'buy_price_5m'), ('price_1h', 'buy_price_1h'),
+]
+SIGNIFICANCE = 0.05
+
+# Cube dimensions: name -> (label, round-trip field, bucket edges (None = categorical), bucket labels, only positive values)
+CUBE_DIMENSIONS = {
+    'market': ("Market", 'buy_market', None, None, False),
+    'age': ("Token age", 'buy_age', [3600, 6 * 3600, 86400, 7 * 86400], ["< 1h", "1–6h", "6–24h", "1–7d", "> 7d"], True),
+    'mc': ("Market cap", 'buy_mc', [25e3, 50e3, 100e3, 250e3, 1e6],
+           ["< $25k", "$25–50k", "$50–100k", "$100–250k", "$250k–1M", "> $1M"], True),
+    'liq': ("Liquidity", 'buy_liq', [10e3, 25e3, 50e3], ["< $10k", "$10–25k", "$25–50k", "> $50k"], True),
+    'holders': ("Holders", 'buy_holders', [100, 250, 500, 1000], ["< 100", "100–250", "250–500", "500–1k", "> 1k"], True),
+    'hour': ("Hour of day", 'buy_hour', list(range(1, 24)), [f"{h:02d}h" for h in range(24)], False),
+    'lp_burn': ("LP burn", 'buy_lp_burn', [50, 100], ["< 50%", "50–99%", "100%"], False),
+    'snipers': ("Snipers", 'buy_snipers', [1, 6, 16, 31], ["0", "1–5", "6–15", "16–30", "> 30"], False),
+    'risk': ("Risk score", 'buy_risk', None, None, False),
+}
+# Pivot tables in the HTML report (one or two dimensions each; more render as a flat table)
+CUBE_VIEWS = [('market',), ('age', 'mc'), ('hour',), ('lp_burn',), ('snipers',), ('liq', 'holders')]
+CUBE_NA = "n/a"
+
 def safe_get(data, key, default=0):
     val = data.get(key, default) if data else default
     return val if val is not None else default
 
-def load_data():
+def load_data(path="trade_history.json", start=None, end=None):
+    """Trades from a history JSON file or a segment directory, optionally only start <= timestamp <= end"""
     try:
-        with open("trade_history.json", "r") as f:
-            return json.load(f)
+        if os.path.isdir(path):
+            # Segments outside the window are never opened
+            return SegmentStore(path).load(start, end)
+        with open(path, "r") as f:
+            history = unpack_history(json.load(f))
+        if start is None and end is None:
+            return history
+        lo = _parse_time(start) if start is not None else None
+        hi = _parse_time(end) if end is not None else None
+        windowed = []
+        for t in history:
+            dt = _parse_time(t.get('timestamp'))
+            if dt and (lo is None or dt >= lo) and (hi is None or dt <= hi):
+                windowed.append(t)
+        return windowed
     except FileNotFoundError:
-        print("❌ trade_history.json not found!")
+        print(f"❌ {path} not found!")
         return None
     except Exception as e:
         print(f"❌ Error loading file: {e}")
@@ -32,60 +113,43 @@ def load_data():
 
 def group_trades_by_token(history):
     tokens = defaultdict(lambda: {'buys': [], 'sells': [], 'ca': None, 'name': None, 'symbol': None})
-    for t in history:
-        token_ca = t.get('token')
-        symbol = t.get('token_symbol', 'Unknown')
-        name = t.get('token_name', 'Unknown')
+    for t in ensure_records(history):
+        token_ca = t.token
         if not token_ca:
             continue
         tokens[token_ca]['ca'] = token_ca
-        tokens[token_ca]['name'] = name
-        tokens[token_ca]['symbol'] = symbol
-        if t.get('action') == 'BUY':
+        tokens[token_ca]['name'] = t.token_name
+        tokens[token_ca]['symbol'] = t.token_symbol
+        if t.action == 'BUY':
             tokens[token_ca]['buys'].append(t)
         else:
             tokens[token_ca]['sells'].append(t)
     return tokens
 
+def buy_metric_samples(buys_with_analysis):
+    """Per-metric entry values behind each buy-criteria average (zeros/missing dropped where the average drops them)"""
+    def values(field, positive_only):
+        vals = [getattr(b.snapshot, field) for b in buys_with_analysis]
+        return [v for v in vals if v and v > 0] if positive_only else vals
+    
+    return {key: values(field, positive_only) for key, field, positive_only in BUY_METRICS}
+
 def analyze_buy_criteria(buys):
     """Analyze WHY he buys - what are his entry criteria"""
     if not buys:
         return {}
     
-    buys_with_analysis = [b for b in buys if b.get('analysis')]
+    buys_with_analysis = [b for b in ensure_records(buys) if b.snapshot.present]
     if not buys_with_analysis:
         return {}
     
-    # Extract all metrics
-    ages = [safe_get(b['analysis'], 'age_seconds') for b in buys_with_analysis]
-    ages = [a for a in ages if a > 0]
-    
-    mcs = [safe_get(b['analysis'], 'market_cap') for b in buys_with_analysis]
-    mcs = [m for m in mcs if m and m > 0]
-    
-    liqs = [safe_get(b['analysis'], 'liquidity') for b in buys_with_analysis]
-    liqs = [l for l in liqs if l and l > 0]
-    
-    holders = [safe_get(b['analysis'], 'holders') for b in buys_with_analysis]
-    holders = [h for h in holders if h and h > 0]
+    samples = buy_metric_samples(buys_with_analysis)
+    ages, mcs, liqs, holders = samples['age'], samples['mc'], samples['liq'], samples['holders']
+    ratios, lp_burns, top10, snipers = samples['ratio'], samples['lp_burn'], samples['top10'], samples['sniper']
+    price_1m, price_5m, price_1h = samples['price_1m'], samples['price_5m'], samples['price_1h']
     
-    ratios = [safe_get(b['analysis'], 'buy_sell_ratio') for b in buys_with_analysis]
-    ratios = [r for r in ratios if r and r > 0]
-    
-    lp_burns = [safe_get(b['analysis'], 'lp_burned') for b in buys_with_analysis]
-    lp_burns = [l for l in lp_burns if l is not None]
-    
-    price_1m = [safe_get(b['analysis'], 'price_change_1m') for b in buys_with_analysis]
-    price_5m = [safe_get(b['analysis'], 'price_change_5m') for b in buys_with_analysis]
-    price_1h = [safe_get(b['analysis'], 'price_change_1h') for b in buys_with_analysis]
-    
-    top10 = [safe_get(b['analysis'], 'top10_holders_pct') for b in buys_with_analysis]
-    top10 = [t for t in top10 if t and t > 0]
-    
-    snipers = [safe_get(b['analysis'], 'sniper_count') for b in buys_with_analysis]
-    
-    no_freeze = sum(1 for b in buys_with_analysis if b['analysis'].get('freeze_authority') is None)
-    no_mint = sum(1 for b in buys_with_analysis if b['analysis'].get('mint_authority') is None)
+    no_freeze = sum(1 for b in buys_with_analysis if b.snapshot.freeze_authority is None)
+    no_mint = sum(1 for b in buys_with_analysis if b.snapshot.mint_authority is None)
     
     return {
         'age_min': min(ages) if ages else 0,
@@ -116,8 +180,8 @@ def analyze_sell_criteria(sells, buys):
     if not sells:
         return {}
     
-    sells_with_analysis = [s for s in sells if s.get('analysis')]
-    if not sells_with_analysis:
+    sells = ensure_records(sells)
+    if not any(s.snapshot.present for s in sells):
         return {}
     
     # Calculate hold times and MC changes
@@ -126,32 +190,30 @@ def analyze_sell_criteria(sells, buys):
     price_at_sell_1m = []
     price_at_sell_5m = []
     
+    buys_by_token = defaultdict(list)
+    for b in ensure_records(buys):
+        if b.ts is not None:
+            buys_by_token[b.token].append(b)
+    
     for sell in sells:
-        sell_time_str = sell.get('timestamp')
-        token = sell.get('token')
-        sell_mc = safe_get(sell.get('analysis'), 'market_cap', 0)
+        sell_mc = sell.snapshot.market_cap
         
-        # Find matching buy
-        for b in buys:
-            if b.get('token') == token:
-                try:
-                    buy_time = datetime.fromisoformat(str(b.get('timestamp')))
-                    sell_time = datetime.fromisoformat(str(sell_time_str))
-                    if buy_time < sell_time:
-                        hold_times.append((sell_time - buy_time).total_seconds())
-                        buy_mc = safe_get(b.get('analysis'), 'market_cap', 0)
-                        if buy_mc > 0 and sell_mc > 0:
-                            mc_changes.append((sell_mc / buy_mc - 1) * 100)
-                        break
-                except:
-                    pass
+        # Find matching buy (first one of the token before the sell)
+        if sell.ts is not None:
+            for b in buys_by_token.get(sell.token, ()):
+                if b.ts < sell.ts:
+                    hold_times.append(round(sell.ts - b.ts, 6))  # timestamps are whole microseconds
+                    buy_mc = b.snapshot.market_cap
+                    if buy_mc > 0 and sell_mc > 0:
+                        mc_changes.append((sell_mc / buy_mc - 1) * 100)
+                    break
         
-        price_at_sell_1m.append(safe_get(sell.get('analysis'), 'price_change_1m', 0))
-        price_at_sell_5m.append(safe_get(sell.get('analysis'), 'price_change_5m', 0))
+        price_at_sell_1m.append(sell.snapshot.price_change_1m)
+        price_at_sell_5m.append(sell.snapshot.price_change_5m)
     
     # Analyze profitable vs losing sells
-    profitable_sells = [s for s in sells if (s.get('pnl_pct') or s.get('your_pnl_pct') or 0) > 0]
-    losing_sells = [s for s in sells if (s.get('pnl_pct') or s.get('your_pnl_pct') or 0) <= 0]
+    profitable_sells = [s for s in sells if s.pnl_pct > 0]
+    losing_sells = [s for s in sells if s.pnl_pct <= 0]
     
     return {
         'hold_time_avg': sum(hold_times)/len(hold_times)/60 if hold_times else 0,
@@ -164,122 +226,329 @@ def analyze_sell_criteria(sells, buys):
         'losing_count': len(losing_sells),
     }
 
+def build_completed_trade(buy, sell):
+    """One round-trip row from a matched BUY and SELL (cube fields are None when the buy has no snapshot)"""
+    b = buy.snapshot
+    s = sell.snapshot
+    na = not b.present
+    return {
+        'buy_time': to_datetime(buy.ts),
+        'sell_time': to_datetime(sell.ts),
+        'buy_mc': b.market_cap,
+        'sell_mc': s.market_cap,
+        'buy_holders': b.holders,
+        'sell_holders': s.holders,
+        'buy_liq': b.liquidity,
+        'sell_liq': s.liquidity,
+        'buy_age': b.age_seconds,
+        'buy_price_1m': b.price_change_1m,
+        'buy_price_5m': b.price_change_5m,
+        'buy_price_1h': b.price_change_1h,
+        'sell_price_1m': s.price_change_1m,
+        'sell_price_5m': s.price_change_5m,
+        'buy_ratio': b.buy_sell_ratio,
+        'buy_price_15m': b.price_change_15m,
+        'buy_top10': b.top10_holders_pct,
+        'buy_snipers': None if na else b.sniper_count,
+        'buy_sniper_pct': b.sniper_balance_pct,
+        'buy_insiders': b.insider_count,
+        'buy_insider_pct': b.insider_balance_pct,
+        'buy_dev_pct': b.dev_holdings_pct,
+        'buy_risk': None if na else b.risk_score,
+        'buy_lp_burn': None if na else b.lp_burned,
+        'buy_market': b.market,
+        'pnl_pct': sell.pnl_pct,
+        'pnl_usd': sell.pnl_usd,
+        'mfe_pct': sell.mfe_pct,
+        'mae_pct': sell.mae_pct,
+    }
+
 def analyze_token_trades(token_data):
-    buys = sorted(token_data['buys'], key=lambda x: x.get('timestamp', ''))
-    sells = sorted(token_data['sells'], key=lambda x: x.get('timestamp', ''))
+    # Trades without a parseable timestamp can't be matched (they still count as open buys)
+    buys = sorted((b for b in token_data['buys'] if b.ts is not None), key=lambda x: x.ts)
+    sells = sorted((s for s in token_data['sells'] if s.ts is not None), key=lambda x: x.ts)
     
     completed_trades = []
-    matched_buy_indices = set()
+    matched = 0
     
+    # FIFO: each sell takes the oldest unmatched buy before it; with both sides in time order that's a pointer
     for sell in sells:
-        sell_time_str = sell.get('timestamp')
-        pnl_pct = sell.get('pnl_pct') or sell.get('your_pnl_pct') or 0
-        pnl_usd = sell.get('pnl_usd') or sell.get('your_pnl_usd') or 0
-        sell_analysis = sell.get('analysis', {})
-        
-        try:
-            sell_time = datetime.fromisoformat(str(sell_time_str))
-        except:
-            continue
-        
-        # Find matching buy (FIFO)
-        best_buy = None
-        best_buy_idx = None
-        best_buy_time = None
-        
-        for idx, b in enumerate(buys):
-            if idx in matched_buy_indices:
-                continue
-            try:
-                buy_time = datetime.fromisoformat(str(b.get('timestamp')))
-                if buy_time >= sell_time:
-                    continue
-                if best_buy_time is None or buy_time < best_buy_time:
-                    best_buy = b
-                    best_buy_idx = idx
-                    best_buy_time = buy_time
-            except:
-                continue
-        
-        if best_buy is not None:
-            matched_buy_indices.add(best_buy_idx)
-            buy_analysis = best_buy.get('analysis', {})
-            
-            completed_trades.append({
-                'buy_time': best_buy.get('timestamp'),
-                'sell_time': sell_time_str,
-                'buy_mc': safe_get(buy_analysis, 'market_cap', 0),
-                'sell_mc': safe_get(sell_analysis, 'market_cap', 0),
-                'buy_holders': safe_get(buy_analysis, 'holders', 0),
-                'sell_holders': safe_get(sell_analysis, 'holders', 0),
-                'buy_liq': safe_get(buy_analysis, 'liquidity', 0),
-                'sell_liq': safe_get(sell_analysis, 'liquidity', 0),
-                'buy_age': safe_get(buy_analysis, 'age_seconds', 0),
-                'buy_price_1m': safe_get(buy_analysis, 'price_change_1m', 0),
-                'buy_price_5m': safe_get(buy_analysis, 'price_change_5m', 0),
-                'buy_price_1h': safe_get(buy_analysis, 'price_change_1h', 0),
-                'sell_price_1m': safe_get(sell_analysis, 'price_change_1m', 0),
-                'sell_price_5m': safe_get(sell_analysis, 'price_change_5m', 0),
-                'buy_ratio': safe_get(buy_analysis, 'buy_sell_ratio', 0),
-                'pnl_pct': pnl_pct,
-                'pnl_usd': pnl_usd,
-            })
+        if matched < len(buys) and buys[matched].ts < sell.ts:
+            completed_trades.append(build_completed_trade(buys[matched], sell))
+            matched += 1
     
     return {
         'completed': completed_trades,
-        'open_count': len(buys) - len(matched_buy_indices),
+        'open_count': len(token_data['buys']) - matched,
     }
 
-def analyze_patterns():
-    history = load_data()
+def analyze_patterns(path="trade_history.json", profiler=None, cube_views=None, start=None, end=None, confidence=False,
+                     classifier=False):
+    profiler = profiler or PhaseProfiler(enabled=False)
+    profiler.start()
+    
+    # SQLite stores (written by the tracker) get grouping, matching and criteria pushed down to SQL
+    store = HistoryStore(path) if path.endswith(('.db', '.sqlite')) else None
+    
+    with profiler.phase("load"):
+        history = store.load_history(start, end) if store else load_data(path, start, end)
+    if store and (start is not None or end is not None):
+        # The SQL aggregates cover the whole store: a window is matched in Python like a JSON history
+        store.close()
+        store = None
     if not history:
+        profiler.stop()
         return
+    with profiler.phase("normalize"):
+        history, schema_report = normalize_history(history)
+    print(describe(schema_report))
     
-    buys = [t for t in history if t.get('action') == 'BUY']
-    sells = [t for t in history if t.get('action') == 'SELL']
+    buys = [t for t in history if t.action == 'BUY']
+    sells = [t for t in history if t.action == 'SELL']
+    profiler.meta.update({'trades': len(history), 'buys': len(buys), 'sells': len(sells)})
     
     print("\n" + "=" * 100)
     print("🔍 ULTIMATE BOT PATTERN ANALYSIS")
     print("=" * 100)
     
-    # Group by token and analyze
-    tokens = group_trades_by_token(history)
-    all_completed = []
-    total_open = 0
+    if store:
+        with profiler.phase("match"):
+            all_completed = store.completed_trades()
+            total_open = store.open_count()
+        with profiler.phase("buy_criteria"):
+            buy_criteria = store.buy_criteria()
+        with profiler.phase("sell_criteria"):
+            sell_criteria = store.sell_criteria()
+        store.close()
+    else:
+        # Group by token and analyze
+        with profiler.phase("group"):
+            tokens = group_trades_by_token(history)
+        
+        all_completed = []
+        total_open = 0
+        with profiler.phase("match"):
+            for ca, token_data in tokens.items():
+                analysis = analyze_token_trades(token_data)
+                for trade in analysis['completed']:
+                    trade['symbol'] = token_data['symbol']
+                    trade['name'] = token_data['name']
+                    trade['ca'] = ca
+                    all_completed.append(trade)
+                total_open += analysis['open_count']
+        
+        # Analyze criteria
+        with profiler.phase("buy_criteria"):
+            buy_criteria = analyze_buy_criteria(buys)
+        with profiler.phase("sell_criteria"):
+            sell_criteria = analyze_sell_criteria(sells, buys)
     
-    for ca, token_data in tokens.items():
-        analysis = analyze_token_trades(token_data)
-        for trade in analysis['completed']:
-            trade['symbol'] = token_data['symbol']
-            trade['name'] = token_data['name']
-            trade['ca'] = ca
-            all_completed.append(trade)
-        total_open += analysis['open_count']
+    # Build the report model once, then hand it to every renderer
+    with profiler.phase("model"):
+        model = build_report_model(all_completed, total_open, history, buys, sells, buy_criteria, sell_criteria,
+                                   cube_views, confidence, classifier)
+    with profiler.phase("markdown"):
+        generate_markdown_report(model)
+    with profiler.phase("html"):
+        generate_html_report(model)
+    with profiler.phase("csv"):
+        generate_csv_report(model)
+    with profiler.phase("json"):
+        generate_json_report(model)
     
-    # Analyze criteria
-    buy_criteria = analyze_buy_criteria(buys)
-    sell_criteria = analyze_sell_criteria(sells, buys)
+    profiler.stop()
+    print(f"📄 Reports saved!")
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except:
+        return None
+
+def build_confidence(rows, buys):
+    """Bootstrap intervals for the headline numbers and buy-criteria means, permutation tests winners vs losers"""
+    summary = bootstraps({
+        'win_rate': [100.0 if r['is_profit'] else 0.0 for r in rows],
+        'avg_pnl_pct': [r['pnl_pct'] for r in rows],
+        'your_total_pnl': [r['pnl_usd'] for r in rows],
+    })
+    # Totals are the P/L means scaled by the trade count (and by the size multiplier for his side)
+    mean_pnl = summary['your_total_pnl']
+    for key, factor in (('your_total_pnl', 1), ('his_total_pnl', MULTIPLIER)):
+        summary[key] = {k: v * mean_pnl['n'] * factor if k != 'n' else v for k, v in mean_pnl.items()} if mean_pnl else None
     
-    # Generate reports
-    generate_markdown_report(all_completed, total_open, tokens, buys, sells, history, buy_criteria, sell_criteria)
-    generate_html_report(all_completed, total_open, tokens, buys, sells, history, buy_criteria, sell_criteria)
+    samples = buy_metric_samples([b for b in buys if b.snapshot.present])
     
-    print(f"📄 Reports saved!")
+    return {
+        'method': 'numpy' if np is not None else 'python',
+        'resamples': default_resamples(),
+        'level': CONFIDENCE * 100,
+        'summary': summary,
+        'buy_criteria': {f'{key}_avg': ci for key, ci in bootstraps(samples).items()},
+        'entry_tests': permutation_tests([r['is_profit'] for r in rows],
+                                         {key: [r[field] for r in rows] for key, field in ENTRY_TESTS}),
+    }
+
+def _dimension_codes(rows, name):
+    """Bucket code of every row for one cube dimension, and the label of each code"""
+    _, field, edges, names, positive_only = CUBE_DIMENSIONS[name]
+    values = [r.get(field) for r in rows]
+    if edges is None:
+        values = [CUBE_NA if v in (None, '') else v for v in values]
+        categories = sorted(set(values), key=lambda v: (v == CUBE_NA, isinstance(v, str), 0 if isinstance(v, str) else v, str(v)))
+        index = {v: code for code, v in enumerate(categories)}
+        return [index[v] for v in values], [str(v) for v in categories]
+    na = len(names)
+    codes = [na if v is None or (positive_only and v <= 0) else bisect_right(edges, v) for v in values]
+    return codes, names + [CUBE_NA]
+
+def build_cube(rows, dims):
+    """
+    Count / win rate / P/L / hold time of the round-trips grouped by every combination of `dims` (CUBE_DIMENSIONS keys).
+    Bucket codes are computed once per dimension, then a single hash-aggregation pass over the rows fills the cells.
+    Returns {'dims', 'titles', 'labels' (per dim, the buckets that occur), 'cells': [{'key' (labels), 'count', 'wins',
+    'win_rate', 'avg_pnl_pct', 'pnl_usd', 'his_pnl', 'avg_hold_min'}]} with cells in bucket order.
+    """
+    coded = [_dimension_codes(rows, d) for d in dims]
+    acc = {}
+    for key, r in zip(zip(*(codes for codes, _ in coded)), rows):
+        cell = acc.get(key)
+        if cell is None:
+            cell = acc[key] = [0, 0, 0.0, 0.0, 0.0, 0]
+        cell[0] += 1
+        cell[1] += r['is_profit']
+        cell[2] += r['pnl_pct']
+        cell[3] += r['pnl_usd']
+        if r['hold_min'] is not None:
+            cell[4] += r['hold_min']
+            cell[5] += 1
+    
+    cells = []
+    for key in sorted(acc):
+        count, wins, pnl_pct, pnl_usd, hold, held = acc[key]
+        cells.append({
+            'key': tuple(coded[i][1][code] for i, code in enumerate(key)),
+            'count': count,
+            'wins': wins,
+            'win_rate': wins / count * 100,
+            'avg_pnl_pct': pnl_pct / count,
+            'pnl_usd': pnl_usd,
+            'his_pnl': pnl_usd * MULTIPLIER,
+            'avg_hold_min': hold / held if held else None,
+        })
+    return {
+        'dims': list(dims),
+        'titles': [CUBE_DIMENSIONS[d][0] for d in dims],
+        'labels': [[coded[i][1][code] for code in sorted({key[i] for key in acc})] for i in range(len(dims))],
+        'cells': cells,
+    }
+
+def _ci_text(ci, fmt, level):
+    return f" ({level:.0f}% CI {fmt(ci['low'])} – {fmt(ci['high'])})" if ci else ""
+
+# Model parts that only depend on the round-trips (and buys): follow mode reuses them while no trade completes
+REPORT_SECTIONS = ('timeline', 'confidence', 'classifier', 'cube')
+
+def build_report_sections(rows, buys, cube_views=None, confidence=False, classifier=False):
+    """Timeline, confidence (on request), classifier (on request) and cube of the report model"""
+    return {
+        'timeline': compute_timeline(rows, MULTIPLIER),
+        'confidence': build_confidence(rows, buys) if confidence else None,
+        'classifier': train_win_classifier(rows) if classifier else None,
+        'cube': [build_cube(rows, view) for view in (CUBE_VIEWS if cube_views is None else cube_views)],
+    }
+
+def build_report_model(completed, open_count, history, buys, sells, buy_criteria, sell_criteria, cube_views=None,
+                       confidence=False, classifier=False, sections=None):
+    """
+    Single pass over the completed trades producing everything the renderers need (bootstrap and classifier on
+    request). `sections` are REPORT_SECTIONS from an earlier model over the same round-trips, reused as-is.
+    """
+    rows = []
+    your_total_pnl = 0
+    profitable_count = 0
+    
+    for t in sorted(completed, key=lambda x: x['pnl_pct'], reverse=True):
+        buy_dt = _parse_time(t['buy_time'])
+        sell_dt = _parse_time(t['sell_time'])
+        hold_min = (sell_dt - buy_dt).total_seconds() / 60 if buy_dt and sell_dt else None
+        mc_change = ((t['sell_mc'] / t['buy_mc'] - 1) * 100) if t['buy_mc'] > 0 and t['sell_mc'] > 0 else 0
+        is_profit = t['pnl_pct'] > 0
+        
+        your_total_pnl += t['pnl_usd']
+        if is_profit:
+            profitable_count += 1
+        
+        row = dict(t)
+        row.update({
+            'buy_dt': buy_dt,
+            'sell_dt': sell_dt,
+            'hold_min': hold_min,
+            'mc_change': mc_change,
+            'his_pnl': t['pnl_usd'] * MULTIPLIER,
+            'is_profit': is_profit,
+            'buy_hour': buy_dt.hour if buy_dt else None,
+        })
+        rows.append(row)
+    
+    time_range = None
+    if history:
+        time_range = tuple(str(to_datetime(t.ts) or 'N/A')[:19] for t in (history[0], history[-1]))
+    
+    model = {
+        'generated': datetime.now(),
+        'rows': rows,
+        'summary': {
+            'total_trades': len(history),
+            'buy_count': len(buys),
+            'sell_count': len(sells),
+            'completed_count': len(rows),
+            'open_count': open_count,
+            'profitable_count': profitable_count,
+            'losing_count': len(rows) - profitable_count,
+            'win_rate': profitable_count / len(rows) * 100 if rows else 0,
+            'your_total_pnl': your_total_pnl,
+            'his_total_pnl': your_total_pnl * MULTIPLIER,
+            'time_range': time_range,
+            # Trades whose snapshot was fetched by a backfill (not at trade time) - left out of the entry analysis
+            'backfilled_snapshots': sum(t.snapshot.backfilled for t in history),
+        },
+        'buy_criteria': buy_criteria,
+        'sell_criteria': sell_criteria,
+    }
+    model.update(sections or build_report_sections(rows, buys, cube_views, confidence, classifier))
+    return model
 
 
-def generate_markdown_report(completed, open_count, tokens, buys, sells, history, buy_criteria, sell_criteria):
+def _feature_effect(weight):
+    if abs(weight) < 0.005:
+        return "no effect"
+    return "higher → more wins" if weight > 0 else "higher → more losses"
+
+def _classifier_verdict(clf):
+    if clf['cv_accuracy'] is None or clf['cv_accuracy'] <= clf['baseline_accuracy'] + 0.02:
+        return "Entry snapshot barely beats guessing the majority outcome - treat the weights as weak hints"
+    return "Entry features carry real signal about the outcome"
+
+
+def generate_markdown_report(model):
     """Generate comprehensive markdown report"""
     
-    your_total_pnl = sum(t['pnl_usd'] for t in completed) if completed else 0
-    his_total_pnl = your_total_pnl * MULTIPLIER
-    profitable = [t for t in completed if t['pnl_pct'] > 0]
-    win_rate = len(profitable) / len(completed) * 100 if completed else 0
+    summary = model['summary']
+    buy_criteria = model['buy_criteria']
+    sell_criteria = model['sell_criteria']
+    confidence = model['confidence']
+    level = confidence['level'] if confidence else None
+    ci = confidence['summary'] if confidence else {}
     
     md = []
     
     # Header with disclaimer
     md.append("# 🔍 Bot Pattern Analysis Report\n")
-    md.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    md.append(f"**Generated:** {model['generated'].strftime('%Y-%m-%d %H:%M:%S')}\n")
     md.append("\n---\n")
     md.append("## ⚠️ Important Note\n")
     md.append("I messed up. I originally made this to test how good that bot is, so I paper-traded it with 0.1 SOL ")
@@ -290,14 +559,56 @@ def generate_markdown_report(completed, open_count, tokens, buys, sells, history
     
     # Summary
     md.append("\n---\n## 📊 Summary\n")
-    md.append(f"- **Total Trades:** {len(history)} (Buys: {len(buys)}, Sells: {len(sells)})\n")
-    md.append(f"- **Completed Trades:** {len(completed)}\n")
-    md.append(f"- **Open Positions:** {open_count}\n")
-    md.append(f"- **Win Rate:** {win_rate:.1f}%\n")
-    md.append(f"- **Your P/L (0.1 SOL/trade):** ${your_total_pnl:.2f}\n")
-    md.append(f"- **His Est. P/L (~1.5 SOL/trade):** ${his_total_pnl:.2f}\n")
-    if history:
-        md.append(f"- **Time Range:** {history[0].get('timestamp', 'N/A')[:19]} → {history[-1].get('timestamp', 'N/A')[:19]}\n")
+    md.append(f"- **Total Trades:** {summary['total_trades']} (Buys: {summary['buy_count']}, Sells: {summary['sell_count']})\n")
+    md.append(f"- **Completed Trades:** {summary['completed_count']}\n")
+    md.append(f"- **Open Positions:** {summary['open_count']}\n")
+    md.append(f"- **Win Rate:** {summary['win_rate']:.1f}%{_ci_text(ci.get('win_rate'), lambda v: f'{v:.1f}%', level)}\n")
+    md.append(f"- **Your P/L (0.1 SOL/trade):** ${summary['your_total_pnl']:.2f}{_ci_text(ci.get('your_total_pnl'), lambda v: f'${v:.2f}', level)}\n")
+    md.append(f"- **His Est. P/L (~1.5 SOL/trade):** ${summary['his_total_pnl']:.2f}{_ci_text(ci.get('his_total_pnl'), lambda v: f'${v:.2f}', level)}\n")
+    if ci.get('avg_pnl_pct'):
+        md.append(f"- **Avg P/L per Trade:** {ci['avg_pnl_pct']['estimate']:+.1f}%{_ci_text(ci['avg_pnl_pct'], lambda v: f'{v:+.1f}%', level)}\n")
+    if summary['time_range']:
+        md.append(f"- **Time Range:** {summary['time_range'][0]} → {summary['time_range'][1]}\n")
+    if summary['backfilled_snapshots']:
+        md.append(f"- **Backfilled snapshots:** {summary['backfilled_snapshots']} (taken after the trade, "
+                  f"left out of entry criteria, cube and classifier)\n")
+    
+    # CONFIDENCE (only when requested with --confidence)
+    if confidence:
+        md.append("\n---\n## 📏 How Sure Are We? - Confidence & Significance\n")
+        md.append(f"Bootstrap {level:.0f}% intervals and permutation tests ({confidence['resamples']:,} resamples). ")
+        md.append("A 🎯 Pattern verdict whose interval straddles its threshold could go either way.\n\n")
+        md.append(f"| Entry Metric (all buys) | Mean | {level:.0f}% CI | n |\n")
+        md.append("|--------|------|--------|---|\n")
+        for key, (label, fmt) in METRIC_FORMATS.items():
+            metric_ci = confidence['buy_criteria'].get(f'{key}_avg')
+            if metric_ci:
+                md.append(f"| {label} | {fmt(metric_ci['estimate'])} | {fmt(metric_ci['low'])} – {fmt(metric_ci['high'])} | {metric_ci['n']} |\n")
+    
+        md.append("\n### Winning vs Losing Entries\n")
+        md.append("| Entry Metric | Winners avg | Losers avg | Difference | p-value | |\n")
+        md.append("|--------|------|------|------|------|---|\n")
+        for key, test in confidence['entry_tests'].items():
+            if test:
+                label, fmt = METRIC_FORMATS[key]
+                verdict = "✅ significant" if test['p_value'] < SIGNIFICANCE else "≈ noise"
+                md.append(f"| {label} | {fmt(test['mean_a'])} | {fmt(test['mean_b'])} | {fmt(test['diff'])} | {test['p_value']:.3f} | {verdict} |\n")
+    
+    # WIN CLASSIFIER
+    clf = model['classifier']
+    if clf:
+        md.append("\n---\n## 🧠 What Predicts a Win? - Entry Feature Classifier\n")
+        md.append(f"Logistic regression on the entry snapshot of {clf['n']:,} round-trips. ")
+        if clf['sampled']:
+            md.append(f"⚠️ **Sampled:** a seeded random sample of {clf['n']:,} of the {clf['total']:,} round-trips "
+                      f"(install numpy to train on all of them). ")
+        md.append(f"{clf['folds']}-fold cross-validated accuracy: **{(clf['cv_accuracy'] or 0) * 100:.1f}%** ")
+        md.append(f"(always guessing the majority outcome: {clf['baseline_accuracy'] * 100:.1f}%).\n\n")
+        md.append(f"- 🎯 **Pattern:** {_classifier_verdict(clf)}\n\n")
+        md.append("| Rank | Entry Feature | Weight | Effect | Importance |\n")
+        md.append("|------|--------|--------|--------|------|\n")
+        for rank, f in enumerate(clf['features'], 1):
+            md.append(f"| {rank} | {f['label']} | {f['weight']:+.3f} | {_feature_effect(f['weight'])} | {f['importance']:.1f}% |\n")
     
     # BUY CRITERIA ANALYSIS
     md.append("\n---\n## 🟢 WHY HE BUYS - Entry Criteria Analysis\n")
@@ -405,28 +716,23 @@ def generate_markdown_report(completed, open_count, tokens, buys, sells, history
     md.append("| Symbol | CA | Buy Time | Sell Time | Hold | Buy MC | Sell MC | MC Δ | P/L % | His P/L |\n")
     md.append("|--------|-----|----------|-----------|------|--------|---------|------|-------|--------|\n")
     
-    for t in sorted(completed, key=lambda x: x['pnl_pct'], reverse=True):
+    for t in model['rows']:
         ca_short = f"`{t['ca'][:8]}...`" if t['ca'] else "N/A"
         
-        try:
-            buy_dt = datetime.fromisoformat(str(t['buy_time']))
-            sell_dt = datetime.fromisoformat(str(t['sell_time']))
-            hold_min = (sell_dt - buy_dt).total_seconds() / 60
-            buy_time_str = buy_dt.strftime("%m/%d %H:%M")
-            sell_time_str = sell_dt.strftime("%m/%d %H:%M")
-            hold_str = f"{hold_min:.0f}m"
-        except:
+        if t['hold_min'] is not None:
+            buy_time_str = t['buy_dt'].strftime("%m/%d %H:%M")
+            sell_time_str = t['sell_dt'].strftime("%m/%d %H:%M")
+            hold_str = f"{t['hold_min']:.0f}m"
+        else:
             buy_time_str = "N/A"
             sell_time_str = "N/A"
             hold_str = "N/A"
         
         buy_mc = f"${t['buy_mc']:,.0f}" if t['buy_mc'] else "N/A"
         sell_mc = f"${t['sell_mc']:,.0f}" if t['sell_mc'] else "N/A"
-        mc_change = ((t['sell_mc'] / t['buy_mc'] - 1) * 100) if t['buy_mc'] > 0 and t['sell_mc'] > 0 else 0
-        his_pnl = t['pnl_usd'] * MULTIPLIER
-        emoji = "✅" if t['pnl_pct'] > 0 else "❌"
+        emoji = "✅" if t['is_profit'] else "❌"
         
-        md.append(f"| {t['symbol']} | {ca_short} | {buy_time_str} | {sell_time_str} | {hold_str} | {buy_mc} | {sell_mc} | {mc_change:+.0f}% | {t['pnl_pct']:.1f}% | ${his_pnl:.2f} {emoji} |\n")
+        md.append(f"| {t['symbol']} | {ca_short} | {buy_time_str} | {sell_time_str} | {hold_str} | {buy_mc} | {sell_mc} | {t['mc_change']:+.0f}% | {t['pnl_pct']:.1f}% | ${t['his_pnl']:.2f} {emoji} |\n")
     
     # BOT CONFIG
     md.append("\n---\n## ⚙️ Recommended Bot Settings (Based on His Patterns)\n")
@@ -453,51 +759,325 @@ def generate_markdown_report(completed, open_count, tokens, buys, sells, history
     print(f"📄 Markdown report saved to: analysis_report.md")
 
 
-def generate_html_report(completed, open_count, tokens, buys, sells, history, buy_criteria, sell_criteria):
+# Client-side renderer for the trades table: only the rows in view are put in the DOM
+TRADE_TABLE_JS = r"""
+        (function () {
+            const payload = JSON.parse(document.getElementById('trade-data').textContent);
+            const cols = payload.data;
+            const ROW_HEIGHT = 32, OVERSCAN = 12, NUM_COLS = 13;
+            const scroller = document.getElementById('trade-scroll');
+            const body = document.getElementById('trade-body');
+            const filterInput = document.getElementById('trade-filter');
+            const outcome = document.getElementById('trade-outcome');
+            const countEl = document.getElementById('trade-count');
+            const headers = document.querySelectorAll('#trade-table th[data-col]');
+            const PNL_PCT = 11, MC_CHANGE = 7;
+            let view = [];
+            let sortCol = PNL_PCT, sortDir = -1;
+            let pending = false;
+
+            function esc(s) {
+                return String(s).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+            }
+            function pad(v) { return v < 10 ? '0' + v : '' + v; }
+            function fmtTime(ts) {
+                if (ts === null) return 'N/A';
+                const d = new Date(ts * 1000);
+                return pad(d.getUTCMonth() + 1) + '/' + pad(d.getUTCDate()) + ' ' + pad(d.getUTCHours()) + ':' + pad(d.getUTCMinutes());
+            }
+            function fmtMoney(v) {
+                return v ? '$' + Math.round(v).toLocaleString('en-US') : 'N/A';
+            }
+            function fmtSigned(v) { return (v > 0 ? '+' : '') + v.toFixed(0); }
+
+            function rowHtml(i) {
+                const ca = cols[1][i], pnlPct = cols[PNL_PCT][i], mcChange = cols[MC_CHANGE][i];
+                const pnlClass = pnlPct > 0 ? 'profit' : 'loss';
+                const mcClass = mcChange > 0 ? 'profit' : 'loss';
+                return '<tr class="' + pnlClass + '-row">' +
+                    '<td>' + esc(cols[0][i]) + '</td>' +
+                    '<td class="ca-cell" data-ca="' + esc(ca) + '">' + esc(ca.slice(0, 6)) + '...' + esc(ca.slice(-4)) + '</td>' +
+                    '<td>' + fmtTime(cols[2][i]) + '</td>' +
+                    '<td>' + fmtTime(cols[3][i]) + '</td>' +
+                    '<td>' + cols[4][i].toFixed(0) + 'm</td>' +
+                    '<td>' + fmtMoney(cols[5][i]) + '</td>' +
+                    '<td>' + fmtMoney(cols[6][i]) + '</td>' +
+                    '<td class="' + mcClass + '">' + fmtSigned(mcChange) + '%</td>' +
+                    '<td>' + cols[8][i].toFixed(0) + 'm</td>' +
+                    '<td>' + cols[9][i] + '</td>' +
+                    '<td class="' + pnlClass + '">$' + cols[10][i].toFixed(2) + '</td>' +
+                    '<td class="' + pnlClass + '">' + pnlPct.toFixed(1) + '%</td>' +
+                    '<td>' + (pnlPct > 0 ? '✅' : '❌') + '</td></tr>';
+            }
+            function spacer(height) {
+                return height > 0 ? '<tr><td colspan="' + NUM_COLS + '" style="height:' + height + 'px;padding:0;border:0"></td></tr>' : '';
+            }
+
+            function render() {
+                pending = false;
+                const total = view.length;
+                if (!total) {
+                    body.innerHTML = '<tr><td colspan="' + NUM_COLS + '">No matching trades</td></tr>';
+                    return;
+                }
+                const first = Math.max(0, Math.floor(scroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+                const last = Math.min(total, first + Math.ceil(scroller.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+                let html = spacer(first * ROW_HEIGHT);
+                for (let k = first; k < last; k++) html += rowHtml(view[k]);
+                html += spacer((total - last) * ROW_HEIGHT);
+                body.innerHTML = html;
+            }
+            function schedule() {
+                if (!pending) {
+                    pending = true;
+                    requestAnimationFrame(render);
+                }
+            }
+
+            function rebuild() {
+                const needle = filterInput.value.trim().toLowerCase();
+                const mode = outcome.value;
+                const symbols = cols[0], cas = cols[1], pnl = cols[PNL_PCT];
+                view = [];
+                for (let i = 0; i < payload.count; i++) {
+                    if (mode === 'profit' && !(pnl[i] > 0)) continue;
+                    if (mode === 'loss' && pnl[i] > 0) continue;
+                    if (needle && symbols[i].toLowerCase().indexOf(needle) < 0 && cas[i].toLowerCase().indexOf(needle) < 0) continue;
+                    view.push(i);
+                }
+                const key = cols[sortCol];
+                view.sort((a, b) => {
+                    const x = key[a], y = key[b];
+                    if (x === y) return 0;
+                    if (x === null) return 1;
+                    if (y === null) return -1;
+                    return (typeof x === 'string' ? x.localeCompare(y) : x - y) * sortDir;
+                });
+                headers.forEach(th => {
+                    th.classList.remove('sort-asc', 'sort-desc');
+                    if (+th.dataset.col === sortCol) th.classList.add(sortDir > 0 ? 'sort-asc' : 'sort-desc');
+                });
+                countEl.textContent = view.length + ' of ' + payload.count + ' trades';
+                scroller.scrollTop = 0;
+                render();
+            }
+
+            headers.forEach(th => th.addEventListener('click', () => {
+                const col = +th.dataset.col;
+                sortDir = col === sortCol ? -sortDir : (typeof cols[col][0] === 'string' ? 1 : -1);
+                sortCol = col;
+                rebuild();
+            }));
+            body.addEventListener('click', e => {
+                const cell = e.target.closest('.ca-cell');
+                if (cell) copyCA(cell.dataset.ca);
+            });
+            filterInput.addEventListener('input', rebuild);
+            outcome.addEventListener('change', rebuild);
+            scroller.addEventListener('scroll', schedule);
+            window.addEventListener('resize', schedule);
+            rebuild();
+        })();
+"""
+
+TRADE_COLUMNS = ['symbol', 'ca', 'buy_time', 'sell_time', 'hold_min', 'buy_mc', 'sell_mc',
+                 'mc_change', 'age_min', 'holders', 'his_pnl', 'pnl_pct']
+
+def _epoch(dt):
+    """Naive datetime -> epoch seconds (treated as UTC so the browser shows it unshifted)"""
+    return calendar.timegm(dt.timetuple()) if dt else None
+
+def build_trade_payload(rows):
+    """Pack report rows column-wise so the HTML report embeds the data only once"""
+    data = [[] for _ in TRADE_COLUMNS]
+    (symbols, cas, buy_times, sell_times, holds, buy_mcs, sell_mcs,
+     mc_changes, ages, holders, his_pnls, pnl_pcts) = data
+    
+    for t in rows:
+        symbols.append(t['symbol'] or '')
+        cas.append(t['ca'] or '')
+        buy_times.append(_epoch(t['buy_dt']))
+        sell_times.append(_epoch(t['sell_dt']))
+        holds.append(round(t['hold_min'], 1) if t['hold_min'] is not None else 0)
+        buy_mcs.append(round(t['buy_mc'] or 0))
+        sell_mcs.append(round(t['sell_mc'] or 0))
+        mc_changes.append(round(t['mc_change'], 1))
+        ages.append(round((t['buy_age'] or 0) / 60, 1))
+        holders.append(t['buy_holders'] or 0)
+        his_pnls.append(round(t['his_pnl'], 2))
+        pnl_pcts.append(round(t['pnl_pct'], 2))
+    
+    return {'cols': TRADE_COLUMNS, 'count': len(rows), 'data': data}
+
+
+def _svg_chart(title, series, key, fmt, bars=False, width=600, height=140):
+    """Small inline SVG bar/line chart for one metric of a time series"""
+    points = [(p['start'], p['end'], p[key]) for p in series if p[key] is not None]
+    if not points:
+        return f'<div class="chart"><div class="chart-title">{title}</div><p style="color:#888">No data</p></div>'
+    
+    pad_left, pad_bottom = 55, 18
+    plot_w, plot_h = width - pad_left, height - pad_bottom
+    t0, t1 = series[0]['start'], series[-1]['end']
+    lo = min(0, min(v for _, _, v in points)) if bars else min(v for _, _, v in points)
+    hi = max(0, max(v for _, _, v in points)) if bars else max(v for _, _, v in points)
+    span = (hi - lo) or 1
+    
+    def x(ts):
+        return pad_left + (ts - t0) / (t1 - t0) * plot_w
+    
+    def y(v):
+        return plot_h - (v - lo) / span * (plot_h - 10) - 5
+    
+    shapes = []
+    if bars:
+        zero = y(0)
+        for start, end, v in points:
+            color = "#00ff88" if v >= 0 else "#ff4444"
+            top = min(y(v), zero)
+            shapes.append(f'<rect x="{x(start) + 1:.1f}" y="{top:.1f}" width="{max(x(end) - x(start) - 2, 1):.1f}" '
+                          f'height="{max(abs(zero - y(v)), 0.5):.1f}" fill="{color}" opacity="0.8"/>')
+        shapes.append(f'<line x1="{pad_left}" x2="{width}" y1="{zero:.1f}" y2="{zero:.1f}" stroke="#444"/>')
+    else:
+        coords = " ".join(f"{x(end):.1f},{y(v):.1f}" for _, end, v in points)
+        shapes.append(f'<polyline points="{coords}" fill="none" stroke="#00d4ff" stroke-width="1.5"/>')
+    
+    def clock(ts):
+        return datetime.fromtimestamp(ts, timezone.utc).strftime("%m/%d %H:%M")
+    
+    labels = (
+        f'<text x="{pad_left - 6}" y="{y(hi) + 4:.1f}" text-anchor="end">{fmt(hi)}</text>'
+        f'<text x="{pad_left - 6}" y="{y(lo) + 4:.1f}" text-anchor="end">{fmt(lo)}</text>'
+        f'<text x="{pad_left}" y="{height - 4}">{clock(t0)}</text>'
+        f'<text x="{width}" y="{height - 4}" text-anchor="end">{clock(t1)}</text>'
+    )
+    return (f'<div class="chart"><div class="chart-title">{title}</div>'
+            f'<svg viewBox="0 0 {width} {height}" font-size="10" fill="#888">{"".join(shapes)}{labels}</svg></div>')
+
+
+def _cube_cell_style(cell):
+    """Background shaded by win rate: green above 50%, red below"""
+    alpha = min(abs(cell['win_rate'] - 50) / 50, 1) * 0.45
+    color = "0,255,136" if cell['win_rate'] >= 50 else "255,68,68"
+    return f"background: rgba({color},{alpha:.2f});"
+
+def _pivot_html(cube):
+    """Two dimensions as a rows x columns pivot of win rate (count); one or 3+ as a flat table"""
+    title = " × ".join(cube['titles'])
+    if not cube['cells']:
+        return f'<h3>{title}</h3><p style="color:#888">No data</p>'
+    if len(cube['dims']) == 2:
+        rows_labels, col_labels = cube['labels']
+        lookup = {cell['key']: cell for cell in cube['cells']}
+        body = ""
+        for row_label in rows_labels:
+            tds = ""
+            for col_label in col_labels:
+                cell = lookup.get((row_label, col_label))
+                if cell is None:
+                    tds += '<td style="color:#444">–</td>'
+                    continue
+                hold = f", avg hold {cell['avg_hold_min']:.0f} min" if cell['avg_hold_min'] is not None else ""
+                tds += (f'<td style="{_cube_cell_style(cell)}" title="avg P/L {cell["avg_pnl_pct"]:+.1f}%, '
+                        f'his P/L ${cell["his_pnl"]:,.0f}{hold}">{cell["win_rate"]:.0f}% <span style="color:#888">({cell["count"]})</span></td>')
+            body += f"<tr><td>{row_label}</td>{tds}</tr>"
+        head = "".join(f"<th>{label}</th>" for label in col_labels)
+        return (f'<h3>{title}</h3><table><thead><tr><th>{cube["titles"][0]} \\ {cube["titles"][1]}</th>{head}</tr></thead>'
+                f'<tbody>{body}</tbody></table>')
+    
+    head = "".join(f"<th>{t}</th>" for t in cube['titles'])
+    body = ""
+    for cell in cube['cells']:
+        keys = "".join(f"<td>{k}</td>" for k in cell['key'])
+        hold = f"{cell['avg_hold_min']:.0f} min" if cell['avg_hold_min'] is not None else "-"
+        body += (f"<tr>{keys}<td>{cell['count']}</td><td style=\"{_cube_cell_style(cell)}\">{cell['win_rate']:.1f}%</td>"
+                 f"<td class=\"{'profit' if cell['avg_pnl_pct'] > 0 else 'loss'}\">{cell['avg_pnl_pct']:+.1f}%</td>"
+                 f"<td class=\"{'profit' if cell['his_pnl'] >= 0 else 'loss'}\">${cell['his_pnl']:,.2f}</td><td>{hold}</td></tr>")
+    return (f'<h3>{title}</h3><table><thead><tr>{head}<th>Trades</th><th>Win Rate</th><th>Avg P/L</th><th>His P/L</th>'
+            f'<th>Avg Hold</th></tr></thead><tbody>{body}</tbody></table>')
+
+def generate_html_report(model):
     """Generate interactive HTML report"""
     
-    your_total_pnl = sum(t['pnl_usd'] for t in completed) if completed else 0
-    his_total_pnl = your_total_pnl * MULTIPLIER
-    profitable = [t for t in completed if t['pnl_pct'] > 0]
-    win_rate = len(profitable) / len(completed) * 100 if completed else 0
+    summary = model['summary']
+    buy_criteria = model['buy_criteria']
+    sell_criteria = model['sell_criteria']
+    win_rate = summary['win_rate']
+    his_total_pnl = summary['his_total_pnl']
+    confidence = model['confidence']
+    level = confidence['level'] if confidence else None
+    ci = confidence['summary'] if confidence else {}
+    win_rate_ci = _ci_text(ci.get('win_rate'), lambda v: f"{v:.1f}%", level).strip(" ()")
+    his_pnl_ci = _ci_text(ci.get('his_total_pnl'), lambda v: f"${v:,.0f}", level).strip(" ()")
     
-    # Build trades table
-    trades_html = ""
-    for t in sorted(completed, key=lambda x: x['pnl_pct'], reverse=True):
-        try:
-            buy_dt = datetime.fromisoformat(str(t['buy_time']))
-            sell_dt = datetime.fromisoformat(str(t['sell_time']))
-            hold_min = (sell_dt - buy_dt).total_seconds() / 60
-            buy_time_str = buy_dt.strftime("%m/%d %H:%M")
-            sell_time_str = sell_dt.strftime("%m/%d %H:%M")
-        except:
-            buy_time_str = sell_time_str = "N/A"
-            hold_min = 0
-        
-        pnl_class = "profit" if t['pnl_pct'] > 0 else "loss"
-        buy_mc = f"${t['buy_mc']:,.0f}" if t['buy_mc'] else "N/A"
-        sell_mc = f"${t['sell_mc']:,.0f}" if t['sell_mc'] else "N/A"
-        mc_change = ((t['sell_mc'] / t['buy_mc'] - 1) * 100) if t['buy_mc'] > 0 and t['sell_mc'] > 0 else 0
-        mc_class = "profit" if mc_change > 0 else "loss"
-        his_pnl = t['pnl_usd'] * MULTIPLIER
-        emoji = "✅" if t['pnl_pct'] > 0 else "❌"
-        
-        trades_html += f'''
-        <tr class="{pnl_class}-row">
-            <td>{t['symbol']}</td>
-            <td class="ca-cell" onclick="copyCA('{t['ca']}')">{t['ca'][:6]}...{t['ca'][-4:]}</td>
-            <td>{buy_time_str}</td>
-            <td>{sell_time_str}</td>
-            <td>{hold_min:.0f}m</td>
-            <td>{buy_mc}</td>
-            <td>{sell_mc}</td>
-            <td class="{mc_class}">{mc_change:+.0f}%</td>
-            <td>{t['buy_age']//60:.0f}m</td>
-            <td>{t['buy_holders']}</td>
-            <td class="{pnl_class}">${his_pnl:.2f}</td>
-            <td class="{pnl_class}">{t['pnl_pct']:.1f}%</td>
-            <td>{emoji}</td>
-        </tr>'''
+    confidence_html = ""
+    if confidence:
+        criteria_rows = ""
+        for key, (label, fmt) in METRIC_FORMATS.items():
+            metric_ci = confidence['buy_criteria'].get(f'{key}_avg')
+            if metric_ci:
+                criteria_rows += f"<tr><td>{label}</td><td>{fmt(metric_ci['estimate'])}</td><td>{fmt(metric_ci['low'])} – {fmt(metric_ci['high'])}</td><td>{metric_ci['n']}</td></tr>"
+        test_rows = ""
+        for key, test in confidence['entry_tests'].items():
+            if test:
+                label, fmt = METRIC_FORMATS[key]
+                significant = test['p_value'] < SIGNIFICANCE
+                test_rows += (f"<tr><td>{label}</td><td>{fmt(test['mean_a'])}</td><td>{fmt(test['mean_b'])}</td><td>{fmt(test['diff'])}</td>"
+                              f"<td class=\"{'profit' if significant else ''}\">{test['p_value']:.3f} {'✅ significant' if significant else '≈ noise'}</td></tr>")
+        confidence_html = f'''
+        <div class="section">
+            <h2>📏 How Sure Are We? - Confidence & Significance</h2>
+            <p style="color:#888;">Bootstrap {level:.0f}% intervals and permutation tests ({confidence['resamples']:,} resamples). A pattern whose interval straddles its threshold could go either way.</p>
+            <table>
+                <thead><tr><th>Entry Metric (all buys)</th><th>Mean</th><th>{level:.0f}% CI</th><th>n</th></tr></thead>
+                <tbody>{criteria_rows}</tbody>
+            </table>
+            <h3>Winning vs Losing Entries</h3>
+            <table>
+                <thead><tr><th>Entry Metric</th><th>Winners avg</th><th>Losers avg</th><th>Difference</th><th>p-value</th></tr></thead>
+                <tbody>{test_rows}</tbody>
+            </table>
+        </div>
+        '''
+    clf = model['classifier']
+    classifier_html = ""
+    if clf:
+        sample_note = (f" ⚠️ Sampled: a seeded random sample of {clf['n']:,} of the {clf['total']:,} round-trips "
+                       f"(install numpy to train on all of them).") if clf['sampled'] else ""
+        feature_rows = "".join(
+            f"<tr><td>{rank}</td><td>{f['label']}</td><td class=\"{'profit' if f['weight'] > 0 else 'loss'}\">{f['weight']:+.3f}</td>"
+            f"<td>{_feature_effect(f['weight'])}</td>"
+            f"<td><div class=\"bar\" style=\"width:{f['importance'] * 3:.0f}px\"></div> {f['importance']:.1f}%</td></tr>"
+            for rank, f in enumerate(clf['features'], 1)
+        )
+        classifier_html = f'''
+        <div class="section">
+            <h2>🧠 What Predicts a Win? - Entry Feature Classifier</h2>
+            <p style="color:#888;">Logistic regression on the entry snapshot of {clf['n']:,} round-trips. {clf['folds']}-fold cross-validated accuracy: <strong>{(clf['cv_accuracy'] or 0) * 100:.1f}%</strong> (always guessing the majority outcome: {clf['baseline_accuracy'] * 100:.1f}%).{sample_note}</p>
+            <div class="pattern">🎯 {_classifier_verdict(clf)}</div>
+            <table>
+                <thead><tr><th>Rank</th><th>Entry Feature</th><th>Weight</th><th>Effect</th><th>Importance</th></tr></thead>
+                <tbody>{feature_rows}</tbody>
+            </table>
+        </div>
+        '''
+    
+    timeline = model['timeline']
+    hourly = timeline['buckets']['1h']
+    rolling = timeline['rolling_1h']
+    timeline_html = "".join([
+        _svg_chart("His P/L per hour", hourly, 'his_pnl', lambda v: f"${v:,.0f}", bars=True),
+        _svg_chart("Trades per hour", hourly, 'trades', lambda v: f"{v:.0f}", bars=True),
+        _svg_chart("Win rate (rolling 1h)", rolling, 'win_rate', lambda v: f"{v:.0f}%"),
+        _svg_chart("Median hold (rolling 1h)", rolling, 'median_hold_min', lambda v: f"{v:.0f}m"),
+        _svg_chart("Median entry MC (rolling 1h)", rolling, 'median_entry_mc', lambda v: f"${v:,.0f}"),
+    ])
+    
+    cube_html = "".join(_pivot_html(cube) for cube in model['cube'])
+    
+    # Compact columnar payload - the table itself is rendered client-side
+    payload = build_trade_payload(model['rows'])
+    payload_json = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
     
     html = f'''<!DOCTYPE html>
 <html>
@@ -517,6 +1097,8 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
         .stat-card {{ background: rgba(26,26,46,0.8); padding: 15px; border-radius: 10px; text-align: center; border: 1px solid #2a2a4e; }}
         .stat-label {{ color: #888; font-size: 11px; text-transform: uppercase; }}
         .stat-value {{ font-size: 20px; font-weight: bold; margin-top: 5px; }}
+        .stat-ci {{ color: #888; font-size: 10px; margin-top: 4px; }}
+        .bar {{ display: inline-block; height: 8px; background: #00d4ff; border-radius: 4px; vertical-align: middle; }}
         .profit {{ color: #00ff88; }}
         .loss {{ color: #ff4444; }}
         .criteria-box {{ background: rgba(26,26,46,0.8); padding: 20px; border-radius: 10px; margin: 15px 0; border: 1px solid #2a2a4e; }}
@@ -535,12 +1117,26 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
         .toast {{ position: fixed; bottom: 20px; right: 20px; background: #00ff88; color: #000; padding: 12px 24px; border-radius: 8px; font-weight: bold; opacity: 0; transition: opacity 0.3s; z-index: 1000; }}
         .toast.show {{ opacity: 1; }}
         .section {{ margin: 30px 0; }}
+        .table-controls {{ display: flex; gap: 10px; align-items: center; margin: 10px 0; }}
+        .table-controls input, .table-controls select {{ background: #1a1a2e; color: #e0e0e0; border: 1px solid #2a2a4e; border-radius: 6px; padding: 6px 10px; }}
+        .table-controls input {{ width: 280px; }}
+        #trade-count {{ color: #888; font-size: 12px; }}
+        .table-scroll {{ height: 640px; overflow-y: auto; border-radius: 10px; }}
+        .table-scroll table {{ margin: 0; }}
+        .table-scroll td {{ height: 32px; white-space: nowrap; }}
+        th[data-col] {{ cursor: pointer; user-select: none; }}
+        .chart-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(480px, 1fr)); gap: 15px; }}
+        .chart {{ background: rgba(26,26,46,0.8); padding: 12px 15px; border-radius: 10px; border: 1px solid #2a2a4e; }}
+        .chart svg {{ width: 100%; height: auto; display: block; }}
+        .chart-title {{ color: #888; font-size: 11px; text-transform: uppercase; margin-bottom: 6px; }}
+        th.sort-asc::after {{ content: ' ▲'; }}
+        th.sort-desc::after {{ content: ' ▼'; }}
     </style>
 </head>
 <body>
     <div class="container">
         <h1>🔍 Bot Pattern Analysis</h1>
-        <p style="text-align:center;color:#888;">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p style="text-align:center;color:#888;">Generated: {model['generated'].strftime('%Y-%m-%d %H:%M:%S')}</p>
         
         <div class="warning">
             <div class="warning-title">⚠️ Important Note</div>
@@ -548,13 +1144,13 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
         </div>
         
         <div class="stats-grid">
-            <div class="stat-card"><div class="stat-label">Total Trades</div><div class="stat-value">{len(history)}</div></div>
-            <div class="stat-card"><div class="stat-label">Completed</div><div class="stat-value">{len(completed)}</div></div>
-            <div class="stat-card"><div class="stat-label">Win Rate</div><div class="stat-value {'profit' if win_rate >= 50 else 'loss'}">{win_rate:.1f}%</div></div>
-            <div class="stat-card"><div class="stat-label">His Est. P/L</div><div class="stat-value {'profit' if his_total_pnl >= 0 else 'loss'}">${his_total_pnl:.2f}</div></div>
-            <div class="stat-card"><div class="stat-label">Profitable</div><div class="stat-value profit">{len(profitable)}</div></div>
-            <div class="stat-card"><div class="stat-label">Losing</div><div class="stat-value loss">{len(completed) - len(profitable)}</div></div>
-            <div class="stat-card"><div class="stat-label">Open</div><div class="stat-value">{open_count}</div></div>
+            <div class="stat-card"><div class="stat-label">Total Trades</div><div class="stat-value">{summary['total_trades']}</div></div>
+            <div class="stat-card"><div class="stat-label">Completed</div><div class="stat-value">{summary['completed_count']}</div></div>
+            <div class="stat-card"><div class="stat-label">Win Rate</div><div class="stat-value {'profit' if win_rate >= 50 else 'loss'}">{win_rate:.1f}%</div><div class="stat-ci">{win_rate_ci}</div></div>
+            <div class="stat-card"><div class="stat-label">His Est. P/L</div><div class="stat-value {'profit' if his_total_pnl >= 0 else 'loss'}">${his_total_pnl:.2f}</div><div class="stat-ci">{his_pnl_ci}</div></div>
+            <div class="stat-card"><div class="stat-label">Profitable</div><div class="stat-value profit">{summary['profitable_count']}</div></div>
+            <div class="stat-card"><div class="stat-label">Losing</div><div class="stat-value loss">{summary['losing_count']}</div></div>
+            <div class="stat-card"><div class="stat-label">Open</div><div class="stat-value">{summary['open_count']}</div></div>
         </div>
         
         <div class="section">
@@ -600,32 +1196,59 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
             </div>
         </div>
         
+        {confidence_html}
+        {classifier_html}
+        <div class="section">
+            <h2>🧊 Slice & Dice - Win Rate by Entry Conditions</h2>
+            <p style="color:#888;">Round-trips grouped by their entry snapshot. Two-way tables show win rate (trades); hover a cell for avg P/L, his P/L and hold time.</p>
+            {cube_html}
+        </div>
+        
+        <div class="section">
+            <h2>📈 Performance Over Time</h2>
+            <div class="chart-grid">
+                {timeline_html}
+            </div>
+        </div>
+        
         <div class="section">
             <h2>📋 All Trades (Click CA to Copy)</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Symbol</th>
-                        <th>CA</th>
-                        <th>Buy Time</th>
-                        <th>Sell Time</th>
-                        <th>Hold</th>
-                        <th>Buy MC</th>
-                        <th>Sell MC</th>
-                        <th>MC Δ</th>
-                        <th>Age</th>
-                        <th>Holders</th>
-                        <th>His P/L</th>
-                        <th>P/L %</th>
-                        <th></th>
-                    </tr>
-                </thead>
-                <tbody>{trades_html}</tbody>
-            </table>
+            <div class="table-controls">
+                <input type="text" id="trade-filter" placeholder="Filter by symbol or CA...">
+                <select id="trade-outcome">
+                    <option value="all">All trades</option>
+                    <option value="profit">Profitable only</option>
+                    <option value="loss">Losing only</option>
+                </select>
+                <span id="trade-count"></span>
+            </div>
+            <div class="table-scroll" id="trade-scroll">
+                <table id="trade-table">
+                    <thead>
+                        <tr>
+                            <th data-col="0">Symbol</th>
+                            <th data-col="1">CA</th>
+                            <th data-col="2">Buy Time</th>
+                            <th data-col="3">Sell Time</th>
+                            <th data-col="4">Hold</th>
+                            <th data-col="5">Buy MC</th>
+                            <th data-col="6">Sell MC</th>
+                            <th data-col="7">MC Δ</th>
+                            <th data-col="8">Age</th>
+                            <th data-col="9">Holders</th>
+                            <th data-col="10">His P/L</th>
+                            <th data-col="11">P/L %</th>
+                            <th></th>
+                        </tr>
+                    </thead>
+                    <tbody id="trade-body"></tbody>
+                </table>
+            </div>
         </div>
     </div>
     
     <div class="toast" id="toast">✅ CA Copied!</div>
+    <script type="application/json" id="trade-data">{payload_json}</script>
     <script>
         function copyCA(ca) {{
             navigator.clipboard.writeText(ca).then(() => {{
@@ -634,6 +1257,7 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
                 setTimeout(() => toast.classList.remove('show'), 2000);
             }});
         }}
+{TRADE_TABLE_JS}
     </script>
 </body>
 </html>'''
@@ -644,5 +1268,83 @@ def generate_html_report(completed, open_count, tokens, buys, sells, history, bu
     print(f"🌐 HTML report saved to: analysis_report.html")
 
 
+
+CSV_COLUMNS = ['symbol', 'ca', 'buy_time', 'sell_time', 'hold_min', 'buy_mc', 'sell_mc', 'mc_change',
+               'buy_age', 'buy_holders', 'buy_liq', 'buy_ratio', 'pnl_pct', 'pnl_usd', 'his_pnl',
+               'mfe_pct', 'mae_pct']
+
+def generate_csv_report(model):
+    """Generate flat CSV of completed trades (one row per round-trip)"""
+    with open("analysis_trades.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for t in model['rows']:
+            writer.writerow([t.get(col) for col in CSV_COLUMNS])
+    
+    print(f"📄 CSV trades saved to: analysis_trades.csv")
+
+
+def generate_json_report(model):
+    """Generate machine-readable JSON report"""
+    report = {
+        'generated': model['generated'],
+        'summary': model['summary'],
+        'buy_criteria': model['buy_criteria'],
+        'sell_criteria': model['sell_criteria'],
+        'timeline': model['timeline'],
+        'confidence': model['confidence'],
+        'classifier': model['classifier'],
+        'cube': model['cube'],
+        'trades': [{k: v for k, v in t.items() if k not in ('buy_dt', 'sell_dt')} for t in model['rows']],
+    }
+    with open("analysis_report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    
+    print(f"📄 JSON report saved to: analysis_report.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze the bot's trading patterns")
+    parser.add_argument("history", nargs="?", default="trade_history.json",
+                        help="trade history JSON file, segment directory or SQLite store (.db)")
+    parser.add_argument("--since", help="only trades at or after this time (e.g. \"2026-01-05 02:00\")")
+    parser.add_argument("--until", help="only trades at or before this time")
+    parser.add_argument("--profile", action="store_true", help="print per-phase timing and peak memory")
+    parser.add_argument("--profile-out", default="analysis_profile.json", help="where the profile summary is written")
+    parser.add_argument("--cprofile", metavar="FILE", help="also dump cProfile stats (snakeviz/flameprof compatible)")
+    parser.add_argument("--follow", action="store_true", help="keep running and refresh the reports as new trades arrive")
+    parser.add_argument("--debounce", type=float, default=2.0, help="seconds to wait for more trades before re-rendering")
+    parser.add_argument("--confidence", action="store_true",
+                        help="add bootstrap intervals and winner/loser permutation tests (slow without numpy)")
+    parser.add_argument("--classifier", action="store_true",
+                        help="add the entry feature win classifier (samples large captures without numpy)")
+    parser.add_argument("--cube", action="append", metavar="DIMS", default=[],
+                        help=f"extra pivot table over comma-separated dimensions ({', '.join(CUBE_DIMENSIONS)}), repeatable")
+    args = parser.parse_args()
+    
+    cube_views = None
+    if args.cube:
+        extra = [tuple(d.strip() for d in view.split(",")) for view in args.cube]
+        unknown = sorted({d for view in extra for d in view} - set(CUBE_DIMENSIONS))
+        if unknown:
+            parser.error(f"unknown cube dimension(s): {', '.join(unknown)}")
+        cube_views = CUBE_VIEWS + extra
+    
+    if args.follow:
+        from live_analysis import follow
+        follow(args.history, debounce=args.debounce, start=args.since, end=args.until, cube_views=cube_views,
+               confidence=args.confidence, classifier=args.classifier)
+        return
+    
+    if not (args.profile or args.cprofile):
+        analyze_patterns(args.history, cube_views=cube_views, start=args.since, end=args.until,
+                         confidence=args.confidence, classifier=args.classifier)
+        return
+    
+    profiler = PhaseProfiler(cprofile_path=args.cprofile)
+    analyze_patterns(args.history, profiler, cube_views, args.since, args.until, args.confidence, args.classifier)
+    profiler.print_breakdown()
+    profiler.save(args.profile_out)
+
+
 if __name__ == "__main__":
-    analyze_patterns()
+    main()
@@ -0,0 +1,91 @@
+"""
+⏱️ PHASE PROFILER
+==================
+Per-phase wall time and peak memory (tracemalloc) for the analyzer, plus an
+optional cProfile dump of the whole run.
+
+The .pstats dump can be opened with snakeviz or turned into a flamegraph
+with flameprof / gprof2dot.
+"""
+
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class PhaseProfiler:
+    def __init__(self, enabled=True, cprofile_path=None):
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path
+        self.phases = []
+        self.meta = {}
+        self._profile = None
+        self._started = None
+
+    def start(self):
+        if not self.enabled:
+            return
+        tracemalloc.start()
+        self._started = time.perf_counter()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if not self.enabled or self._started is None:
+            return
+        if self._profile:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+        self.meta["total_seconds"] = time.perf_counter() - self._started
+        tracemalloc.stop()
+        self._started = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time one phase and record the memory it peaked at above its starting point"""
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        mem_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            mem_after, mem_peak = tracemalloc.get_traced_memory()
+            self.phases.append({
+                "phase": name,
+                "seconds": seconds,
+                "peak_mb": (mem_peak - mem_before) / 1e6,
+                "net_mb": (mem_after - mem_before) / 1e6,
+            })
+
+    def summary(self):
+        return {
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            **self.meta,
+            "cprofile": self.cprofile_path,
+            "phases": self.phases,
+        }
+
+    def print_breakdown(self):
+        total = sum(p["seconds"] for p in self.phases) or 1
+        print("\n" + "=" * 60)
+        print("⏱️  PROFILE")
+        print("=" * 60)
+        print(f"{'Phase':<18}{'Time':>12}{'Share':>9}{'Peak MB':>11}{'Net MB':>10}")
+        for p in self.phases:
+            print(f"{p['phase']:<18}{p['seconds'] * 1000:>10.1f}ms{p['seconds'] / total * 100:>8.1f}%"
+                  f"{p['peak_mb']:>11.2f}{p['net_mb']:>10.2f}")
+        if self.cprofile_path:
+            print(f"🔥 cProfile stats saved to: {self.cprofile_path}")
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"📄 Profile summary saved to: {path}")
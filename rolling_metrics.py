@@ -0,0 +1,179 @@
+"""
+📈 ROLLING METRICS ENGINE
+==========================
+Sliding-window and fixed-bucket metrics over completed round-trips:
+win rate, realized P/L, trade frequency, median hold time and median entry MC.
+
+Trades are added/removed incrementally as the window advances, so every trade
+enters and leaves the window once. Sums are O(1) per update and medians use
+two heaps with lazy deletion (O(log n) amortized) instead of re-sorting each
+window from scratch.
+"""
+
+import calendar
+import heapq
+from collections import Counter
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+BUCKETS = {
+    "15m": 15 * MINUTE,
+    "1h": HOUR,
+    "1d": DAY,
+}
+
+
+class RollingMedian:
+    """Median of a multiset that supports add/remove in O(log n)"""
+
+    def __init__(self):
+        self.low = []    # max-heap (negated) holding the smaller half
+        self.high = []   # min-heap holding the larger half
+        self.pending = Counter()  # values removed but still sitting in a heap
+        self.low_size = 0
+        self.high_size = 0
+
+    def __len__(self):
+        return self.low_size + self.high_size
+
+    def _prune(self, heap, sign):
+        while heap and self.pending[sign * heap[0]]:
+            value = sign * heapq.heappop(heap)
+            self.pending[value] -= 1
+
+    def _rebalance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.low_size += 1
+            self.high_size -= 1
+            self._prune(self.high, 1)
+
+    def add(self, value):
+        if not self.low or value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, value)
+            self.high_size += 1
+        self._rebalance()
+
+    def remove(self, value):
+        self.pending[value] += 1
+        if self.low and value <= -self.low[0]:
+            self.low_size -= 1
+            if value == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and value == self.high[0]:
+                self._prune(self.high, 1)
+        self._rebalance()
+
+    def median(self):
+        if not len(self):
+            return None
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+class WindowStats:
+    """Running aggregates for the round-trips currently inside a window"""
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.pnl_usd = 0.0
+        self.pnl_pct_sum = 0.0
+        self.hold = RollingMedian()
+        self.entry_mc = RollingMedian()
+
+    def add(self, row):
+        self.count += 1
+        self.wins += row['pnl_pct'] > 0
+        self.pnl_usd += row['pnl_usd']
+        self.pnl_pct_sum += row['pnl_pct']
+        if row['hold_min'] is not None:
+            self.hold.add(row['hold_min'])
+        if row['buy_mc'] > 0:
+            self.entry_mc.add(row['buy_mc'])
+
+    def remove(self, row):
+        self.count -= 1
+        self.wins -= row['pnl_pct'] > 0
+        self.pnl_usd -= row['pnl_usd']
+        self.pnl_pct_sum -= row['pnl_pct']
+        if row['hold_min'] is not None:
+            self.hold.remove(row['hold_min'])
+        if row['buy_mc'] > 0:
+            self.entry_mc.remove(row['buy_mc'])
+
+    def snapshot(self, window_seconds, multiplier=1):
+        return {
+            'trades': self.count,
+            'win_rate': self.wins / self.count * 100 if self.count else None,
+            'pnl_usd': self.pnl_usd,
+            'his_pnl': self.pnl_usd * multiplier,
+            'avg_pnl_pct': self.pnl_pct_sum / self.count if self.count else None,
+            'trades_per_hour': self.count / (window_seconds / HOUR),
+            'median_hold_min': self.hold.median(),
+            'median_entry_mc': self.entry_mc.median(),
+        }
+
+
+def _sell_ts(row):
+    dt = row.get('sell_dt')
+    return calendar.timegm(dt.timetuple()) + dt.microsecond / 1e6 if dt else None
+
+
+def compute_series(rows, window_seconds, step_seconds=None, multiplier=1):
+    """
+    Metrics for a window of `window_seconds` advanced by `step_seconds`.
+    step == window gives fixed buckets, step < window a sliding window.
+    Rows need sell_dt, hold_min, buy_mc, pnl_pct and pnl_usd (report model rows).
+    Each point is stamped with its window [start, end) in epoch seconds.
+    """
+    step_seconds = step_seconds or window_seconds
+    # Sort on the timestamp only: round-trips closed at the same instant must not fall back to comparing rows
+    events = sorted(((ts, row) for ts, row in ((_sell_ts(r), r) for r in rows) if ts is not None),
+                    key=lambda e: e[0]) if rows else []
+    if not events:
+        return []
+
+    first_ts = events[0][0]
+    last_ts = events[-1][0]
+    end = (int(first_ts) // step_seconds + 1) * step_seconds
+    stats = WindowStats()
+    head = tail = 0
+    series = []
+
+    while True:
+        while head < len(events) and events[head][0] < end:
+            stats.add(events[head][1])
+            head += 1
+        while tail < head and events[tail][0] < end - window_seconds:
+            stats.remove(events[tail][1])
+            tail += 1
+        point = {'start': end - window_seconds, 'end': end}
+        point.update(stats.snapshot(window_seconds, multiplier))
+        series.append(point)
+        if end > last_ts:
+            break
+        end += step_seconds
+
+    return series
+
+
+def compute_timeline(rows, multiplier=1):
+    """Standard set of series used by the reports"""
+    return {
+        'buckets': {name: compute_series(rows, seconds, multiplier=multiplier) for name, seconds in BUCKETS.items()},
+        'rolling_1h': compute_series(rows, HOUR, 15 * MINUTE, multiplier=multiplier),
+    }
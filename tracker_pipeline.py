@@ -0,0 +1,267 @@
+"""
+⚙️ PROCESS-SEPARATED TRACKER PIPELINE
+======================================
+Same tracker as data.py, split across processes so nothing CPU-heavy shares
+the detection loop's GIL:
+
+    ingest + positions (main)  --mints-->    enrichment pool (/tokens requests + JSON decoding)
+            |
+            +--- new records --> persistence  trade_history.json, position/closed samples, SQLite
+            +--- new records --> dashboard    renders + gzips results.html, serves :2020
+
+The main loop only polls, dedupes, hands mints to the pool and applies the
+finished trades in arrival order (positions depend on order, the P/L math is
+cheap). The queues carry small batches of new records, never the whole
+history, so the loop's latency stays flat however large the history gets or
+however many dashboard clients are connected.
+
+    python tracker_pipeline.py
+"""
+
+import multiprocessing as mp
+import queue
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from datetime import datetime
+from threading import Thread
+
+from data import (API_KEY, BACKFILL_SINCE, CHECK_INTERVAL, SAMPLE_INTERVAL, SEGMENTS_DIR, SQLITE_PATH, STREAM_URL, WALLET,
+                  DashboardCache, PriceSampler, WalletTracker, backfill, catch_up, get_token_analysis, get_wallet_trades,
+                  print_trade, save_history, start_web_server, trade_mint)
+from history_segments import SegmentStore, start_compactor
+from history_store import HistoryStore
+from trade_stream import TradeFeed, TradeStream
+
+ENRICH_WORKERS = 4  # processes fetching and decoding token snapshots
+PERSIST_INTERVAL = CHECK_INTERVAL  # at most one history file write per interval
+DASHBOARD_POSITION_FIELDS = ("symbol", "name", "total_tokens", "total_sol_spent")
+
+
+def _ignore_sigint():
+    # Ctrl+C goes to the whole process group; only the main process handles it and shuts the rest down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class PipelineTracker(WalletTracker):
+    """Positions and P/L only - records are handed to the other processes instead of kept here"""
+
+    def __init__(self):
+        super().__init__()
+        self.outbox = []
+
+    def record(self, trade_result):
+        self.version += 1
+        self.outbox.append(trade_result)
+
+    def drain(self):
+        records, self.outbox = self.outbox, []
+        return records
+
+    def positions_view(self):
+        """What the dashboard needs from the open positions"""
+        with self.lock:
+            return {mint: {k: pos[k] for k in DASHBOARD_POSITION_FIELDS}
+                    for mint, pos in self.positions.items() if pos["total_tokens"] > 0}
+
+
+def persistence_worker(inbox, sqlite_path, segments_dir=None):
+    """Owns the full history; writes the files at most every PERSIST_INTERVAL s and every trade to SQLite / segments"""
+    _ignore_sigint()
+    store = HistoryStore(sqlite_path) if sqlite_path else None
+    segments = SegmentStore(segments_dir) if segments_dir else None
+    if segments:
+        start_compactor(segments)
+    history = []
+    samples = {"open": [], "closed": []}
+    dirty = False
+    last_write = 0
+
+    while True:
+        try:
+            msg = inbox.get(timeout=PERSIST_INTERVAL)
+        except queue.Empty:
+            msg = ()
+        if msg is None:
+            break
+        if msg:
+            kind, payload = msg
+            if kind == "trades":
+                if segments:
+                    try:
+                        segments.append(payload)
+                    except Exception as e:
+                        print(f"      ⚠️  Failed to write trades to segments: {e}")
+                else:
+                    history.extend(payload)
+                for record in payload:
+                    if store:
+                        try:
+                            store.add_trade(record)
+                        except Exception as e:
+                            print(f"      ⚠️  Failed to write trade to SQLite: {e}")
+            else:
+                # Closed series arrive once each: keep them until the next write appends them
+                samples = {"open": payload["open"], "closed": samples["closed"] + payload["closed"]}
+            dirty = True
+        if dirty and time.monotonic() - last_write >= PERSIST_INTERVAL:
+            save_history(None if segments else history, samples)
+            samples = {"open": samples["open"], "closed": []}
+            dirty = False
+            last_write = time.monotonic()
+
+    if dirty:
+        save_history(None if segments else history, samples)
+    if store:
+        store.close()
+
+
+def dashboard_worker(inbox, start_time):
+    """Keeps a mirror of history + open positions and serves the dashboard from its own process"""
+    _ignore_sigint()
+    mirror = WalletTracker()
+    mirror.start_time = start_time
+    cache = DashboardCache()
+    Thread(target=start_web_server, args=(cache,), daemon=True).start()
+
+    while True:
+        try:
+            msg = inbox.get(timeout=CHECK_INTERVAL)
+        except queue.Empty:
+            msg = ()
+        if msg is None:
+            break
+        if msg:
+            records, positions = msg
+            mirror.history.extend(records)
+            mirror.version += len(records)
+            mirror.positions = positions
+        runtime_min = int((datetime.now() - mirror.start_time).total_seconds() // 60)
+        if cache.update((mirror.version, runtime_min), mirror.generate_html):
+            with open("results.html", "wb") as f:
+                f.write(cache.get()[0])
+
+
+def main():
+    print("=" * 60)
+    print("📊 WALLET TRACKER - Live Data Collection (pipeline mode)")
+    print("=" * 60)
+    print(f"👀 Tracking: {WALLET}")
+    print(f"⏱️  Check interval: {CHECK_INTERVAL}s")
+    print(f"⚙️  Enrichment workers: {ENRICH_WORKERS}")
+    print("=" * 60)
+
+    # spawn, not fork: the main process runs threads (price sampler, queue feeders)
+    ctx = mp.get_context("spawn")
+    tracker = PipelineTracker()
+    persist_q = ctx.Queue()
+    dashboard_q = ctx.Queue()
+    workers = [
+        ctx.Process(target=persistence_worker, args=(persist_q, SQLITE_PATH, SEGMENTS_DIR), daemon=True),
+        ctx.Process(target=dashboard_worker, args=(dashboard_q, tracker.start_time), daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+    pool = ProcessPoolExecutor(max_workers=ENRICH_WORKERS, mp_context=ctx, initializer=_ignore_sigint)
+
+    def publish():
+        records = tracker.drain()
+        if records:
+            persist_q.put(("trades", records))
+            dashboard_q.put((records, tracker.positions_view()))
+
+    backfilled = False
+    if BACKFILL_SINCE:
+        try:
+            backfill(tracker)
+            print("🔄 Catching up on trades made during the backfill...")
+            print(f"✅ Caught up on {catch_up(tracker)} trades\n")
+            backfilled = True
+        except Exception as e:
+            print(f"⚠️  Backfill error: {e} (progress saved, restart to resume)\n")
+        publish()
+
+    if not backfilled:
+        print("🔄 Syncing existing trades...")
+        try:
+            for trade in get_wallet_trades():
+                if trade.get("tx"):
+                    tracker.seen_txs.add(trade["tx"])
+            print(f"✅ Ignoring {len(tracker.seen_txs)} historical trades")
+            print(f"🎯 Now tracking NEW trades only\n")
+        except Exception as e:
+            print(f"⚠️  Sync error: {e}\n")
+
+    # Started after the replay so rebuilt positions only get prices sampled from here on
+    Thread(target=PriceSampler(tracker).run, daemon=True).start()
+
+    # Trades come from the stream while it's up and from polling otherwise (same feed as data.py)
+    stream = TradeStream(STREAM_URL, headers={"x-api-key": API_KEY}).start() if STREAM_URL else None
+    feed = TradeFeed(get_wallet_trades, stream, CHECK_INTERVAL)
+
+    pending = deque()  # (trade, mint, future) in arrival order
+    pending_txs = set()
+    last_samples = 0
+
+    try:
+        while True:
+            # The feed paces the loop: it waits for the next poll or for stream events
+            try:
+                trades = feed.next_batch()
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                trades = []
+            deadline = time.monotonic() + CHECK_INTERVAL
+
+            for trade in trades:
+                tx_sig = trade.get("tx", "")
+                if tx_sig in tracker.seen_txs or tx_sig in pending_txs:
+                    continue
+                pending_txs.add(tx_sig)
+                mint = trade_mint(trade)
+                pending.append((trade, mint, pool.submit(get_token_analysis, mint) if mint else None))
+
+            # Apply enriched trades strictly in arrival order; whatever isn't ready waits for the next round
+            applied = 0
+            while pending:
+                trade, mint, future = pending[0]
+                try:
+                    analysis = future.result(timeout=max(0, deadline - time.monotonic())) if future else None
+                except TimeoutError:
+                    break
+                except Exception as e:
+                    print(f"      ⚠️  Failed to get token analysis: {e}")
+                    analysis = None
+                pending.popleft()
+                pending_txs.discard(trade.get("tx", ""))
+                result = tracker.process_trade(trade, prefetched={mint: analysis})
+                if result:
+                    applied += 1
+                    print_trade(result)
+            publish()
+
+            if time.monotonic() - last_samples >= SAMPLE_INTERVAL:
+                persist_q.put(("samples", tracker.samples_snapshot()))
+                last_samples = time.monotonic()
+
+            if not applied:
+                waiting = f" ({len(pending)} enriching)" if pending else ""
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] No new trades{waiting}", end="\r")
+
+    except KeyboardInterrupt:
+        _ignore_sigint()  # a second Ctrl+C must not abort the final flush
+        print("\n" + "=" * 60)
+        print("⏹️  STOPPED")
+        print("=" * 60)
+        pool.shutdown(wait=False, cancel_futures=True)
+        publish()
+        persist_q.put(None)
+        dashboard_q.put(None)
+        for worker in workers:
+            worker.join(timeout=30)
+        print(f"📄 Data saved to: trade_history.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+🔎 TRADE QUERY API
+===================
+Indexes a loaded trade history once and answers point, range and combined
+queries with hash / bisect lookups instead of scanning every trade.
+
+    from trade_query import TradeIndex
+    idx = TradeIndex.from_file("trade_history.json")
+
+    idx.by_mint("FyPDfX92B4uEk4zZouy96d1Kk1LgnCznBpzAFSsZpump")
+    idx.by_tx("5s3iWzBx...")
+    idx.between("2026-01-05 02:00", "2026-01-05 03:00")
+    idx.query(action="BUY", market_cap=(50_000, 150_000), start="2026-01-05 02:00")
+
+Results are the original trade dicts in chronological order, so they can be
+passed straight to analyze_buy_criteria / analyze_sell_criteria /
+group_trades_by_token and the report functions.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+from pattern_analysis import load_data
+
+# `analysis` fields that get a sorted index (built lazily on first use)
+NUMERIC_FIELDS = [
+    "market_cap", "liquidity", "holders", "age_seconds", "buy_sell_ratio",
+    "price_change_1m", "price_change_5m", "price_change_15m", "price_change_1h",
+    "top10_holders_pct", "sniper_count", "insider_count", "lp_burned", "risk_score",
+]
+# Top-level numeric fields that can also be range-queried
+TRADE_FIELDS = ["pnl_pct", "pnl_usd", "pnl_sol", "sol_amount", "value_usd"]
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+class SortedIndex:
+    """(key, position) pairs sorted by key, answering range lookups via bisect"""
+
+    def __init__(self, pairs):
+        pairs.sort()
+        self.keys = [k for k, _ in pairs]
+        self.positions = [p for _, p in pairs]
+
+    def bounds(self, lo=None, hi=None):
+        start = bisect_left(self.keys, lo) if lo is not None else 0
+        end = bisect_right(self.keys, hi) if hi is not None else len(self.keys)
+        return start, max(start, end)
+
+    def range(self, lo=None, hi=None):
+        start, end = self.bounds(lo, hi)
+        return self.positions[start:end]
+
+
+class TradeIndex:
+    def __init__(self, history):
+        self.trades = history or []
+        self._by_mint = defaultdict(list)
+        self._by_tx = {}
+        self._by_action = defaultdict(list)
+        self._times = [None] * len(self.trades)
+        self._sorted = {}
+
+        time_pairs = []
+        for pos, t in enumerate(self.trades):
+            self._by_mint[t.get('token')].append(pos)
+            self._by_action[t.get('action')].append(pos)
+            if t.get('tx'):
+                self._by_tx[t['tx']] = pos
+            try:
+                ts = _to_datetime(t.get('timestamp'))
+            except ValueError:
+                ts = None
+            self._times[pos] = ts
+            if ts is not None:
+                time_pairs.append((ts, pos))
+        self._sorted['timestamp'] = SortedIndex(time_pairs)
+
+    @classmethod
+    def from_file(cls, path="trade_history.json"):
+        return cls(load_data(path))
+
+    def __len__(self):
+        return len(self.trades)
+
+    # ---- helpers -------------------------------------------------------
+
+    def _value(self, pos, field):
+        t = self.trades[pos]
+        if field == 'timestamp':
+            return self._times[pos]
+        if field in TRADE_FIELDS:
+            return t.get(field)
+        analysis = t.get('analysis')
+        return analysis.get(field) if analysis else None
+
+    def _index(self, field):
+        """Sorted index for `field`, built the first time it's queried"""
+        if field not in self._sorted:
+            if field not in NUMERIC_FIELDS and field not in TRADE_FIELDS:
+                raise ValueError(f"No index for field '{field}'")
+            pairs = []
+            for pos in range(len(self.trades)):
+                value = self._value(pos, field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    pairs.append((value, pos))
+            self._sorted[field] = SortedIndex(pairs)
+        return self._sorted[field]
+
+    def _materialize(self, positions):
+        return [self.trades[p] for p in sorted(positions, key=lambda p: (self._times[p] is None, self._times[p] or 0, p))]
+
+    # ---- point lookups -------------------------------------------------
+
+    def by_tx(self, tx):
+        pos = self._by_tx.get(tx)
+        return self.trades[pos] if pos is not None else None
+
+    def by_mint(self, mint):
+        return self._materialize(self._by_mint.get(mint, []))
+
+    def by_action(self, action):
+        return self._materialize(self._by_action.get(action, []))
+
+    def mints(self):
+        return list(self._by_mint)
+
+    # ---- range lookups -------------------------------------------------
+
+    def between(self, start=None, end=None):
+        """Trades with start <= timestamp <= end (datetimes or ISO strings)"""
+        return self._materialize(self._sorted['timestamp'].range(_to_datetime(start), _to_datetime(end)))
+
+    def range(self, field, lo=None, hi=None):
+        """Trades whose `field` (analysis or top-level numeric) is within [lo, hi]"""
+        return self._materialize(self._index(field).range(lo, hi))
+
+    # ---- combined ------------------------------------------------------
+
+    def query(self, mint=None, action=None, start=None, end=None, **ranges):
+        """
+        AND of all given filters. Range filters are field=(lo, hi), either end may be None.
+        Candidates come from the most selective index; the rest are checked per candidate.
+        """
+        candidates = []  # (size, fetch) for each usable index
+        checks = []
+
+        if mint is not None:
+            positions = self._by_mint.get(mint, [])
+            candidates.append((len(positions), lambda positions=positions: positions))
+            checks.append(lambda p: self.trades[p].get('token') == mint)
+        if action is not None:
+            positions = self._by_action.get(action, [])
+            candidates.append((len(positions), lambda positions=positions: positions))
+            checks.append(lambda p: self.trades[p].get('action') == action)
+
+        bounds = {}
+        if start is not None or end is not None:
+            bounds['timestamp'] = (_to_datetime(start), _to_datetime(end))
+        bounds.update(ranges)
+
+        for field, (lo, hi) in bounds.items():
+            index = self._sorted['timestamp'] if field == 'timestamp' else self._index(field)
+            first, last = index.bounds(lo, hi)
+            candidates.append((last - first, lambda index=index, first=first, last=last: index.positions[first:last]))
+            checks.append(lambda p, field=field, lo=lo, hi=hi: self._in_range(self._value(p, field), lo, hi))
+
+        if not candidates:
+            return list(self.trades)
+
+        _, fetch = min(candidates, key=lambda c: c[0])
+        return self._materialize(p for p in fetch() if all(check(p) for check in checks))
+
+    @staticmethod
+    def _in_range(value, lo, hi):
+        if value is None or isinstance(value, bool):
+            return False
+        return (lo is None or value >= lo) and (hi is None or value <= hi)
@@ -0,0 +1,300 @@
+"""
+🧾 TRADE RECORD SCHEMA
+=======================
+History files mix record shapes from different script versions:
+
+    paper-v1    sol_spent / sol_received, amount, price, fee_sol,
+                pnl_usd / your_pnl_usd, pnl_pct / your_pnl_pct
+    tracker-v2  sol_amount, token_amount, price_usd, value_usd, pnl_sol, pnl_pct,
+                mfe_pct / mae_pct
+
+`normalize_history` detects the schema of every record from its keys (a couple
+of dict lookups, so a capture that switches shape midway is still read right
+and reported as mixed, with per-schema counts) and turns every trade into a
+TradeRecord in a single pass: canonical names, numbers
+instead of None, epoch-second timestamps and a Snapshot whose metrics are
+plain attributes (all zero, `present` False, when the trade has no snapshot).
+The analyzers' hot loops then read `t.ts`, `t.pnl_pct`, `t.snapshot.market_cap`
+instead of `safe_get` chains, `or` fallbacks and `fromisoformat(str(...))`.
+Fields no reader knows about are counted, not dropped silently.
+
+    python trade_schema.py trade_history.json                 # schema + unrecognized fields
+    python trade_schema.py trade_history.json canonical.json  # also write canonical tracker-v2 records
+"""
+
+import calendar
+import json
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+from history_format import pack_history, unpack_history
+
+SCHEMAS = {
+    "paper-v1": {"sol_spent", "sol_received", "amount", "price", "your_pnl_pct", "your_pnl_usd"},
+    "tracker-v2": {"sol_amount", "token_amount", "price_usd", "value_usd", "pnl_sol"},
+}
+COMMON_FIELDS = {"timestamp", "timestamp_detected", "action", "token", "token_name", "token_symbol", "tx",
+                 "analysis", "fee_sol", "sol_balance", "pnl_pct", "pnl_usd", "mfe_pct", "mae_pct", "price_samples", "detected_via"}
+KNOWN_FIELDS = COMMON_FIELDS.union(*SCHEMAS.values())
+
+# Snapshot metrics read by the analyzers (numbers, 0 when missing)
+SNAPSHOT_NUMBERS = [
+    "age_seconds", "market_cap", "liquidity", "holders", "buy_sell_ratio", "lp_burned",
+    "price_change_1m", "price_change_5m", "price_change_15m", "price_change_1h",
+    "top10_holders_pct", "sniper_count", "sniper_balance_pct", "insider_count", "insider_balance_pct",
+    "dev_holdings_pct", "risk_score", "price_usd", "price_sol",
+]
+# Everything else a tracker snapshot carries (kept in `analysis`, not counted as unrecognized)
+KNOWN_ANALYSIS_FIELDS = set(SNAPSHOT_NUMBERS) | {
+    "name", "symbol", "mint", "decimals", "creator", "created_tx", "deployer", "pool_id", "quote_token",
+    "image_url", "description", "has_metadata", "market", "freeze_authority", "mint_authority",
+    "token_supply", "total_txns", "buys", "sells", "pool_buys", "pool_sells", "pool_total_txns",
+    "pool_volume", "pool_volume_24h", "dev_holdings_amount", "is_rugged", "jupiter_verified", "backfilled",
+}
+
+
+def _number(value, default=0):
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def to_epoch(value):
+    """ISO string / datetime -> epoch seconds (naive times are taken as-is, like the reports); None if unparseable"""
+    if value is None:
+        return None
+    try:
+        dt = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return calendar.timegm(dt.timetuple()) + dt.microsecond / 1e6
+
+
+def to_datetime(ts):
+    """Epoch seconds back to the naive datetime the history was written with"""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None) if ts is not None else None
+
+
+class Snapshot:
+    """
+    Token snapshot metrics as attributes. Backfilled snapshots were fetched long after the trade, so they
+    don't describe the entry: they are read like a missing one (`present` False, zeros) and only flagged.
+    """
+
+    __slots__ = SNAPSHOT_NUMBERS + ["market", "freeze_authority", "mint_authority", "present", "backfilled"]
+
+    def __init__(self, analysis=None):
+        analysis = analysis or {}
+        self.backfilled = bool(analysis.get("backfilled"))
+        if self.backfilled:
+            analysis = {}
+        self.present = bool(analysis)
+        for field in SNAPSHOT_NUMBERS:
+            setattr(self, field, _number(analysis.get(field)))
+        self.market = analysis.get("market") or ""
+        self.freeze_authority = analysis.get("freeze_authority")
+        self.mint_authority = analysis.get("mint_authority")
+
+
+EMPTY_SNAPSHOT = Snapshot()
+
+
+class TradeRecord:
+    """One trade in canonical form; `analysis` keeps the full snapshot dict (None if there was none)"""
+
+    __slots__ = ("ts", "detected_ts", "action", "token", "token_name", "token_symbol", "tx",
+                 "sol_amount", "token_amount", "price_usd", "value_usd", "fee_sol", "sol_balance",
+                 "pnl_sol", "pnl_pct", "pnl_usd", "mfe_pct", "mae_pct", "detected_via", "snapshot", "analysis")
+
+    def __init__(self, ts, detected_ts, action, token, token_name, token_symbol, tx, sol_amount, token_amount,
+                 price_usd, value_usd, fee_sol, sol_balance, pnl_sol, pnl_pct, pnl_usd, mfe_pct, mae_pct,
+                 detected_via, analysis):
+        self.ts = ts
+        self.detected_ts = detected_ts
+        self.action = action
+        self.token = token
+        self.token_name = token_name
+        self.token_symbol = token_symbol
+        self.tx = tx
+        self.sol_amount = sol_amount
+        self.token_amount = token_amount
+        self.price_usd = price_usd
+        self.value_usd = value_usd
+        self.fee_sol = fee_sol
+        self.sol_balance = sol_balance
+        self.pnl_sol = pnl_sol
+        self.pnl_pct = pnl_pct
+        self.pnl_usd = pnl_usd
+        self.mfe_pct = mfe_pct
+        self.mae_pct = mae_pct
+        self.detected_via = detected_via
+        self.analysis = analysis or None
+        self.snapshot = Snapshot(analysis) if analysis else EMPTY_SNAPSHOT
+
+    def to_dict(self):
+        """Canonical tracker-v2 trade dict (as data.py writes it)"""
+        trade = {
+            "timestamp": str(to_datetime(self.ts)) if self.ts is not None else None,
+            "timestamp_detected": str(to_datetime(self.detected_ts)) if self.detected_ts is not None else None,
+            "action": self.action,
+            "token": self.token,
+            "token_name": self.token_name,
+            "token_symbol": self.token_symbol,
+            "sol_amount": self.sol_amount,
+            "token_amount": self.token_amount,
+            "price_usd": self.price_usd,
+            "value_usd": self.value_usd,
+        }
+        if self.action == "SELL":
+            trade.update(pnl_sol=self.pnl_sol, pnl_pct=self.pnl_pct, pnl_usd=self.pnl_usd)
+            if self.mfe_pct is not None:
+                trade.update(mfe_pct=self.mfe_pct, mae_pct=self.mae_pct)
+        if self.fee_sol:
+            trade["fee_sol"] = self.fee_sol
+        if self.sol_balance is not None:
+            trade["sol_balance"] = self.sol_balance
+        if self.detected_via:
+            trade["detected_via"] = self.detected_via
+        trade["tx"] = self.tx
+        trade["analysis"] = self.analysis
+        return trade
+
+
+def _paper_v1(t):
+    """(sol_amount, token_amount, price_usd, value_usd, fee_sol, sol_balance, pnl_sol, pnl_pct, pnl_usd)"""
+    sell = t.get("action") == "SELL"
+    sol = _number(t.get("sol_received") if sell else t.get("sol_spent"))
+    tokens = _number(t.get("amount"))
+    price = _number(t.get("price"))
+    pnl_pct = _number(t.get("pnl_pct") if t.get("pnl_pct") is not None else t.get("your_pnl_pct"))
+    pnl_usd = _number(t.get("pnl_usd") if t.get("pnl_usd") is not None else t.get("your_pnl_usd"))
+    # Paper trades were sized in SOL; the P/L in SOL follows from what came back vs the cost basis
+    pnl_sol = sol - sol / (1 + pnl_pct / 100) if sell and pnl_pct > -100 else 0
+    return sol, tokens, price, tokens * price, _number(t.get("fee_sol")), t.get("sol_balance"), pnl_sol, pnl_pct, pnl_usd
+
+
+def _tracker_v2(t):
+    """(sol_amount, token_amount, price_usd, value_usd, fee_sol, sol_balance, pnl_sol, pnl_pct, pnl_usd)"""
+    sol = _number(t.get("sol_amount"))
+    value = _number(t.get("value_usd"))
+    pnl_sol = _number(t.get("pnl_sol"))
+    pnl_usd = t.get("pnl_usd")
+    if pnl_usd is None:
+        # The tracker records P/L in SOL; the trade's own USD/SOL rate converts it
+        pnl_usd = pnl_sol * value / sol if sol else 0
+    return (sol, _number(t.get("token_amount")), _number(t.get("price_usd")), value, _number(t.get("fee_sol")),
+            t.get("sol_balance"), pnl_sol, _number(t.get("pnl_pct")), _number(pnl_usd))
+
+
+READERS = {"paper-v1": _paper_v1, "tracker-v2": _tracker_v2}
+
+
+def record_schema(t):
+    """'tracker-v2', 'paper-v1' or 'unknown' (read like paper-v1) for one raw trade dict"""
+    if "sol_amount" in t or "value_usd" in t:
+        return "tracker-v2"
+    return "unknown" if SCHEMAS["paper-v1"].isdisjoint(t) else "paper-v1"
+
+
+def _overall_schema(counts):
+    known = [name for name in counts if name != "unknown"]
+    if len(known) > 1:
+        return "mixed"
+    return known[0] if known else "unknown"
+
+
+def detect_schema(history):
+    """'paper-v1', 'tracker-v2', 'mixed' (both seen) or 'unknown', looking at every record"""
+    return _overall_schema(Counter(map(record_schema, history)))
+
+
+def normalize_trade(t, reader=None):
+    """One raw trade dict -> TradeRecord (`reader` from the record's schema; detected here if None)"""
+    sol, tokens, price, value, fee, balance, pnl_sol, pnl_pct, pnl_usd = (
+        reader or READERS.get(record_schema(t), _paper_v1))(t)
+    return TradeRecord(
+        to_epoch(t.get("timestamp")), to_epoch(t.get("timestamp_detected")), t.get("action"), t.get("token"),
+        t.get("token_name", "Unknown"), t.get("token_symbol", "Unknown"), t.get("tx", ""),
+        sol, tokens, price, value, fee, balance, pnl_sol, pnl_pct, pnl_usd,
+        t.get("mfe_pct"), t.get("mae_pct"), t.get("detected_via"), t.get("analysis"),
+    )
+
+
+def normalize_history(history):
+    """
+    Raw trade dicts -> (records, report) in one pass.
+    report = {'schema', 'schemas' (Counter of records per schema), 'records', 'untimed' (no parseable timestamp),
+    'backfilled' (snapshots ignored as entry data), 'unrecognized': Counter of unknown field names
+    ('analysis.<field>' for snapshot fields)}.
+    """
+    schemas = Counter()
+    unrecognized = Counter()
+    records = []
+    untimed = backfilled = 0
+    for t in history:
+        schema = record_schema(t)
+        schemas[schema] += 1
+        extra = t.keys() - KNOWN_FIELDS
+        if extra:
+            unrecognized.update(extra)
+        analysis = t.get("analysis")
+        if analysis:
+            extra = analysis.keys() - KNOWN_ANALYSIS_FIELDS
+            if extra:
+                unrecognized.update(f"analysis.{k}" for k in extra)
+        record = normalize_trade(t, READERS.get(schema, _paper_v1))
+        untimed += record.ts is None
+        backfilled += record.snapshot.backfilled
+        records.append(record)
+    return records, {"schema": _overall_schema(schemas), "schemas": schemas, "records": len(records),
+                     "untimed": untimed, "backfilled": backfilled, "unrecognized": unrecognized}
+
+
+def ensure_records(trades):
+    """TradeRecords as-is; raw trade dicts (e.g. straight from load_data) are normalized, each by its own schema"""
+    if all(isinstance(t, TradeRecord) for t in trades):
+        return trades
+    return [t if isinstance(t, TradeRecord) else normalize_trade(t) for t in trades]
+
+
+def describe(report):
+    """One-line summary of a normalization report"""
+    unknown = report["unrecognized"]
+    text = f"🧾 Schema: {report['schema']} ({report['records']:,} records"
+    if report["schema"] == "mixed":
+        text += ": " + ", ".join(f"{name} ×{count:,}" for name, count in report["schemas"].most_common())
+    if report["untimed"]:
+        text += f", {report['untimed']:,} without a timestamp"
+    if report["backfilled"]:
+        text += f", {report['backfilled']:,} backfilled snapshots ignored"
+    text += ")"
+    if unknown:
+        top = ", ".join(f"{name} ×{count}" for name, count in unknown.most_common(5))
+        text += f" | {len(unknown)} unrecognized field(s): {top}"
+    return text
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python trade_schema.py <history.json> [canonical.json]")
+        sys.exit(1)
+    with open(sys.argv[1], "r") as f:
+        history = unpack_history(json.load(f))
+    records, report = normalize_history(history)
+    print(describe(report))
+    for name, count in sorted(report["unrecognized"].items()):
+        print(f"   {name}: {count}")
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            json.dump(pack_history([r.to_dict() for r in records]), f, indent=2, default=str)
+        print(f"✅ Wrote {len(records)} canonical records to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
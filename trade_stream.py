@@ -0,0 +1,351 @@
+"""
+📡 PUSH TRADE STREAM
+=====================
+Server-sent-events subscription for the tracked wallet's swaps, with automatic
+fallback to polling `get_wallet_trades()` while the stream is down.
+
+Each event is one raw trade in the same shape `/wallet/{wallet}/trades` returns:
+
+    id: <cursor>
+    event: trade
+    data: {"tx": ..., "time": ..., "from": {...}, "to": {...}, ...}
+
+Lines starting with ':' are heartbeats. The client reconnects with exponential
+backoff and resumes via `Last-Event-ID`; after every (re)connect the feed does
+one poll to cover anything missed while disconnected (process_trade dedupes
+by tx). Trades that came through the stream are marked detected_via="stream",
+so the lag improvement shows up in `timestamp_detected - timestamp`.
+
+Local stand-in provider (SSE at /stream + the polling endpoint), for tests:
+    python trade_stream.py serve --port 8765 --replay trade_history.json --speed 20
+    # data.py: STREAM_URL = "http://localhost:8765/stream"
+
+Detection lag per source:
+    python trade_stream.py lag trade_history.json
+"""
+
+import argparse
+import json
+import queue
+import re
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+
+from history_format import unpack_history
+
+STREAM_STALE_AFTER = 30  # seconds without data or heartbeat before the stream counts as down
+STREAM_MAX_BACKOFF = 30  # seconds between reconnect attempts, at most
+STREAM_HEARTBEAT = 10  # stand-in server heartbeat interval
+
+
+class TradeStream:
+    """Background SSE client; parsed trades land in `queue` oldest first"""
+
+    def __init__(self, url, headers=None, stale_after=STREAM_STALE_AFTER, max_backoff=STREAM_MAX_BACKOFF):
+        self.url = url
+        self.headers = headers or {}
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue()
+        self.last_event_id = None
+        self.connected = False
+        self.resync = False  # set on every (re)connect until the feed has polled once
+
+    def start(self):
+        Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self):
+        backoff = 1
+        warned = False
+        while True:
+            try:
+                self._consume()
+            except Exception as e:
+                if self.connected:
+                    print(f"⚠️  Stream lost ({e}) - falling back to polling")
+                    backoff = 1
+                elif not warned:
+                    print(f"⚠️  Stream unavailable ({e}) - polling until it connects")
+                    warned = True
+            else:
+                if self.connected:
+                    print("⚠️  Stream closed - falling back to polling")
+                    backoff = 1
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _consume(self):
+        headers = {"Accept": "text/event-stream", **self.headers}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        # The socket timeout doubles as the staleness check: no heartbeat in time -> reconnect
+        with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=self.stale_after) as resp:
+            self.connected = True
+            self.resync = True
+            print(f"📡 Stream connected{f' (resuming after {self.last_event_id})' if self.last_event_id else ''}")
+            event_id, event_type, data = None, "message", []
+            for raw in resp:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if not line:
+                    if data:
+                        self._dispatch(event_id, event_type, "\n".join(data))
+                    event_id, event_type, data = None, "message", []
+                    continue
+                if line.startswith(":"):
+                    continue
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "id":
+                    event_id = value
+                elif field == "event":
+                    event_type = value
+                elif field == "data":
+                    data.append(value)
+
+    def _dispatch(self, event_id, event_type, data):
+        if event_type in ("trade", "message"):
+            try:
+                trade = json.loads(data)
+                if not isinstance(trade, dict):
+                    raise ValueError("not a JSON object")
+            except ValueError as e:
+                # Skipped for good: resuming before it would replay the same broken event forever
+                print(f"⚠️  Skipping malformed stream event {event_id or '(no id)'}: {e}: {data[:200]!r}")
+            else:
+                trade["detected_via"] = "stream"
+                self.queue.put(trade)
+        if event_id:
+            self.last_event_id = event_id
+
+    def take_resync(self):
+        resync, self.resync = self.resync, False
+        return resync
+
+    def drain(self, timeout=0):
+        """Everything queued; waits up to `timeout` s for the first trade"""
+        try:
+            trades = [self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                trades.append(self.queue.get_nowait())
+            except queue.Empty:
+                return trades
+
+
+class TradeFeed:
+    """Raw trades (oldest first) from the stream while it is up, from polling otherwise"""
+
+    def __init__(self, poll, stream=None, interval=4):
+        self.poll = poll
+        self.stream = stream
+        self.interval = interval
+        self.last_poll = 0
+
+    def _poll(self):
+        self.last_poll = time.monotonic()
+        return list(reversed(self.poll()))
+
+    def next_batch(self):
+        stream = self.stream
+        if stream and stream.connected:
+            if stream.take_resync():
+                # Cover whatever happened while the stream was down
+                return self._poll() + stream.drain()
+            return stream.drain(timeout=self.interval)
+
+        wait = self.last_poll + self.interval - time.monotonic()
+        if wait > 0:
+            if not stream:
+                time.sleep(wait)
+            else:
+                # Wake up early if the stream comes back
+                trades = stream.drain(timeout=wait)
+                if trades or stream.connected:
+                    return trades
+        return self._poll()
+
+
+# ---- stand-in provider ---------------------------------------------------
+
+class StandInServer:
+    """Local stand-in: SSE at /stream (resumable by Last-Event-ID) and polling at /wallet/<w>/trades"""
+
+    def __init__(self, port=8765, heartbeat=STREAM_HEARTBEAT):
+        self.events = []  # (id, trade), ids are 1-based positions
+        self.cond = Condition()
+        self.generation = 0  # bumped by drop_clients()
+        self.heartbeat = heartbeat
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def publish(self, trade):
+        with self.cond:
+            self.events.append((len(self.events) + 1, trade))
+            self.cond.notify_all()
+
+    def drop_clients(self):
+        """Disconnect every stream client (they should reconnect and resume)"""
+        with self.cond:
+            self.generation += 1
+            self.cond.notify_all()
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.drop_clients()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] == "/stream":
+                    self.stream()
+                elif re.fullmatch(r"/wallet/[^/]+/trades", self.path.split("?")[0]):
+                    with stand_in.cond:
+                        latest = [t for _, t in stand_in.events[-100:]][::-1]
+                    body = json.dumps({"trades": latest}).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404)
+
+            def stream(self):
+                try:
+                    sent = int(self.headers.get("Last-Event-ID") or 0)
+                except ValueError:
+                    sent = 0
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                generation = stand_in.generation
+                try:
+                    while True:
+                        with stand_in.cond:
+                            if len(stand_in.events) <= sent and stand_in.generation == generation:
+                                stand_in.cond.wait(stand_in.heartbeat)
+                            if stand_in.generation != generation:
+                                return
+                            new = stand_in.events[sent:]
+                        if new:
+                            for event_id, trade in new:
+                                self.wfile.write(f"id: {event_id}\nevent: trade\ndata: {json.dumps(trade)}\n\n".encode("utf-8"))
+                            sent = new[-1][0]
+                        else:
+                            self.wfile.write(b": ping\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+
+        return Handler
+
+
+def to_api_trade(record, now_ms=None):
+    """A tracker history record back in the raw /wallet/trades shape (for replaying captures)"""
+    sol = {"address": "So11111111111111111111111111111111111111112", "amount": record.get("sol_amount", 0),
+           "token": {"symbol": "SOL", "name": "Wrapped SOL"}}
+    token = {"address": record.get("token"), "amount": record.get("token_amount", 0),
+             "priceUsd": record.get("price_usd", 0),
+             "token": {"symbol": record.get("token_symbol"), "name": record.get("token_name")}}
+    buy = record.get("action") == "BUY"
+    ts = datetime.fromisoformat(str(record.get("timestamp"))).timestamp() * 1000
+    return {
+        "tx": record.get("tx"),
+        "time": int(now_ms if now_ms is not None else ts),
+        "from": sol if buy else token,
+        "to": token if buy else sol,
+        "volume": {"usd": record.get("value_usd", 0)},
+    }
+
+
+def replay(server, history, speed=1.0):
+    """Publish a capture's trades with their original spacing divided by `speed`, stamped with the current time"""
+    previous = None
+    for record in history:
+        ts = datetime.fromisoformat(str(record.get("timestamp"))).timestamp()
+        if previous is not None:
+            time.sleep(max(0.0, (ts - previous) / speed))
+        previous = ts
+        server.publish(to_api_trade(record, now_ms=time.time() * 1000))
+
+
+# ---- lag report ----------------------------------------------------------
+
+def detection_lag(history):
+    """source -> {'count', 'mean', 'median', 'p90'} of timestamp_detected - timestamp in seconds"""
+    lags = {}
+    for t in history:
+        try:
+            lag = (datetime.fromisoformat(str(t["timestamp_detected"]))
+                   - datetime.fromisoformat(str(t["timestamp"]))).total_seconds()
+        except (KeyError, ValueError):
+            continue
+        lags.setdefault(t.get("detected_via", "poll"), []).append(lag)
+    report = {}
+    for source, values in lags.items():
+        values.sort()
+        report[source] = {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "median": values[len(values) // 2],
+            "p90": values[min(len(values) - 1, int(len(values) * 0.9))],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade stream stand-in server and detection lag report")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run the local stand-in stream/polling server")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--replay", metavar="HISTORY", help="publish the trades of a capture")
+    serve.add_argument("--speed", type=float, default=1.0, help="replay speed-up factor")
+    lag = sub.add_parser("lag", help="detection lag per source (stream vs poll)")
+    lag.add_argument("history", nargs="?", default="trade_history.json")
+    args = parser.parse_args()
+
+    if args.cmd == "lag":
+        with open(args.history, "r") as f:
+            report = detection_lag(unpack_history(json.load(f)))
+        for source, s in sorted(report.items()):
+            print(f"{source:8} {s['count']:6} trades | mean {s['mean']:.2f}s | median {s['median']:.2f}s | p90 {s['p90']:.2f}s")
+        return
+
+    server = StandInServer(args.port).start()
+    print(f"📡 Stand-in stream: http://localhost:{server.port}/stream (polling: /wallet/<wallet>/trades)")
+    try:
+        if args.replay:
+            with open(args.replay, "r") as f:
+                history = unpack_history(json.load(f))
+            replay(server, history, args.speed)
+            print(f"✅ Replayed {len(history)} trades")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+🧠 ENTRY FEATURE WIN CLASSIFIER
+================================
+Logistic regression on the entry snapshot of every completed round-trip:
+which `analysis` fields at the buy actually predict a profitable exit?
+
+Features are standardized (heavy-tailed ones log-scaled first) so the learned
+weights are directly comparable; their magnitude is the importance ranking
+and their sign the direction. Trained with batched gradient descent on the
+feature matrix - numpy mini-batches when installed, otherwise full-batch
+steps in pure Python with fewer iterations on a sample of at most
+FALLBACK_MAX_ROWS round-trips. Accuracy is k-fold cross-validated and reported next
+to the majority-class baseline, so "72% accurate" can be read honestly.
+"""
+
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# (completed-trade field, label, log-scale)
+FEATURES = [
+    ('buy_age', "Token age", True),
+    ('buy_mc', "Market cap", True),
+    ('buy_liq', "Liquidity", True),
+    ('buy_holders', "Holders", True),
+    ('buy_ratio', "Buy/sell ratio", False),
+    ('buy_price_1m', "Price change 1m", False),
+    ('buy_price_5m', "Price change 5m", False),
+    ('buy_price_15m', "Price change 15m", False),
+    ('buy_price_1h', "Price change 1h", False),
+    ('buy_top10', "Top 10 holders %", False),
+    ('buy_snipers', "Sniper count", False),
+    ('buy_sniper_pct', "Sniper balance %", False),
+    ('buy_insiders', "Insider count", False),
+    ('buy_insider_pct', "Insider balance %", False),
+    ('buy_dev_pct', "Dev holdings %", False),
+    ('buy_risk', "Risk score", False),
+    ('buy_lp_burn', "LP burn %", False),
+]
+
+FOLDS = 5
+MIN_ROWS = 30
+LEARNING_RATE = 1.0
+L2 = 1e-3
+BATCH_SIZE = 512
+STEPS = 2000  # gradient steps per fit (numpy)
+FALLBACK_STEPS = 100  # pure Python, full batch
+FALLBACK_MAX_ROWS = 1000  # pure Python trains on a seeded sample of larger captures
+SEED = 1234
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def feature_matrix(rows):
+    """(X, y) from completed round-trips: raw (log-scaled where configured) features and 1/0 win labels"""
+    X = []
+    for r in rows:
+        x = []
+        for field, _, log_scale in FEATURES:
+            v = _number(r.get(field))
+            x.append(math.log1p(max(v, 0.0)) if log_scale else v)
+        X.append(x)
+    y = [1.0 if (r.get('pnl_pct') or 0) > 0 else 0.0 for r in rows]
+    return X, y
+
+
+def _standardizer(X):
+    if np is not None:
+        stds = X.std(axis=0)
+        return X.mean(axis=0), np.where(stds > 0, stds, 1.0)
+    d = len(X[0])
+    n = len(X)
+    means = [math.fsum(x[j] for x in X) / n for j in range(d)]
+    stds = []
+    for j in range(d):
+        var = math.fsum((x[j] - means[j]) ** 2 for x in X) / n
+        stds.append(math.sqrt(var) or 1.0)
+    return means, stds
+
+
+def _standardize(X, means, stds):
+    if np is not None:
+        return (X - means) / stds
+    return [[(v - m) / s for v, m, s in zip(x, means, stds)] for x in X]
+
+
+def _take(X, idx):
+    return X[np.asarray(idx, dtype=int)] if np is not None else [X[i] for i in idx]
+
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1 / (1 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1 + e)
+
+
+def _fit(X, y, seed):
+    """Weights and bias of an L2-regularized logistic regression on standardized X"""
+    n, d = len(X), len(X[0])
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        Xa, ya = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+        w, b = np.zeros(d), 0.0
+        batch = min(BATCH_SIZE, n)
+        steps = 0
+        while steps < STEPS:
+            order = rng.permutation(n)
+            for start in range(0, n - batch + 1, batch):
+                idx = order[start:start + batch]
+                xb = Xa[idx]
+                p = 1 / (1 + np.exp(-np.clip(xb @ w + b, -30, 30)))
+                g = p - ya[idx]
+                w -= LEARNING_RATE * (xb.T @ g / batch + L2 * w)
+                b -= LEARNING_RATE * float(g.mean())
+                steps += 1
+                if steps >= STEPS:
+                    break
+        return [float(v) for v in w], b
+
+    # Full-batch steps; columns are kept separately so the gradient is d dot products
+    columns = [[x[j] for x in X] for j in range(d)]
+    w, b = [0.0] * d, 0.0
+    for _ in range(FALLBACK_STEPS):
+        g = [_sigmoid(sum(map(float.__mul__, x, w)) + b) - t for x, t in zip(X, y)]
+        for j in range(d):
+            w[j] -= LEARNING_RATE * (sum(map(float.__mul__, columns[j], g)) / n + L2 * w[j])
+        b -= LEARNING_RATE * sum(g) / n
+    return w, b
+
+
+def _accuracy(X, y, w, b):
+    if np is not None:
+        return float(np.mean((X @ np.asarray(w) + b > 0) == (y > 0.5)))
+    hits = sum((sum(map(float.__mul__, x, w)) + b > 0) == (t > 0.5) for x, t in zip(X, y))
+    return hits / len(y)
+
+
+def cross_validate(X, y, folds=FOLDS, seed=SEED):
+    """Mean held-out accuracy over k shuffled folds (standardization is fit on each training split)"""
+    order = list(range(len(X)))
+    random.Random(seed).shuffle(order)
+    scores = []
+    for k in range(folds):
+        test = set(order[k::folds])
+        train_idx = [i for i in order if i not in test]
+        test_idx = sorted(test)
+        train_X, train_y = _take(X, train_idx), _take(y, train_idx)
+        if min(sum(train_y), len(train_idx) - sum(train_y)) == 0:
+            continue
+        means, stds = _standardizer(train_X)
+        w, b = _fit(_standardize(train_X, means, stds), train_y, seed + k)
+        scores.append(_accuracy(_standardize(_take(X, test_idx), means, stds), _take(y, test_idx), w, b))
+    return scores
+
+
+def train_win_classifier(rows, folds=FOLDS, seed=SEED):
+    """
+    Fit on all completed round-trips and cross-validate.
+    Returns {'features': [{'field', 'label', 'weight', 'importance'}] ranked by |weight|, 'bias',
+    'cv_accuracy', 'cv_scores', 'baseline_accuracy', 'train_accuracy', 'n' (rows trained on), 'total',
+    'sampled' (n < total), 'method'};
+    None with fewer than MIN_ROWS rows or only one outcome.
+    """
+    if len(rows) < MIN_ROWS:
+        return None
+    total_rows = len(rows)
+    if np is None and total_rows > FALLBACK_MAX_ROWS:
+        rows = random.Random(seed).sample(rows, FALLBACK_MAX_ROWS)
+    X, y = feature_matrix(rows)
+    wins = sum(y)
+    if wins in (0, len(y)):
+        return None
+    if np is not None:
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+
+    scores = cross_validate(X, y, folds, seed)
+    means, stds = _standardizer(X)
+    Xs = _standardize(X, means, stds)
+    w, b = _fit(Xs, y, seed)
+
+    total = math.fsum(abs(v) for v in w) or 1.0
+    features = [
+        {'field': field, 'label': label, 'weight': float(weight), 'importance': abs(weight) / total * 100}
+        for (field, label, _), weight in zip(FEATURES, w)
+    ]
+    features.sort(key=lambda f: abs(f['weight']), reverse=True)
+    return {
+        'features': features,
+        'bias': float(b),
+        'cv_accuracy': math.fsum(scores) / len(scores) if scores else None,
+        'cv_scores': scores,
+        'folds': folds,
+        'baseline_accuracy': float(max(wins, len(y) - wins) / len(y)),
+        'train_accuracy': _accuracy(Xs, y, w, b),
+        'n': len(y),
+        'total': total_rows,
+        'sampled': len(y) < total_rows,
+        'method': 'numpy' if np is not None else 'python',
+    }